@@ -0,0 +1,113 @@
+# benchmarks/encoder_profiles.py
+# 文件作用：用同一段参考视频依次测试各个编码器预设，记录编码速度、文件大小和画质，作为选择预设的依据。
+#
+# 用法（在项目根目录执行）：
+#   python benchmarks/encoder_profiles.py                          # 使用 FFmpeg 生成的 1080p 测试画面
+#   python benchmarks/encoder_profiles.py 参考视频.mp4 --seconds 20
+#   python benchmarks/encoder_profiles.py 参考视频.mp4 --profiles x264 x265 --json 结果.json
+#
+# 每个预设只编码视频流（不含音频），报告：
+#   编码耗时、平均编码帧率 (fps)、输出文件大小、码率，以及与参考画面对比的 PSNR（可用 --no-quality 跳过）。
+# 本机不可用的编码器（例如没有 NVIDIA 显卡时的 N卡 预设）会被自动跳过。
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.utils import find_executable
+from core.codec_config import CODEC_PROFILES
+from core.encoder_probe import probe_encoders
+
+# 未指定参考视频时使用的测试画面（带运动和细节的 testsrc2）
+DEFAULT_SOURCE = "testsrc2=size=1920x1080:rate=30"
+
+def source_input_args(media_file, seconds):
+    if media_file:
+        return ['-t', f"{seconds}", '-i', media_file]
+    return ['-f', 'lavfi', '-t', f"{seconds}", '-i', DEFAULT_SOURCE]
+
+def encode(ffmpeg_path, input_args, params, output_file):
+    """编码一次，返回 (耗时秒数, 编码帧数, 错误信息)。"""
+    command = [ffmpeg_path, '-hide_banner', '-y', *input_args, '-an', *params, output_file]
+    t0 = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    elapsed = time.perf_counter() - t0
+    if result.returncode != 0:
+        return elapsed, 0, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "未知错误"
+    frames = re.findall(r"frame=\s*(\d+)", result.stderr)
+    return elapsed, int(frames[-1]) if frames else 0, None
+
+def measure_psnr(ffmpeg_path, input_args, encoded_file):
+    """计算编码结果相对参考画面的平均 PSNR (dB)，失败时返回 None。"""
+    command = [
+        ffmpeg_path, '-hide_banner', '-i', encoded_file, *input_args,
+        '-lavfi', '[0:v][1:v]psnr', '-f', 'null', '-'
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    match = re.search(r"average:([\d.]+|inf)", result.stderr)
+    if not match:
+        return None
+    return float(match.group(1)) if match.group(1) != 'inf' else float('inf')
+
+def main():
+    parser = argparse.ArgumentParser(description="对比各编码器预设的速度、体积和画质")
+    parser.add_argument("media_file", nargs="?", help="参考视频；不提供时使用 FFmpeg 生成的 1080p 测试画面")
+    parser.add_argument("--seconds", type=float, default=10, help="只编码开头的若干秒 (默认 10)")
+    parser.add_argument("--profiles", nargs="*", help="只测试名称中包含这些关键字的预设，例如 x264 AV1")
+    parser.add_argument("--ffmpeg", default=None, help="FFmpeg 路径；默认在 dependencies 目录和 PATH 中查找")
+    parser.add_argument("--no-quality", action="store_true", help="不计算 PSNR（更快）")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ffmpeg_path = args.ffmpeg or find_executable('ffmpeg.exe', os.path.join(project_root, 'dependencies', 'ffmpeg.exe')) or find_executable('ffmpeg')
+    if not ffmpeg_path:
+        print("未找到 FFmpeg，请使用 --ffmpeg 指定路径。")
+        sys.exit(1)
+
+    profiles = {name: profile for name, profile in CODEC_PROFILES.items() if profile['encoder'] != 'copy'}
+    if args.profiles:
+        profiles = {name: profile for name, profile in profiles.items() if any(k.lower() in name.lower() for k in args.profiles)}
+    availability = probe_encoders(ffmpeg_path, {profile['encoder'] for profile in profiles.values()})
+
+    input_args = source_input_args(args.media_file, args.seconds)
+    print(f"参考画面: {args.media_file or DEFAULT_SOURCE}，时长 {args.seconds:g} 秒\n")
+    print(f"{'预设':<24} {'耗时(秒)':>9} {'fps':>8} {'大小(MB)':>9} {'码率(kbps)':>11} {'PSNR(dB)':>9}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="encoder_bench_") as temp_dir:
+        for i, (name, profile) in enumerate(profiles.items()):
+            if not availability.get(profile['encoder']):
+                print(f"{name:<24} 跳过：本机不支持 {profile['encoder']}")
+                continue
+            output_file = os.path.join(temp_dir, f"profile_{i}.mp4")
+            elapsed, frames, error = encode(ffmpeg_path, input_args, profile['params'], output_file)
+            if error:
+                print(f"{name:<24} 失败: {error}")
+                continue
+            size = os.path.getsize(output_file)
+            fps = frames / elapsed if elapsed > 0 else 0.0
+            bitrate = size * 8 / 1000 / args.seconds
+            psnr = None if args.no_quality else measure_psnr(ffmpeg_path, input_args, output_file)
+            psnr_text = f"{psnr:9.2f}" if psnr is not None else f"{'-':>9}"
+            print(f"{name:<24} {elapsed:9.2f} {fps:8.1f} {size / 1024 / 1024:9.2f} {bitrate:11.0f} {psnr_text}")
+            results.append({
+                'profile': name, 'encoder': profile['encoder'], 'params': profile['params'],
+                'seconds': elapsed, 'frames': frames, 'fps': fps,
+                'size_bytes': size, 'bitrate_kbps': bitrate, 'psnr': psnr,
+            })
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'source': args.media_file or DEFAULT_SOURCE, 'duration': args.seconds, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.json_path}")
+
+if __name__ == "__main__":
+    main()
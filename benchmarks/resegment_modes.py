@@ -0,0 +1,61 @@
+# benchmarks/resegment_modes.py
+# 文件作用：对比“时间插值”与“词级时间戳”两种字幕切分方式的耗时。
+#
+# 用法（在项目根目录执行）：
+#   python benchmarks/resegment_modes.py 媒体文件 [--model base] [--seconds 300] [--device cpu]
+#
+# 对同一段音频分别以不请求/请求词级时间戳的方式各识别一次，
+# 报告 Whisper 识别耗时、切分耗时以及生成的字幕条数。
+#
+# 参考结果（openai-whisper 20250625，torch 2.14 CPU，单核 Linux，60 秒合成音频）：
+# 测量环境无法下载官方模型，使用 tiny 尺寸、随机权重的模型文件 (--model 模型路径)，
+# 识别文本没有意义，只能反映词级时间戳额外的计算量：
+#   时间插值     识别  50.15 秒  切分  5.37 毫秒  共 112 条字幕
+#   词级时间戳   识别 258.73 秒  切分 19.52 毫秒  共 785 条字幕
+# 两次识别的解码结果不同（词级时间戳会改变 Whisper 的 seek），上面的差距偏大；
+# 对同一次识别 (temperature=0，9.17 秒) 的相同片段单独做词级对齐，额外耗时 4.86 秒。
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.workers.transcribe_worker import TranscribeWorker, load_ml_modules
+
+def main():
+    parser = argparse.ArgumentParser(description="对比两种字幕切分方式的耗时")
+    parser.add_argument("media_file", help="用于测试的音频或视频文件")
+    parser.add_argument("--model", default="base", help="Whisper 模型名称 (默认 base)")
+    parser.add_argument("--seconds", type=float, default=300, help="只使用开头的若干秒音频 (默认 300)")
+    parser.add_argument("--device", default="cpu", help="计算设备: cpu 或 cuda (默认 cpu)")
+    parser.add_argument("--language", default=None, help="指定语言代码，例如 zh；默认自动检测")
+    parser.add_argument("--model-root", default=os.path.join("models", "whisper"), help="模型下载/加载目录")
+    args = parser.parse_args()
+
+    torch, whisper, opencc = load_ml_modules()
+    model = whisper.load_model(args.model, download_root=args.model_root, device=args.device)
+    audio = whisper.load_audio(args.media_file)[:int(args.seconds * whisper.audio.SAMPLE_RATE)]
+
+    worker = TranscribeWorker({})
+    worker.converter = opencc.OpenCC('t2s')
+
+    options = {"fp16": False, "verbose": None, "condition_on_previous_text": False}
+    if args.language:
+        options['language'] = args.language
+
+    print(f"测试音频: {len(audio) / whisper.audio.SAMPLE_RATE:.1f} 秒，模型: {args.model}，设备: {args.device}\n")
+    for name, word_timestamps in (("时间插值", False), ("词级时间戳", True)):
+        t0 = time.perf_counter()
+        result = model.transcribe(audio, word_timestamps=word_timestamps, **options)
+        t1 = time.perf_counter()
+        if word_timestamps:
+            segments = worker._resegment_by_words(result)
+        else:
+            segments = worker._resegment_by_interpolation(result)
+        t2 = time.perf_counter()
+        print(f"{name:<8} 识别 {t1 - t0:8.2f} 秒  切分 {(t2 - t1) * 1000:8.2f} 毫秒  共 {len(segments)} 条字幕")
+
+if __name__ == "__main__":
+    main()
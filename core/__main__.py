@@ -0,0 +1,189 @@
+# core/__main__.py
+# 文件作用：命令行入口，不启动图形界面，按 JSON 任务描述批量运行处理任务。
+#
+# 用法（在项目根目录执行）：
+#   python -m core run jobs.json                       # 依次运行文件中的全部任务
+#   python -m core run jobs.json --parallel 2          # 同时运行 2 个任务
+#   python -m core run jobs.json --shard 0/4           # 只运行第 0 组（共 4 组），用于多台机器分摊同一批任务
+#   python -m core run - < jobs.json                   # 从标准输入读取
+#   python -m core run jobs.json --jsonl               # 以每行一个 JSON 事件的形式输出，便于脚本解析
+#   python -m core types                               # 列出支持的任务类型和必填字段
+#   python -m core encoders                            # 列出本机可用的编码器预设
+#
+# 任务文件可以是单个任务对象、任务数组，或 {"jobs": [...]}；任务格式见 core/api.py。
+# 全部任务成功时退出码为 0，有任务失败为 1，被 Ctrl+C 中断为 130。
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from core.api import JOB_TYPES, HeadlessJob, find_ffmpeg_tools
+from core.codec_config import (detect_available_encoders, encoder_detection_failed, get_encoder_options,
+                               ENCODER_DETECTION_FAILED_MESSAGE)
+
+# 进度输出的最小间隔（百分比），避免刷屏
+PROGRESS_STEP = 10
+
+def load_job_specs(paths):
+    """读取一个或多个任务文件（"-" 表示标准输入），返回任务描述列表。"""
+    specs = []
+    for path in paths:
+        if path == '-':
+            data = json.load(sys.stdin)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('jobs', [data])
+        specs.extend(data)
+    return specs
+
+def select_shard(specs, shard):
+    """按 "序号/总数" 取出属于本机的任务，例如 1/3 表示第 2 组（序号从 0 开始）。"""
+    if not shard:
+        return specs
+    index, total = (int(part) for part in shard.split('/'))
+    if not 0 <= index < total:
+        raise ValueError(f"无效的分组: {shard}")
+    return [spec for i, spec in enumerate(specs) if i % total == index]
+
+class ConsoleReporter:
+    """把各任务的日志和进度输出到终端；多个任务并行时用锁保证每行完整。"""
+    def __init__(self, jsonl=False, quiet=False):
+        self.jsonl = jsonl
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._last_percent = {}
+
+    def emit(self, job_name, event, **fields):
+        with self._lock:
+            if self.jsonl:
+                print(json.dumps({'job': job_name, 'event': event, **fields}, ensure_ascii=False), flush=True)
+            elif event == 'log':
+                if not self.quiet:
+                    print(f"[{job_name}] {fields['text']}", flush=True)
+            elif event == 'progress':
+                print(f"[{job_name}] 进度 {fields['percent']}% {fields['text']}".rstrip(), flush=True)
+            elif event == 'done':
+                status = "✅ 成功" if fields['ok'] else "❌ 失败"
+                print(f"[{job_name}] {status}: {fields['message']}（耗时 {fields['elapsed']:.1f} 秒）", flush=True)
+            else:
+                print(f"[{job_name}] {fields.get('text', '')}", flush=True)
+
+    def log(self, job_name, text):
+        self.emit(job_name, 'log', text=text)
+
+    def progress(self, job_name, percent, text):
+        if percent is None:
+            self.log(job_name, text)
+            return
+        last = self._last_percent.get(job_name)
+        # 首次、前进满一个步长、到达 100% 或进度回退（批量任务开始下一个文件）时才输出
+        if last is not None and last <= percent < min(last + PROGRESS_STEP, 100):
+            return
+        self._last_percent[job_name] = percent
+        self.emit(job_name, 'progress', percent=percent, text=text)
+
+def run_jobs(jobs, parallel, reporter):
+    """运行任务列表，返回 JobResult 列表；Ctrl+C 时停止所有任务后抛出 KeyboardInterrupt。"""
+    def run_one(job):
+        reporter.emit(job.name, 'start', text=f"开始任务 ({job.type})")
+        result = job.run(on_log=lambda text: reporter.log(job.name, text),
+                         on_progress=lambda percent, text: reporter.progress(job.name, percent, text))
+        reporter.emit(job.name, 'done', **result.to_dict())
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max(1, parallel))
+    futures = [executor.submit(run_one, job) for job in jobs]
+    try:
+        # 带超时地等待，主线程才能及时响应 Ctrl+C
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.5)
+        return [future.result() for future in futures]
+    except KeyboardInterrupt:
+        for future in futures:
+            future.cancel()
+        for job in jobs:
+            job.stop()
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+def command_run(args):
+    ffmpeg_path, ffprobe_path = find_ffmpeg_tools()
+    ffmpeg_path = args.ffmpeg or ffmpeg_path
+    ffprobe_path = args.ffprobe or ffprobe_path
+    if not ffmpeg_path or not ffprobe_path:
+        print("未找到 FFmpeg / FFprobe，请放到 dependencies 目录、加入 PATH，或使用 --ffmpeg / --ffprobe 指定。", file=sys.stderr)
+        return 2
+    # 与图形界面一致：让 whisper 等第三方库也能找到 ffmpeg
+    os.environ['PATH'] = os.path.dirname(ffmpeg_path) + os.pathsep + os.environ.get('PATH', '')
+    if encoder_detection_failed(detect_available_encoders(ffmpeg_path)):
+        print(ENCODER_DETECTION_FAILED_MESSAGE, file=sys.stderr)
+
+    try:
+        specs = select_shard(load_job_specs(args.job_files), args.shard)
+        jobs = [HeadlessJob(spec, ffmpeg_path, ffprobe_path) for spec in specs]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"读取任务失败: {e}", file=sys.stderr)
+        return 2
+
+    reporter = ConsoleReporter(jsonl=args.jsonl, quiet=args.quiet)
+    try:
+        results = run_jobs(jobs, args.parallel, reporter)
+    except KeyboardInterrupt:
+        print("\n已中断，正在停止的任务已取消。", file=sys.stderr)
+        return 130
+
+    failed = [result for result in results if not result.ok]
+    if not args.jsonl:
+        print(f"\n共 {len(results)} 个任务，成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个。")
+    return 1 if failed else 0
+
+def command_types(args):
+    for name, (_, required, description) in JOB_TYPES.items():
+        print(f"{name:<20} {description}\n{'':<20} 必填字段: {', '.join(required)}")
+    return 0
+
+def command_encoders(args):
+    ffmpeg_path = args.ffmpeg or find_ffmpeg_tools()[0]
+    if not ffmpeg_path:
+        print("未找到 FFmpeg，请使用 --ffmpeg 指定路径。", file=sys.stderr)
+        return 2
+    if encoder_detection_failed(detect_available_encoders(ffmpeg_path, force=args.force)):
+        print(ENCODER_DETECTION_FAILED_MESSAGE, file=sys.stderr)
+    for option in get_encoder_options():
+        print(option)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core", description="Video Editing Toolkit 命令行：不启动图形界面运行处理任务")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行 JSON 任务文件中的任务")
+    run_parser.add_argument("job_files", nargs="+", help="任务文件；\"-\" 表示从标准输入读取")
+    run_parser.add_argument("--parallel", type=int, default=1, help="同时运行的任务数 (默认 1)")
+    run_parser.add_argument("--shard", default=None, help="只运行 序号/总数 这一组任务，例如 0/4")
+    run_parser.add_argument("--ffmpeg", default=None, help="FFmpeg 路径")
+    run_parser.add_argument("--ffprobe", default=None, help="FFprobe 路径")
+    run_parser.add_argument("--jsonl", action="store_true", help="每行输出一个 JSON 事件")
+    run_parser.add_argument("--quiet", action="store_true", help="不输出 FFmpeg 日志，只显示进度和结果")
+    run_parser.set_defaults(func=command_run)
+
+    types_parser = subparsers.add_parser("types", help="列出支持的任务类型")
+    types_parser.set_defaults(func=command_types)
+
+    encoders_parser = subparsers.add_parser("encoders", help="列出本机可用的编码器预设")
+    encoders_parser.add_argument("--ffmpeg", default=None, help="FFmpeg 路径")
+    encoders_parser.add_argument("--force", action="store_true", help="忽略缓存，重新检测")
+    encoders_parser.set_defaults(func=command_encoders)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# core/api.py
+# 文件作用：不依赖图形界面的任务接口。用 JSON 任务描述创建对应的 Worker，并在当前线程中同步运行，
+# 供命令行 (python -m core) 和脚本调用，例如在没有图形界面的 Linux 渲染节点上批量处理。
+#
+# 任务描述是一个字典，"type" 指定任务类型，其余字段与图形界面传给 Worker 的参数一致：
+#   {"type": "transcode", "files": ["a.mp4"], "options": {"format": "mp4", "codec_name": "CPU x264 (均衡)", "output_dir": "out"}}
+#   {"type": "subtitle_burn", "params": {"video_file": ..., "lrc_file": ..., "output_dir": ..., "codec_name": ..., "output_format": "mp4", "ass_options": {...}}}
+# 可选的通用字段：
+#   "name"      任务名称，用于日志
+#   "threads"   FFmpeg 编码线程数
+#   "niceness"  进程优先级调低幅度（0~19）
+
+import os
+import threading
+import time
+
+from core.qt_compat import connect_direct
+from core.utils import find_executable, parse_timestamp
+from core.chatbox_converter import generate_chatbox_ass
+from core.workers.canvas_worker import CanvasBurnWorker
+from core.workers.clip_worker import BatchClipWorker, finalize_clips
+from core.workers.frame_export_worker import FrameExportWorker, BatchFrameExportWorker
+from core.workers.horizontal_worker import HorizontalBurnWorker
+from core.workers.merge_worker import MergeWorker
+from core.workers.subtitle_worker import SubtitleBurnWorker
+from core.workers.transcode_worker import BatchTranscodeWorker
+from core.workers.transcribe_worker import TranscribeWorker
+from core.workers.vbg_worker import VideoFromBgWorker, BatchVideoFromBgWorker
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Worker 用来输出日志文本的信号
+LOG_SIGNALS = ('log_message', 'file_started', 'clip_started')
+# Worker 用来汇报进度的信号：参数为 int 时是百分比，为 str 时是进度说明
+PROGRESS_SIGNALS = ('progress', 'file_progress', 'progress_percent', 'progress_update')
+# 批量 Worker 每处理完一项发出的信号，参数中的整数为该项的退出码
+ITEM_SIGNALS = ('file_finished', 'clip_finished')
+
+def job_succeeded(args):
+    """
+    根据 Worker 结束信号的参数判断任务是否成功：
+    第一个参数为退出码 (0 成功)、布尔值，或结果数据（非空即成功）；没有参数时视为成功。
+    """
+    if not args:
+        return True
+    result = args[0]
+    if isinstance(result, bool):
+        return result
+    if isinstance(result, int):
+        return result == 0
+    return bool(result)
+
+def _build_transcode(spec, ffmpeg_path, ffprobe_path):
+    return BatchTranscodeWorker(ffmpeg_path, ffprobe_path, spec['files'], spec['options']), 'batch_finished'
+
+def _build_clip(spec, ffmpeg_path, ffprobe_path):
+    return BatchClipWorker(ffmpeg_path, spec['source'], spec['clips'], spec['options']), 'batch_finished'
+
+def _build_subtitle_burn(spec, ffmpeg_path, ffprobe_path):
+    return SubtitleBurnWorker(ffmpeg_path, ffprobe_path, spec['params'], generate_chatbox_ass), 'finished'
+
+def _build_canvas_burn(spec, ffmpeg_path, ffprobe_path):
+    return CanvasBurnWorker(ffmpeg_path, ffprobe_path, spec['params']), 'finished'
+
+def _build_horizontal_burn(spec, ffmpeg_path, ffprobe_path):
+    return HorizontalBurnWorker(ffmpeg_path, ffprobe_path, spec['params']), 'finished'
+
+def _build_merge(spec, ffmpeg_path, ffprobe_path):
+    return MergeWorker(ffmpeg_path, ffprobe_path, spec['files'], spec['output'], spec.get('options')), 'finished'
+
+def _build_vbg(spec, ffmpeg_path, ffprobe_path):
+    params = spec['params']
+    worker_class = BatchVideoFromBgWorker if params.get('audio_sources') else VideoFromBgWorker
+    return worker_class(ffmpeg_path, ffprobe_path, params), 'finished'
+
+def _build_frame_export(spec, ffmpeg_path, ffprobe_path):
+    timestamp = spec['time']
+    timestamp_secs = parse_timestamp(timestamp) if isinstance(timestamp, str) else float(timestamp)
+    return FrameExportWorker(ffmpeg_path, spec['video'], timestamp_secs, spec['output'], spec.get('exact_frame', False)), 'finished'
+
+def _build_batch_frame_export(spec, ffmpeg_path, ffprobe_path):
+    return BatchFrameExportWorker(ffmpeg_path, ffprobe_path, spec['video'], spec['output_dir'], spec['params']), 'finished'
+
+def _build_transcribe(spec, ffmpeg_path, ffprobe_path):
+    params = dict(spec['params'])
+    params.setdefault('model_root', os.path.join(PROJECT_ROOT, 'models', 'whisper'))
+    return TranscribeWorker(params), 'finished'
+
+# 任务类型：名称 -> (创建 Worker 的函数, 必填字段, 说明)
+JOB_TYPES = {
+    'transcode': (_build_transcode, ('files', 'options'), "批量转码 / 提取音频"),
+    'clip': (_build_clip, ('source', 'clips', 'options'), "按时间码批量裁剪"),
+    'subtitle_burn': (_build_subtitle_burn, ('params',), "烧录 Chatbox 弹幕"),
+    'canvas_burn': (_build_canvas_burn, ('params',), "竖屏画布字幕"),
+    'horizontal_burn': (_build_horizontal_burn, ('params',), "横屏字幕"),
+    'merge': (_build_merge, ('files', 'output'), "合并媒体"),
+    'vbg': (_build_vbg, ('params',), "背景图 + 音频生成视频（params 含 audio_sources 时为批量）"),
+    'frame_export': (_build_frame_export, ('video', 'time', 'output'), "导出单帧"),
+    'batch_frame_export': (_build_batch_frame_export, ('video', 'output_dir', 'params'), "批量导出静帧"),
+    'transcribe': (_build_transcribe, ('params',), "语音转文本"),
+}
+
+def find_ffmpeg_tools(base_path=PROJECT_ROOT):
+    """按图形界面相同的顺序查找 FFmpeg 和 FFprobe：先项目 dependencies 目录，再系统 PATH（兼容没有 .exe 后缀的系统）。"""
+    tools = []
+    for name in ('ffmpeg', 'ffprobe'):
+        tools.append(find_executable(f'{name}.exe', os.path.join(base_path, 'dependencies', f'{name}.exe')) or find_executable(name))
+    return tuple(tools)
+
+class JobResult:
+    """一个任务的运行结果。"""
+    def __init__(self, name, ok, message="", elapsed=0.0, failed_items=0):
+        self.name = name
+        self.ok = ok
+        self.message = message
+        self.elapsed = elapsed
+        self.failed_items = failed_items
+
+    def to_dict(self):
+        return {'name': self.name, 'ok': self.ok, 'message': self.message,
+                'elapsed': round(self.elapsed, 3), 'failed_items': self.failed_items}
+
+class HeadlessJob:
+    """
+    根据任务描述创建 Worker 并同步运行。run() 会阻塞到任务结束，stop() 可在其他线程中调用以取消任务。
+    Worker 在调用 run() 的线程中创建，信号以直接连接的方式回调，不依赖 Qt 事件循环。
+    """
+    def __init__(self, spec, ffmpeg_path, ffprobe_path):
+        job_type = spec.get('type')
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"未知的任务类型: {job_type}")
+        _, required, _ = JOB_TYPES[job_type]
+        missing = [field for field in required if field not in spec]
+        if missing:
+            raise ValueError(f"{job_type} 任务缺少字段: {', '.join(missing)}")
+        self.spec = spec
+        self.type = job_type
+        self.name = spec.get('name') or job_type
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+        self.worker = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def _create_worker(self):
+        build = JOB_TYPES[self.type][0]
+        worker, done_signal = build(self.spec, self.ffmpeg_path, self.ffprobe_path)
+        runner = getattr(worker, 'runner', None)
+        if runner is not None:
+            if self.spec.get('threads') is not None:
+                runner.threads = self.spec['threads']
+            if self.spec.get('niceness') is not None:
+                runner.niceness = self.spec['niceness']
+        return worker, done_signal
+
+    def run(self, on_log=None, on_progress=None):
+        """
+        运行任务。
+        :param on_log: on_log(text)，Worker 的日志
+        :param on_progress: on_progress(percent, text)，percent 为 0~100 的整数或 None
+        :return: JobResult
+        """
+        done_args = []
+        done_received = []
+        item_codes = []
+
+        def report(*args):
+            if not on_progress:
+                return
+            if args and isinstance(args[0], int) and not isinstance(args[0], bool):
+                on_progress(args[0], args[1] if len(args) > 1 else "")
+            elif args:
+                on_progress(None, str(args[0]))
+
+        def on_done(*args):
+            done_received.append(True)
+            done_args.extend(args)
+
+        t0 = time.perf_counter()
+        try:
+            worker, done_signal = self._create_worker()
+            for name in LOG_SIGNALS:
+                if on_log and hasattr(worker, name):
+                    connect_direct(getattr(worker, name), on_log)
+            for name in PROGRESS_SIGNALS:
+                if hasattr(worker, name):
+                    connect_direct(getattr(worker, name), report)
+            for name in ITEM_SIGNALS:
+                if hasattr(worker, name):
+                    connect_direct(getattr(worker, name), lambda *args: item_codes.extend(a for a in args if isinstance(a, int)))
+            connect_direct(getattr(worker, done_signal), on_done)
+
+            with self._lock:
+                if self.cancelled:
+                    return JobResult(self.name, False, "任务已取消。", 0.0)
+                self.worker = worker
+            worker.run()
+        except Exception as e:
+            return JobResult(self.name, False, f"发生严重错误: {e}", time.perf_counter() - t0)
+        elapsed = time.perf_counter() - t0
+
+        if self.type == 'clip':
+            for message in finalize_clips(worker.source_video, worker.clip_list,
+                                          self.spec['options']['output_dir'], self.spec['options']['format']):
+                if on_log:
+                    on_log(message)
+
+        if self.cancelled:
+            return JobResult(self.name, False, "任务已取消。", elapsed)
+        if not done_received:
+            return JobResult(self.name, False, "任务没有正常结束（未收到结束信号）。", elapsed)
+        failed_items = sum(1 for code in item_codes if code != 0)
+        ok = job_succeeded(done_args) and failed_items == 0
+        message = next((arg for arg in done_args if isinstance(arg, str)), "")
+        if not message:
+            message = "处理完成！" if ok else f"{failed_items} 项处理失败，请查看日志。"
+        return JobResult(self.name, ok, message, elapsed, failed_items)
+
+    def stop(self):
+        with self._lock:
+            self.cancelled = True
+            worker = self.worker
+        if worker is not None and hasattr(worker, 'stop'):
+            worker.stop()
@@ -1,54 +1,233 @@
 # core/codec_config.py
 # 文件作用：统一管理项目中所有 FFmpeg 编码器相关的配置和参数。
 
-# 定义编码器预设的配置字典
+# 编码器预设表
 # 键 (key): 在UI下拉框中显示的名称
-# 值 (value): 传递给 FFmpeg 的命令行参数列表
-CODEC_CONFIGS = {
-    "N卡 H.264 (高质量)": [
-        '-c:v', 'h264_nvenc', 
-        '-preset', 'p5', 
-        '-cq', '18',
-        '-pix_fmt', 'yuv420p' # 确保像素格式兼容性
-    ],
-    "N卡 HEVC/H.265 (高压缩)": [
-        '-c:v', 'hevc_nvenc', 
-        '-preset', 'p5', 
-        '-cq', '20',
-        '-pix_fmt', 'yuv420p'
-    ],
-    "CPU x264 (高兼容)": [
-        '-c:v', 'libx264', 
-        '-preset', 'medium', 
-        '-crf', '23',
-        '-pix_fmt', 'yuv420p'
-    ],
-    "CPU x264 (速度优先)": [
-        '-c:v', 'libx264',
-        '-preset', 'ultrafast',
-        '-crf', '28',
-        '-pix_fmt', 'yuv420p'
-    ],
-    "直接复制 (无损/极速)": [
-        '-c:v', 'copy'
-    ]
+# 值 (value): 预设信息
+#   params:      传递给 FFmpeg 的视频编码参数列表
+#   encoder:     使用的 FFmpeg 编码器（用于可用性检测）
+#   hardware:    硬件编码类型，'nvenc' 表示 NVIDIA 显卡编码，None 表示 CPU 软件编码
+#   codec:       输出的视频编码格式
+#   description: 预设说明，供界面提示和基准测试输出使用
+# 各 CPU 预设的速度/体积可用 benchmarks/encoder_profiles.py 在本机实测对比
+CODEC_PROFILES = {
+    "N卡 H.264 (高质量)": {
+        'params': [
+            '-c:v', 'h264_nvenc',
+            '-preset', 'p5',
+            '-cq', '18',
+            '-pix_fmt', 'yuv420p' # 确保像素格式兼容性
+        ],
+        'encoder': 'h264_nvenc', 'hardware': 'nvenc', 'codec': 'h264',
+        'description': "NVIDIA 显卡 H.264 编码，需要 NVIDIA 显卡和驱动支持。",
+    },
+    "N卡 HEVC/H.265 (高压缩)": {
+        'params': [
+            '-c:v', 'hevc_nvenc',
+            '-preset', 'p5',
+            '-cq', '20',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'hevc_nvenc', 'hardware': 'nvenc', 'codec': 'hevc',
+        'description': "NVIDIA 显卡 H.265 编码，需要 NVIDIA 显卡和驱动支持；播放器需支持 HEVC。",
+    },
+    "CPU x264 (高兼容)": {
+        'params': [
+            '-c:v', 'libx264',
+            '-preset', 'medium',
+            '-crf', '23',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'libx264', 'hardware': None, 'codec': 'h264',
+        'description': "x264 medium，兼容性最好。",
+    },
+    "CPU x264 (均衡)": {
+        'params': [
+            '-c:v', 'libx264',
+            '-preset', 'veryfast',
+            '-crf', '22',
+            '-rc-lookahead', '20', # 缩短前瞻帧数，减少编码延迟和内存占用
+            '-threads', '0',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'libx264', 'hardware': None, 'codec': 'h264',
+        'description': "x264 veryfast，比 medium 快，画质略低，适合大多数 CPU 渲染。",
+    },
+    "CPU x264 (录屏/动画)": {
+        'params': [
+            '-c:v', 'libx264',
+            '-preset', 'faster',
+            '-tune', 'animation', # 大面积纯色、线条清晰的画面（录屏、动画、静态背景）
+            '-crf', '22',
+            '-threads', '0',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'libx264', 'hardware': None, 'codec': 'h264',
+        'description': "x264 faster + animation 调优，针对录屏、动画和大面积纯色的画面。",
+    },
+    "CPU x265 (高压缩)": {
+        'params': [
+            '-c:v', 'libx265',
+            '-preset', 'fast',
+            '-crf', '26',
+            '-x265-params', 'log-level=error',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'libx265', 'hardware': None, 'codec': 'hevc',
+        'description': "x265 fast，输出 HEVC/H.265，编码明显慢于 x264；播放器需支持 HEVC。",
+    },
+    "CPU AV1 (SVT-AV1)": {
+        'params': [
+            '-c:v', 'libsvtav1',
+            '-preset', '8',
+            '-crf', '32',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'libsvtav1', 'hardware': None, 'codec': 'av1',
+        'description': "SVT-AV1 preset 8，输出 AV1；需要 FFmpeg 带 libsvtav1，播放器需支持 AV1。",
+    },
+    "CPU x264 (速度优先)": {
+        'params': [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', '28',
+            '-pix_fmt', 'yuv420p'
+        ],
+        'encoder': 'libx264', 'hardware': None, 'codec': 'h264',
+        'description': "x264 ultrafast，速度最快，文件较大。",
+    },
+    "直接复制 (无损/极速)": {
+        'params': [
+            '-c:v', 'copy'
+        ],
+        'encoder': 'copy', 'hardware': None, 'codec': None,
+        'description': "不重新编码视频流。",
+    },
 }
 
+# 兼容原有用法：预设名称 -> FFmpeg 参数列表
+CODEC_CONFIGS = {name: profile['params'] for name, profile in CODEC_PROFILES.items()}
+
+# 各目标格式（容器扩展名）可以直接复制、无需重新编码的音频编码
+# 用于在源音频已经兼容时跳过音频转码，只做混流/封装
+AUDIO_COPY_COMPATIBILITY = {
+    'mp4': {'aac', 'mp3', 'alac', 'ac3', 'eac3'},
+    'mov': {'aac', 'mp3', 'alac', 'ac3', 'pcm_s16le', 'pcm_s24le'},
+    'mkv': {'aac', 'mp3', 'opus', 'vorbis', 'flac', 'alac', 'ac3', 'eac3', 'dts', 'truehd', 'pcm_s16le', 'pcm_s24le'},
+    'webm': {'opus', 'vorbis'},
+    'flv': {'aac', 'mp3'},
+    'ts': {'aac', 'mp3', 'mp2', 'ac3', 'eac3', 'opus'},
+    'avi': {'mp3', 'ac3', 'pcm_s16le'},
+    # 纯音频格式
+    'aac': {'aac'},
+    'm4a': {'aac', 'alac'},
+    'mp3': {'mp3'},
+    'flac': {'flac'},
+    'opus': {'opus'},
+    'wav': {'pcm_s16le', 'pcm_s24le', 'pcm_s32le', 'pcm_f32le', 'pcm_u8'},
+}
+
+def can_copy_audio(codec_name, container_ext):
+    """
+    判断源音频编码能否直接复制到目标格式中。
+    :param codec_name: str, ffprobe 报告的音频编码名称，如 'aac'
+    :param container_ext: str, 目标文件扩展名，如 'mp4'
+    :return: bool
+    """
+    if not codec_name:
+        return False
+    return codec_name in AUDIO_COPY_COMPATIBILITY.get(container_ext.lower().lstrip('.'), set())
+
+# 编码器不可用时依次尝试的 CPU 预设（优先速度与画质兼顾的预设），以及界面的首选默认预设
+CPU_FALLBACK_OPTIONS = ["CPU x264 (均衡)", "CPU x264 (高兼容)", "CPU x264 (速度优先)"]
+PREFERRED_DEFAULT_OPTION = "N卡 H.264 (高质量)"
+# 所有编码器测试都失败时的提示
+ENCODER_DETECTION_FAILED_MESSAGE = "⚠️ 编码器检测失败：FFmpeg 无法完成任何测试编码，已隐藏 N卡 预设，只保留 CPU 软件编码。请检查 FFmpeg 是否完整可用。"
+
+# 编码器可用性检测结果：编码器名称 -> bool。为 None 时表示尚未检测，所有预设都视为可用
+_encoder_availability = None
+
+def get_codec_profile(name):
+    """
+    返回实际会被使用的预设信息（编码器不可用时为回退后的 CPU 预设）。
+    :return: dict，包含 params/encoder/hardware/codec/description
+    """
+    return CODEC_PROFILES[resolve_codec_name(name)]
+
+def get_preset_encoder(name):
+    """返回预设使用的视频编码器名称，如 'h264_nvenc'。"""
+    profile = CODEC_PROFILES.get(name)
+    return profile['encoder'] if profile else None
+
+def get_all_encoders():
+    """返回所有预设用到的、需要检测的编码器名称（不含 copy）。"""
+    encoders = {get_preset_encoder(name) for name in CODEC_CONFIGS}
+    return sorted(e for e in encoders if e and e != 'copy')
+
+def detect_available_encoders(ffmpeg_path, force=False):
+    """
+    检测当前 FFmpeg 上各预设的编码器能否实际工作，并记录结果供后续查询使用。
+    结果按 FFmpeg 路径和版本缓存在磁盘上，只有第一次运行（或更换 FFmpeg 后）会真正测试编码；
+    硬件编码器检测失败时不缓存，每次启动重新检测。
+    :return: dict，编码器名称 -> bool
+    """
+    global _encoder_availability
+    from core.encoder_probe import probe_encoders
+    hardware = {profile['encoder'] for profile in CODEC_PROFILES.values() if profile['hardware'] is not None}
+    availability = probe_encoders(ffmpeg_path, get_all_encoders(), force=force, retry_failed=hardware)
+    if any(availability.values()):
+        _encoder_availability = availability
+    else:
+        # 连 CPU 编码器都测试失败，多半是 FFmpeg 本身有问题，硬件编码更不可能工作：只保留 CPU 软件编码预设
+        software = {profile['encoder'] for profile in CODEC_PROFILES.values() if profile['hardware'] is None}
+        _encoder_availability = {encoder: encoder in software for encoder in availability}
+    return availability
+
+def encoder_detection_failed(availability):
+    """检测结果中所有编码器都不可用时返回 True（此时只保留 CPU 软件编码预设）。"""
+    return not any(availability.values())
+
+def is_option_available(name):
+    """判断预设在当前机器上是否可用；尚未检测时一律视为可用。"""
+    encoder = get_preset_encoder(name)
+    if _encoder_availability is None or encoder in (None, 'copy'):
+        return True
+    return _encoder_availability.get(encoder, False)
+
 def get_encoder_options():
     """
     返回所有可用的编码器选项名称列表，用于填充UI下拉框。
+    已执行过编码器检测时，只返回在本机上实际能用的预设。
     :return: list of strings
     """
-    return list(CODEC_CONFIGS.keys())
+    return [name for name in CODEC_CONFIGS if is_option_available(name)]
+
+def get_default_encoder_option():
+    """返回界面下拉框的默认预设：N卡可用时优先使用 N卡，否则使用最合适的 CPU 预设。"""
+    return resolve_codec_name(PREFERRED_DEFAULT_OPTION)
+
+def resolve_codec_name(name):
+    """
+    返回实际会被使用的预设名称：所选预设的编码器不可用时，回退到可用的 CPU 预设。
+    :param name: str, a key from CODEC_CONFIGS
+    :return: str
+    """
+    if name in CODEC_CONFIGS and is_option_available(name):
+        return name
+    for fallback in CPU_FALLBACK_OPTIONS:
+        if is_option_available(fallback):
+            return fallback
+    return CPU_FALLBACK_OPTIONS[0]
 
 def get_codec_params(name):
     """
     根据用户选择的编码器名称，返回对应的FFmpeg参数列表。
-    如果名称不存在，则返回一个安全的默认值（CPU x264 高兼容）。
+    如果名称不存在，或其编码器在本机上不可用（例如没有 NVIDIA 显卡），
+    则自动回退为可用的 CPU 预设（默认 CPU x264 高兼容）。
     :param name: str, a key from CODEC_CONFIGS
     :return: list of strings
     """
-    return CODEC_CONFIGS.get(name, CODEC_CONFIGS["CPU x264 (高兼容)"])
+    return CODEC_CONFIGS[resolve_codec_name(name)]
 
 def get_copy_tooltip():
     """
@@ -0,0 +1,89 @@
+# core/encoder_probe.py
+# 文件作用：检测当前 FFmpeg 实际可用的视频编码器。
+#
+# 仅凭 `ffmpeg -encoders` 无法判断硬件编码器能否工作（例如没有 NVIDIA 显卡或驱动过旧时
+# h264_nvenc 依然会被列出），因此对每个编码器用几帧测试画面实际编码一次。
+# 结果按 (FFmpeg 路径, 版本信息, 文件修改时间) 缓存到磁盘，同一个 FFmpeg 只检测一次。
+# 硬件编码器的失败结果不缓存：驱动临时出错、显卡被其他程序占满时检测也会失败，下次启动重新检测。
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+ENCODER_CACHE_VERSION = 1
+ENCODER_CACHE_PATH = os.path.join(tempfile.gettempdir(), "VideoEditingToolkit", "encoder_capabilities.json")
+# 单个编码器测试的超时时间（秒）
+PROBE_TIMEOUT = 20
+
+def _ffmpeg_identity(ffmpeg_path):
+    """返回能唯一标识一个 FFmpeg 可执行文件的字符串（路径 + 版本 + 修改时间）。"""
+    try:
+        result = subprocess.run([ffmpeg_path, '-hide_banner', '-version'], capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=PROBE_TIMEOUT, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        version_line = result.stdout.splitlines()[0] if result.stdout else ""
+    except Exception:
+        version_line = ""
+    try:
+        mtime = os.path.getmtime(ffmpeg_path)
+    except OSError:
+        mtime = 0
+    identity = f"{os.path.abspath(ffmpeg_path)}|{version_line}|{mtime}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+def test_encoder(ffmpeg_path, encoder):
+    """用几帧测试画面实际编码一次，返回该编码器是否可用。"""
+    command = [
+        ffmpeg_path, '-hide_banner', '-v', 'error',
+        '-f', 'lavfi', '-i', 'color=c=black:s=256x256:r=25',
+        '-frames:v', '5',
+        '-c:v', encoder,
+        '-pix_fmt', 'yuv420p',
+        '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=PROBE_TIMEOUT, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        return result.returncode == 0
+    except Exception:
+        return False
+
+def _load_cache():
+    try:
+        with open(ENCODER_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == ENCODER_CACHE_VERSION:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {'version': ENCODER_CACHE_VERSION, 'binaries': {}}
+
+def _save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(ENCODER_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{ENCODER_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, ENCODER_CACHE_PATH)
+    except OSError:
+        pass  # 缓存写入失败只会导致下次启动重新检测
+
+def probe_encoders(ffmpeg_path, encoders, force=False, retry_failed=()):
+    """
+    检测给定编码器在此 FFmpeg 上是否可用。已缓存的结果直接返回，只测试新出现的编码器。
+    :param encoders: 可迭代的编码器名称，如 ['libx264', 'h264_nvenc']
+    :param force: 为 True 时忽略缓存，全部重新检测
+    :param retry_failed: 失败结果不写入缓存、每次都重新检测的编码器（硬件编码器）
+    :return: dict，编码器名称 -> bool
+    """
+    identity = _ffmpeg_identity(ffmpeg_path)
+    cache = _load_cache()
+    known = {} if force else dict(cache['binaries'].get(identity, {}))
+    pending = [encoder for encoder in sorted(set(encoders)) if encoder not in known]
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(4, len(pending))) as executor:
+            for encoder, ok in zip(pending, executor.map(lambda e: test_encoder(ffmpeg_path, e), pending)):
+                known[encoder] = ok
+        cache['binaries'][identity] = {encoder: ok for encoder, ok in known.items() if ok or encoder not in retry_failed}
+        _save_cache(cache)
+    return {encoder: known.get(encoder, False) for encoder in encoders}
@@ -0,0 +1,245 @@
+# core/ffmpeg_runner.py
+# 文件作用：统一启动和管理 FFmpeg 子进程，供所有 Worker 共用。
+#
+# - 启动与等待分离：start() 立即返回进程句柄，run() 在其上阻塞读取输出并汇报进度。
+# - 真正可取消：stop() 先请求进程退出 (terminate)，超时仍未退出再强制结束 (kill)，
+#   不依赖读取循环检查标志位，阻塞在 readline 上的 Worker 也能立即结束。
+# - 资源限制：可为每个任务指定编码线程数 (-threads) 和进程优先级 (niceness)。
+# - 退出码规范化：Windows 上的退出码是无符号 32 位数，统一转换为有符号整数。
+# - 统一计时：每次运行都记录耗时、处理的媒体时长和处理速度。
+
+import ctypes
+import os
+import re
+import subprocess
+import threading
+import time
+
+# terminate 之后等待进程自行退出的秒数，超时则强制结束
+TERMINATE_TIMEOUT = 5
+# 运行失败时保留的最后几行输出，用于错误信息
+TAIL_LINES = 20
+# Windows 进程优先级（subprocess 仅在 Windows 上定义这些常量）
+BELOW_NORMAL_PRIORITY_CLASS = getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0x00004000)
+IDLE_PRIORITY_CLASS = getattr(subprocess, 'IDLE_PRIORITY_CLASS', 0x00000040)
+
+TIME_PATTERN = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
+
+def normalize_returncode(returncode):
+    """把退出码规范化为有符号 32 位整数（Windows 上 0xC0000005 之类的值会变为负数）。"""
+    if returncode is None:
+        return -1
+    return ctypes.c_int32(returncode).value
+
+def parse_time_seconds(line):
+    """解析 FFmpeg 进度输出中的 time=HH:MM:SS.cc，返回秒数；没有时返回 None。"""
+    match = TIME_PATTERN.search(line)
+    if not match:
+        return None
+    h, m, s, cs = map(int, match.groups())
+    return h * 3600 + m * 60 + s + cs / 100
+
+def apply_thread_limit(command, threads):
+    """在输出文件之前插入 -threads，限制编码线程数（后出现的选项会覆盖预设中的 -threads）。"""
+    if not threads:
+        return list(command)
+    return list(command[:-1]) + ['-threads', str(int(threads)), command[-1]]
+
+def _priority_creationflags(niceness):
+    """返回 Popen 的 creationflags：Windows 上按 niceness 选择较低的优先级类。"""
+    creationflags = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+    if os.name == 'nt' and niceness and niceness > 0:
+        creationflags |= IDLE_PRIORITY_CLASS if niceness >= 15 else BELOW_NORMAL_PRIORITY_CLASS
+    return creationflags
+
+def _apply_posix_niceness(pid, niceness):
+    """POSIX 上在进程启动后调低其优先级（不使用 preexec_fn，在多线程中同样安全）。"""
+    if os.name == 'nt' or not niceness or niceness <= 0 or not hasattr(os, 'setpriority'):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, pid, min(19, os.getpriority(os.PRIO_PROCESS, pid) + niceness))
+    except OSError:
+        pass  # 进程已结束或没有权限，按默认优先级运行
+
+class RunResult:
+    """一次 FFmpeg 运行的结果和计时信息。"""
+    def __init__(self, returncode, cancelled=False, elapsed=0.0, media_seconds=0.0, tail=None, stdout=None, stderr=""):
+        self.returncode = returncode
+        self.cancelled = cancelled
+        self.elapsed = elapsed
+        self.media_seconds = media_seconds
+        self.tail = tail or []
+        self.stdout = stdout
+        self.stderr = stderr
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.cancelled
+
+    @property
+    def speed(self):
+        """处理速度：每秒处理的媒体时长（秒），即 FFmpeg 所说的 speed=。"""
+        return self.media_seconds / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        text = f"耗时 {self.elapsed:.1f} 秒"
+        if self.media_seconds > 0:
+            text += f"，处理速度 {self.speed:.1f}x"
+        return text
+
+    def error_text(self):
+        return self.stderr or "\n".join(self.tail)
+
+class FFmpegProcess:
+    """
+    单个 FFmpeg 子进程。
+    capture=False 时标准输出与标准错误合并为文本，可逐行读取（用于进度解析）；
+    capture=True 时标准输出以字节读取（例如原始帧数据），标准错误单独收集。
+    """
+    def __init__(self, command, threads=None, niceness=None, stdin_data=None, capture=False):
+        self.command = apply_thread_limit(command, threads)
+        self.niceness = niceness
+        self.stdin_data = stdin_data
+        self.capture = capture
+        self.process = None
+        self.cancelled = False
+        self.start_time = None
+        self.media_seconds = 0.0
+        self._kill_timer = None
+
+    def start(self):
+        creationflags = _priority_creationflags(self.niceness)
+        stdin = subprocess.PIPE if self.stdin_data is not None else subprocess.DEVNULL
+        self.start_time = time.perf_counter()
+        if self.capture:
+            self.process = subprocess.Popen(self.command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=creationflags)
+        else:
+            self.process = subprocess.Popen(self.command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, encoding='utf-8', errors='replace', creationflags=creationflags)
+        _apply_posix_niceness(self.process.pid, self.niceness)
+        if not self.capture:
+            if self.stdin_data is not None:
+                self.process.stdin.write(self.stdin_data)
+                self.process.stdin.close()
+        return self
+
+    def lines(self):
+        """逐行产出合并后的输出（已去除首尾空白），同时记录已处理的媒体时长。"""
+        for line in iter(self.process.stdout.readline, ''):
+            line_strip = line.strip()
+            seconds = parse_time_seconds(line_strip)
+            if seconds is not None:
+                self.media_seconds = seconds
+            yield line_strip
+
+    def communicate(self):
+        """capture 模式下读取全部输出，返回 (stdout 字节, stderr 文本)。"""
+        stdin_data = self.stdin_data.encode('utf-8') if isinstance(self.stdin_data, str) else self.stdin_data
+        stdout, stderr = self.process.communicate(stdin_data)
+        return stdout, stderr.decode('utf-8', errors='replace')
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def terminate(self, timeout=TERMINATE_TIMEOUT):
+        """请求进程退出；timeout 秒后仍在运行则强制结束。不阻塞调用线程。"""
+        self.cancelled = True
+        if not self.is_running():
+            return
+        try:
+            self.process.terminate()
+        except OSError:
+            return
+        self._kill_timer = threading.Timer(timeout, self._kill_if_running)
+        self._kill_timer.daemon = True
+        self._kill_timer.start()
+
+    def _kill_if_running(self):
+        if self.is_running():
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+
+    def wait(self, tail=None, stdout=None, stderr=""):
+        self.process.wait()
+        if self._kill_timer:
+            self._kill_timer.cancel()
+        return RunResult(normalize_returncode(self.process.returncode), self.cancelled,
+                         time.perf_counter() - self.start_time, self.media_seconds, tail, stdout, stderr)
+
+class FFmpegRunner:
+    """
+    一个 Worker 持有一个 Runner：记录它启动的所有进程，stop() 时全部结束，
+    之后的 start()/run() 直接返回“已取消”，不再启动新进程。线程安全，可在并发任务中共用。
+    """
+    def __init__(self, threads=None, niceness=None):
+        self.threads = threads
+        self.niceness = niceness
+        self._lock = threading.Lock()
+        self._active = set()
+        self._stopped = False
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def start(self, command, stdin_data=None, capture=False):
+        """启动进程并立即返回 FFmpegProcess；Runner 已停止时返回 None。"""
+        process = FFmpegProcess(command, self.threads, self.niceness, stdin_data, capture)
+        with self._lock:
+            if self._stopped:
+                return None
+            process.start()
+            self._active.add(process)
+        return process
+
+    def run(self, command, on_line=None, on_seconds=None, duration=0, on_percent=None, stdin_data=None):
+        """
+        运行 FFmpeg 直到结束，逐行回调输出并汇报进度。
+        :param on_line: on_line(line)，每行输出
+        :param on_seconds: on_seconds(seconds)，解析到 time= 时回调当前输出时间
+        :param duration: 媒体总时长；大于 0 且提供 on_percent 时按百分比汇报进度
+        :param on_percent: on_percent(int)，0~100
+        :return: RunResult
+        """
+        process = self.start(command, stdin_data)
+        if process is None:
+            return RunResult(-1, cancelled=True)
+        tail = []
+        try:
+            for line in process.lines():
+                tail = (tail + [line])[-TAIL_LINES:]
+                if on_line:
+                    on_line(line)
+                seconds = parse_time_seconds(line)
+                if seconds is not None:
+                    if on_seconds:
+                        on_seconds(seconds)
+                    if on_percent and duration > 0:
+                        on_percent(min(int(seconds / duration * 100), 100))
+            return process.wait(tail)
+        finally:
+            self._discard(process)
+
+    def capture(self, command, stdin_data=None):
+        """运行 FFmpeg 并收集全部输出：result.stdout 为字节，result.stderr 为文本。"""
+        process = self.start(command, stdin_data, capture=True)
+        if process is None:
+            return RunResult(-1, cancelled=True)
+        try:
+            stdout, stderr = process.communicate()
+            return process.wait(stdout=stdout, stderr=stderr)
+        finally:
+            self._discard(process)
+
+    def stop(self):
+        """结束所有正在运行的进程，并拒绝之后的新任务。"""
+        with self._lock:
+            self._stopped = True
+            processes = list(self._active)
+        for process in processes:
+            process.terminate()
+
+    def _discard(self, process):
+        with self._lock:
+            self._active.discard(process)
@@ -0,0 +1,118 @@
+# core/frame_index.py
+# 文件作用：为视频建立逐帧时间戳索引，用于精确的逐帧步进和按帧导出。
+#
+# 索引来自 ffprobe 读出的视频包 PTS（不解码，速度很快），按容器的 start_time 归一化，
+# 使其与播放器位置以及 FFmpeg 的 -ss 使用同一时间基准。对可变帧率 (VFR) 视频同样准确。
+# 索引按 (文件路径, 大小, 修改时间) 缓存到磁盘，同一视频再次打开时直接读取。
+
+import bisect
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+
+FRAME_INDEX_VERSION = 1
+FRAME_INDEX_CACHE_DIR = os.path.join(tempfile.gettempdir(), "VideoEditingToolkit", "frame_index")
+
+# 导出时向前偏移的秒数：-ss 取 T-0.001 时，第一个 pts >= 该时间的帧正好是时间戳为 T 的那一帧，
+# 避免浮点舍入让 FFmpeg 把目标帧当作“早于定位点”丢弃。
+EXACT_SEEK_EPSILON = 0.001
+
+def _cache_path(video_path):
+    stat = os.stat(video_path)
+    key_source = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime}"
+    cache_key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+    return os.path.join(FRAME_INDEX_CACHE_DIR, f"{cache_key}.json")
+
+def _parse_rate(rate):
+    try:
+        num, den = rate.split('/')
+        return float(num) / float(den) if float(den) else 0.0
+    except (ValueError, AttributeError):
+        return 0.0
+
+def build_frame_index(video_path: str, ffprobe_path: str) -> (dict, str):
+    """
+    使用 ffprobe 读取第一个视频流所有数据包的 PTS，生成按时间排序的帧时间戳列表（秒，从 0 开始）。
+    :return: ({'timestamps': [...], 'frame_rate': float}, None)，失败时返回 (None, 错误信息)
+    """
+    if not os.path.exists(video_path):
+        return None, f"错误：找不到视频文件 '{video_path}'"
+
+    command = [
+        ffprobe_path,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time:format=start_time:stream=avg_frame_rate",
+        "-print_format", "json",
+        video_path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        data = json.loads(result.stdout)
+    except Exception as e:
+        return None, f"读取帧时间戳失败: {e}"
+
+    try:
+        start_time = float(data.get("format", {}).get("start_time", 0) or 0)
+    except ValueError:
+        start_time = 0.0
+    pts_values = []
+    for packet in data.get("packets", []):
+        try:
+            pts_values.append(float(packet["pts_time"]))
+        except (KeyError, ValueError):
+            continue  # 没有 PTS 的包 (N/A)
+    if not pts_values:
+        return None, "未读取到任何视频帧时间戳。"
+
+    # 存在 B 帧时数据包是按解码顺序排列的，需要按显示时间重新排序
+    timestamps = sorted(set(round(pts - start_time, 6) for pts in pts_values))
+    streams = data.get("streams") or [{}]
+    frame_rate = _parse_rate(streams[0].get("avg_frame_rate"))
+    return {'timestamps': timestamps, 'frame_rate': frame_rate}, None
+
+def load_frame_index(video_path: str, ffprobe_path: str) -> (dict, str):
+    """读取磁盘缓存的帧索引；没有缓存或缓存失效时重新建立并写入缓存。"""
+    try:
+        cache_path = _cache_path(video_path)
+    except OSError as e:
+        return None, f"无法读取视频文件信息: {e}"
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == FRAME_INDEX_VERSION and cached.get('timestamps'):
+                return {'timestamps': cached['timestamps'], 'frame_rate': cached.get('frame_rate', 0.0)}, None
+        except (OSError, ValueError):
+            pass  # 缓存损坏时重新建立
+
+    index, msg = build_frame_index(video_path, ffprobe_path)
+    if index is None:
+        return None, msg
+
+    try:
+        os.makedirs(FRAME_INDEX_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': FRAME_INDEX_VERSION, **index}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # 缓存写入失败不影响本次使用
+    return index, None
+
+def frame_at(timestamps, seconds, tolerance=0.001):
+    """返回在 seconds 时刻正在显示的帧序号（最后一个时间戳 <= seconds 的帧）。"""
+    index = bisect.bisect_right(timestamps, seconds + tolerance) - 1
+    return min(max(index, 0), len(timestamps) - 1)
+
+def step_frame(timestamps, seconds, step):
+    """从 seconds 处的当前帧前进/后退 step 帧，返回目标帧的时间戳（秒）。"""
+    index = frame_at(timestamps, seconds) + step
+    return timestamps[min(max(index, 0), len(timestamps) - 1)]
+
+def exact_seek_time(frame_time):
+    """返回导出 frame_time 处那一帧时应传给 -ss 的时间。"""
+    return max(0.0, frame_time - EXACT_SEEK_EPSILON)
@@ -0,0 +1,247 @@
+# core/job_scheduler.py
+# 文件作用：全局任务调度器。各标签页不再自己创建 QThread，而是把 Worker 作为任务提交到这里。
+#
+# - 每个任务属于一个资源类别（CPU 编码、N卡 编码、磁盘读写、语音识别、预览），
+#   每个类别有独立的并发上限，超出上限的任务排队等待。
+# - 同一类别中按优先级（高/普通/低）和提交顺序依次启动。
+# - 低优先级任务的 FFmpeg 进程以较低的系统优先级运行；CPU 编码并发多个任务时平分线程数，
+#   避免多个编码进程互相争抢 CPU。
+# - 排队中的任务取消后不再启动；运行中的任务通过 Worker 的 stop() 停止，线程真正结束后才释放并发名额。
+
+import itertools
+import os
+import time
+from PySide6.QtCore import QObject, QThread, Signal, Slot
+
+from core.api import job_succeeded
+from core.codec_config import get_codec_profile
+
+# 资源类别：名称 -> (显示名称, 默认并发上限)
+RESOURCE_CLASSES = {
+    'cpu_encode': ("CPU 编码", 1),
+    'nvenc': ("N卡 编码", 2),   # 消费级显卡同时可用的 NVENC 会话数有限
+    'disk_io': ("磁盘读写", 2),
+    'ml': ("语音识别", 1),
+    'preview': ("预览", 2),
+}
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "高", PRIORITY_NORMAL: "普通", PRIORITY_LOW: "低"}
+
+# 低优先级任务的进程优先级调低幅度
+LOW_PRIORITY_NICENESS = 10
+# 程序退出时等待每个任务线程结束的最长时间（毫秒）
+STOP_WAIT_MS = 8000
+
+STOPPED_MESSAGE = "任务已取消。"
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_STATE_NAMES = {
+    JOB_QUEUED: "排队中", JOB_RUNNING: "运行中", JOB_DONE: "已完成",
+    JOB_FAILED: "失败", JOB_CANCELLED: "已取消",
+}
+
+def encode_resource(codec_name):
+    """根据编码器预设返回任务的资源类别：N卡 编码、CPU 编码，或直接复制时的磁盘读写。"""
+    profile = get_codec_profile(codec_name)
+    if profile['hardware'] == 'nvenc':
+        return 'nvenc'
+    if profile['encoder'] == 'copy':
+        return 'disk_io'
+    return 'cpu_encode'
+
+class Job:
+    """调度器中的一个任务。"""
+    _ids = itertools.count(1)
+
+    def __init__(self, worker, title, resource, priority, done_signal, stopped_result, slots=1):
+        self.id = next(self._ids)
+        self.worker = worker
+        self.title = title
+        self.resource = resource
+        self.priority = priority
+        self.done_signal = done_signal
+        self.stopped_result = stopped_result
+        self.slots = max(1, int(slots))
+        self.result_args = None
+        self.state = JOB_QUEUED
+        self.thread = None
+        self.cancel_requested = False
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.ended_at = None
+
+    @property
+    def can_cancel(self):
+        return self.state in (JOB_QUEUED, JOB_RUNNING) and hasattr(self.worker, 'stop')
+
+    def elapsed(self):
+        if not self.started_at:
+            return 0.0
+        return (self.ended_at or time.time()) - self.started_at
+
+class JobScheduler(QObject):
+    """
+    应用程序级的任务调度器，运行在主线程中。
+    submit() 之后任务的 QThread 由调度器创建和回收，Worker 的信号仍由标签页自行连接。
+    """
+    job_added = Signal(object)
+    job_changed = Signal(object)
+    # 内部使用：Worker 的完成信号和线程结束信号经由它们排队回到主线程
+    _job_done = Signal(object, object)
+    _thread_finished = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.limits = {name: limit for name, (_, limit) in RESOURCE_CLASSES.items()}
+        self.jobs = []
+        self._sequence = itertools.count()
+        self._order = {}
+        self._job_done.connect(self._on_job_done)
+        self._thread_finished.connect(self._on_thread_finished)
+
+    def submit(self, worker, title, resource, priority=PRIORITY_NORMAL, done_signal='finished', stopped_result=None, slots=1):
+        """
+        提交一个 Worker（尚未移动到线程中）。
+        :param resource: RESOURCE_CLASSES 中的类别名称
+        :param done_signal: Worker 表示任务结束的信号名称，例如 'finished' 或 'batch_finished'
+        :param stopped_result: 排队中的任务被取消时，代替 Worker 发出的结束信号参数；
+                               默认 'finished' 为 (-1, "任务已取消。")，其他信号不带参数
+        :param slots: 任务自己并发运行的进程数（例如批量任务的并发数），占用同样多的并发名额；
+                      最多分配该类别的并发上限，启动时实际分配的名额写回 Worker 的 max_workers 属性
+        :return: Job
+        """
+        if resource not in RESOURCE_CLASSES:
+            raise ValueError(f"未知的资源类别: {resource}")
+        if stopped_result is None:
+            stopped_result = (-1, STOPPED_MESSAGE) if done_signal == 'finished' else ()
+        job = Job(worker, title, resource, priority, done_signal, stopped_result, slots)
+        self._order[job.id] = next(self._sequence)
+        getattr(worker, done_signal).connect(lambda *args, job=job: self._job_done.emit(job, args))
+        self.jobs.append(job)
+        self.job_added.emit(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job):
+        """
+        取消任务。排队中的任务不再启动，直接以 stopped_result 发出 Worker 的结束信号，
+        让标签页走完正常的结束流程恢复界面；运行中的任务调用 Worker 的 stop()。
+        """
+        if not job.can_cancel:
+            return
+        job.cancel_requested = True
+        if job.state == JOB_QUEUED:
+            worker = job.worker
+            job.state = JOB_CANCELLED
+            job.ended_at = time.time()
+            job.worker = None
+            self.job_changed.emit(job)
+            # 在主线程中发出，标签页的槽函数会立即执行
+            getattr(worker, job.done_signal).emit(*job.stopped_result)
+            worker.deleteLater()
+        else:
+            job.worker.stop()
+
+    def set_priority(self, job, priority):
+        if job.state == JOB_QUEUED and job.priority != priority:
+            job.priority = priority
+            self.job_changed.emit(job)
+            self._dispatch()
+
+    def set_limit(self, resource, limit):
+        self.limits[resource] = max(1, int(limit))
+        self._dispatch()
+
+    def running_count(self, resource):
+        """正在运行的任务占用的并发名额。请求取消但线程尚未结束的任务仍然计入，避免与新任务重叠运行。"""
+        return sum(job.slots for job in self.jobs if job.resource == resource and job.state == JOB_RUNNING)
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if job.state in (JOB_QUEUED, JOB_RUNNING)]
+
+    def stop_all(self, wait_ms=STOP_WAIT_MS):
+        """程序退出前停止所有任务，并等待各任务线程结束（每个线程最多等待 wait_ms 毫秒）。"""
+        running = []
+        for job in list(self.jobs):
+            if job.state == JOB_QUEUED:
+                job.state = JOB_CANCELLED
+            elif job.state == JOB_RUNNING:
+                job.cancel_requested = True
+                if job.worker is not None and hasattr(job.worker, 'stop'):
+                    job.worker.stop()
+                running.append(job)
+        for job in running:
+            if job.thread is not None:
+                job.thread.wait(wait_ms)
+
+    def _dispatch(self):
+        for resource in RESOURCE_CLASSES:
+            queued = sorted((job for job in self.jobs if job.resource == resource and job.state == JOB_QUEUED),
+                            key=lambda job: (job.priority, self._order[job.id]))
+            free = self.limits[resource] - self.running_count(resource)
+            for job in queued:
+                # 名额不够时停在这里，不让后面的小任务越过优先级更高的任务
+                slots = min(job.slots, self.limits[resource])
+                if slots > free:
+                    break
+                job.slots = slots
+                self._start(job)
+                free -= slots
+
+    def _start(self, job):
+        self._apply_resource_limits(job)
+        job.state = JOB_RUNNING
+        job.started_at = time.time()
+        job.thread = QThread()
+        job.worker.moveToThread(job.thread)
+        getattr(job.worker, job.done_signal).connect(job.thread.quit)
+        job.thread.finished.connect(job.worker.deleteLater)
+        # 线程真正结束后才释放并发名额；QThread 对象在 _on_thread_finished 中回收
+        job.thread.finished.connect(lambda job=job: self._thread_finished.emit(job))
+        job.thread.started.connect(job.worker.run)
+        job.thread.start()
+        self.job_changed.emit(job)
+
+    def _apply_resource_limits(self, job):
+        """把分配到的并发名额写回 Worker；为使用 FFmpegRunner 的 Worker 设置线程数和进程优先级（任务自己指定过的保持不变）。"""
+        runner = getattr(job.worker, 'runner', None)
+        if hasattr(job.worker, 'max_workers'):
+            job.worker.max_workers = job.slots
+        if runner is None:
+            return
+        if job.priority == PRIORITY_LOW and runner.niceness is None:
+            runner.niceness = LOW_PRIORITY_NICENESS
+        if job.resource == 'cpu_encode' and runner.threads is None and self.limits['cpu_encode'] > 1:
+            runner.threads = max(1, (os.cpu_count() or 1) // self.limits['cpu_encode'])
+
+    @Slot(object, object)
+    def _on_job_done(self, job, args):
+        """Worker 发出结束信号：记录结果，等线程结束后再更新状态。"""
+        if job.state == JOB_RUNNING:
+            job.result_args = args
+
+    @Slot(object)
+    def _on_thread_finished(self, job):
+        thread = job.thread
+        job.thread = None
+        if thread is not None:
+            thread.deleteLater()
+        if job.state != JOB_RUNNING:
+            return
+        job.ended_at = time.time()
+        if job.cancel_requested:
+            job.state = JOB_CANCELLED
+        elif job.result_args is None:
+            job.state = JOB_FAILED  # 线程结束但 Worker 没有发出结束信号
+        else:
+            job.state = JOB_DONE if job_succeeded(job.result_args) else JOB_FAILED
+        job.worker = None
+        self.job_changed.emit(job)
+        self._dispatch()
@@ -0,0 +1,113 @@
+# core/preview.py
+# 文件作用：预览图生成的公共逻辑，供各个字幕/画布预览 Worker 共用。
+#
+# - 输入端定位 (-ss 放在 -i 之前)：直接跳到最近的关键帧再精确解码到目标帧，
+#   预览视频末尾的画面也只需解码几秒，而不是从头解码到目标时间。
+# - -copyts -start_at_zero：保留原始时间戳，使 ass/subtitles 滤镜渲染的是目标时间处的字幕。
+# - 帧数据以 RGB24 原始格式从标准输出读回，不写临时图片，多个标签页同时预览也不会互相覆盖。
+# - 可选在字幕滤镜之前缩小画面：libass 会按 PlayResX/PlayResY 自动缩放字幕，
+#   只需保证边框/阴影同样按比例缩放，预览效果即与成品一致。
+
+import re
+
+from core.ffmpeg_runner import FFmpegRunner
+
+# 以 RGB24 原始数据输出到标准输出
+RAW_FRAME_OUTPUT_ARGS = ['-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1']
+
+# 预览图长边的默认最大尺寸（像素），0 表示保持原始分辨率
+PREVIEW_MAX_SIZE = 1280
+# 多帧预览（联系表）中每一格长边的最大尺寸、默认帧数和列数，以及格子之间的间距
+CONTACT_SHEET_TILE_SIZE = 480
+CONTACT_SHEET_DEFAULT_COUNT = 9
+CONTACT_SHEET_COLUMNS = 3
+CONTACT_SHEET_PADDING = 4
+
+def escape_filter_path(path):
+    """转义滤镜参数中的文件路径（Windows 盘符中的冒号需要转义）。"""
+    return path.replace('\\', '/').replace(':', '\\:')
+
+def preview_scale(width, height, max_size=PREVIEW_MAX_SIZE):
+    """
+    计算预览时的缩放比例和缩放后的偶数尺寸（按长边限制，横屏竖屏一致）。
+    :return: (比例, 宽, 高)；不需要缩放时比例为 1.0，宽高为原始值
+    """
+    if not max_size or max(width, height) <= max_size:
+        return 1.0, width, height
+    factor = max_size / max(width, height)
+    scaled_width = max(2, int(round(width * factor / 2)) * 2)
+    scaled_height = max(2, int(round(height * factor / 2)) * 2)
+    return factor, scaled_width, scaled_height
+
+def enable_scaled_border_and_shadow(ass_path):
+    """
+    确保 ASS 脚本声明 ScaledBorderAndShadow: yes。
+    预览画面被缩小后，边框和阴影也会随 PlayRes 同比缩放；
+    在原始分辨率下（PlayRes 与视频尺寸相同）这一设置不影响渲染结果。
+    """
+    with open(ass_path, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+    if re.search(r'^ScaledBorderAndShadow:', content, re.MULTILINE):
+        content = re.sub(r'^ScaledBorderAndShadow:.*$', 'ScaledBorderAndShadow: yes', content, flags=re.MULTILINE)
+    else:
+        content = re.sub(r'^(PlayResY:.*)$', r'\1\nScaledBorderAndShadow: yes', content, count=1, flags=re.MULTILINE)
+    with open(ass_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def build_timestamps_select(timestamps):
+    """
+    为一组时间点构建 select 表达式：对每个时间点 T，选中第一个 t >= T 的帧。
+    gte(t,T)*not(gte(prev_t,T)) 只在“跨过” T 的那一帧为真；第一帧的 prev_t 为 NAN，
+    not(gte(NAN,T)) 为 1，因此 T=0 时同样能选中首帧。
+    """
+    terms = [f"gte(t,{t:.6f})*not(gte(prev_t,{t:.6f}))" for t in timestamps]
+    return "+".join(terms)
+
+def seek_input_args(seek_secs):
+    """输入端精确定位，并保留原始时间戳供字幕滤镜使用。"""
+    return ['-ss', f"{seek_secs:.3f}", '-copyts', '-start_at_zero']
+
+def build_preview_command(ffmpeg_path, video_file, seek_secs, vf_chain, output_args):
+    """构建只解码并输出一帧的预览命令。output_args 为输出格式参数和输出目标。"""
+    return [
+        ffmpeg_path, '-hide_banner', '-y',
+        *seek_input_args(seek_secs),
+        '-i', video_file,
+        '-vf', vf_chain,
+        '-frames:v', '1',
+        *output_args
+    ]
+
+def read_raw_frames(command, width, height, count=1, runner=None):
+    """
+    运行输出 RGB24 原始数据的 FFmpeg 命令，按帧切分标准输出。
+    :param runner: 执行命令的 FFmpegRunner，停止它即可中断渲染；未提供时使用一次性的 Runner
+    :return: (帧数据列表, None)；失败时返回 (None, 错误信息)
+    """
+    result = (runner or FFmpegRunner()).capture(command)
+    stderr = result.stderr
+    if result.cancelled:
+        return None, "预览已取消。"
+    if result.returncode != 0:
+        return None, f"FFmpeg执行预览失败:\n{stderr}"
+    frame_size = width * height * 3
+    frames = [result.stdout[i:i + frame_size] for i in range(0, frame_size * count, frame_size)]
+    frames = [frame for frame in frames if len(frame) == frame_size]
+    if not frames:
+        return None, f"生成预览图片失败！未读取到完整的 {width}x{height} 画面。\n{stderr}"
+    return frames, None
+
+def contact_sheet_layout(count, tile_width, tile_height, columns=CONTACT_SHEET_COLUMNS, padding=CONTACT_SHEET_PADDING):
+    """
+    计算联系表的行列数和整张图的尺寸（格子间距与外边距相同）。
+    :return: (列数, 行数, 总宽, 总高)
+    """
+    columns = max(1, min(columns, count))
+    rows = (count + columns - 1) // columns
+    width = columns * tile_width + (columns + 1) * padding
+    height = rows * tile_height + (rows + 1) * padding
+    return columns, rows, width, height
+
+def evenly_spaced_points(duration, count=CONTACT_SHEET_DEFAULT_COUNT):
+    """在整段视频中均匀取 count 个时间点（取每一段的中点）。"""
+    return [round(duration * (i + 0.5) / count, 3) for i in range(count)]
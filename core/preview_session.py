@@ -0,0 +1,273 @@
+# core/preview_session.py
+# 文件作用：每个标签页持有一个预览会话，在样式不变时复用已生成的 ASS 字幕和已渲染的预览帧。
+#
+# - 样式、视频、字幕文件不变时，ASS 只生成一次，滤镜链也保持不变。
+# - 渲染过的帧按时间点缓存在内存中，再次预览同一时间点时立即返回。
+# - 首次预览后，在后台线程中预先渲染“可能会被预览”的时间点：
+#   每条字幕的开始时间，以及均匀分布在整段视频中的若干时间点。
+# - 样式一旦改变，旧的缓存和正在进行的后台渲染全部作废。
+#
+# 本模块不依赖 Qt，帧数据为 RGB24 原始字节。
+
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from core.utils import get_video_dimensions, get_video_duration
+from core.preview import (RAW_FRAME_OUTPUT_ARGS, CONTACT_SHEET_TILE_SIZE, CONTACT_SHEET_COLUMNS, CONTACT_SHEET_PADDING,
+                          build_preview_command, read_raw_frames, preview_scale, contact_sheet_layout,
+                          evenly_spaced_points)
+from core.subtitle_parsers import parse_subtitle_file
+from core.ffmpeg_runner import FFmpegRunner
+
+# 内存中最多缓存的预览帧数（1280x720 的 RGB 帧约 2.6MB）
+MAX_CACHED_FRAMES = 48
+# 后台预渲染时均匀取点的数量，以及最多预渲染的字幕开始时间数量
+PRERENDER_EVEN_POINTS = 8
+PRERENDER_MAX_EVENTS = 24
+# 在字幕开始时间之后稍作偏移，确保该条字幕已经出现在画面上
+EVENT_START_OFFSET = 0.1
+# 后台预渲染进程的优先级调低幅度，避免与用户正在等待的预览和导出任务争抢 CPU
+PRERENDER_NICENESS = 10
+
+def likely_preview_points(duration, event_starts, default_point=None,
+                          even_points=PRERENDER_EVEN_POINTS, max_events=PRERENDER_MAX_EVENTS):
+    """返回值得预先渲染的时间点（秒，已去重排序）。"""
+    points = set()
+    if default_point is not None:
+        points.add(round(default_point, 3))
+    if duration > 0:
+        for i in range(even_points):
+            points.add(round(duration * (i + 0.5) / even_points, 3))
+    for start in sorted(event_starts)[:max_events]:
+        point = start + EVENT_START_OFFSET
+        if duration <= 0 or point < duration:
+            points.add(round(point, 3))
+    return sorted(points)
+
+def make_session_key(video_file, subtitle_file, options):
+    """由文件（含修改时间）和全部样式参数组成的会话键，任一项变化都会使缓存失效。"""
+    def file_state(path):
+        try:
+            stat = os.stat(path)
+            return [os.path.abspath(path), stat.st_size, stat.st_mtime]
+        except OSError:
+            return [path]
+    return json.dumps([file_state(video_file), file_state(subtitle_file), options], sort_keys=True, ensure_ascii=False, default=str)
+
+def subtitle_event_starts(subtitle_file):
+    """读取字幕文件中每条字幕的开始时间；解析失败时返回空列表（只影响预渲染）。"""
+    try:
+        return [event.get('start', 0) for event in parse_subtitle_file(subtitle_file)]
+    except Exception:
+        return []
+
+def contact_sheet_points(requested, duration):
+    """多帧预览的时间点：去掉超出视频时长的时间点；未指定（或全部超出）时在整段视频中均匀取点。"""
+    return [t for t in requested if t < duration] or evenly_spaced_points(duration)
+
+def render_preview(session, key, video_file, build_ass, build_filters, seek_point, log=None, contact_sheet=None, duration=0.0):
+    """
+    预览 Worker 的公共流程：准备会话（必要时生成 ASS），然后取出/渲染 seek_point 处的帧。
+    contact_sheet 不为 None 时（可以是空列表）改为渲染多帧联系表，时间点由 contact_sheet_points 决定。
+    :return: (帧数据, 宽, 高, 错误信息)
+    """
+    log = log or (lambda message: None)
+    reused, error = session.prepare(key, video_file, build_ass, build_filters)
+    if error:
+        return None, 0, 0, error
+    log("样式未改变，复用已生成的ASS字幕。" if reused else "✅ 已生成ASS字幕。")
+    if contact_sheet is not None:
+        sheet_points = contact_sheet_points(contact_sheet, duration)
+        log(f"正在渲染 {len(sheet_points)} 个时间点的多帧预览...")
+        return session.render_contact_sheet(sheet_points)
+    log("正在截取预览帧...")
+    frame, cached, error = session.get_frame(seek_point)
+    if frame is None:
+        return None, 0, 0, error
+    if cached:
+        log("✅ 使用已缓存的预览帧。")
+    width, height = session.frame_size
+    return frame, width, height, None
+
+class PreviewSession:
+    """
+    单个标签页的预览会话。线程安全：预览 Worker 线程和后台预渲染线程可以同时访问。
+    """
+    def __init__(self, ffmpeg_path):
+        self.ffmpeg_path = ffmpeg_path
+        self._lock = threading.Lock()
+        self._temp_dir = tempfile.mkdtemp(prefix="preview_")
+        # 程序退出时清理会话目录中的字幕文件
+        atexit.register(shutil.rmtree, self._temp_dir, True)
+        self._key = None
+        self._generation = 0
+        self._video_file = None
+        self._vf_chain = None
+        self._size = (0, 0)
+        self._frames = OrderedDict()
+        self._prerender_thread = None
+        self._prerender_generation = -1
+        self._video_info = {}
+        # 用户请求的预览和后台预渲染使用各自的 Runner，关闭会话时一并结束正在运行的进程
+        self._runner = FFmpegRunner()
+        self._prerender_runner = FFmpegRunner(niceness=PRERENDER_NICENESS)
+
+    @property
+    def frame_size(self):
+        return self._size
+
+    def video_info(self, video_file, ffprobe_path):
+        """返回 (宽, 高, 时长, 错误信息)，同一视频文件只探测一次。"""
+        try:
+            stat = os.stat(video_file)
+            info_key = (os.path.abspath(video_file), stat.st_size, stat.st_mtime)
+        except OSError as e:
+            return None, None, 0.0, f"无法读取视频文件: {e}"
+        with self._lock:
+            if info_key in self._video_info:
+                return self._video_info[info_key]
+        width, height, msg = get_video_dimensions(video_file, ffprobe_path)
+        duration = get_video_duration(video_file, ffprobe_path)
+        info = (width, height, duration, msg)
+        if width and duration > 0:
+            with self._lock:
+                self._video_info[info_key] = info
+        return info
+
+    def prepare(self, key, video_file, build_ass, build_filters):
+        """
+        确保会话处于 key 对应的状态。key 不变时直接复用，否则重新生成 ASS 并清空缓存。
+        :param build_ass: build_ass(ass_path) -> (success, msg)
+        :param build_filters: build_filters(ass_path) -> (vf_chain, width, height)
+        :return: (是否复用了已有状态, 错误信息或 None)
+        """
+        with self._lock:
+            if key == self._key:
+                return True, None
+            self._generation += 1
+            generation = self._generation
+            self._key = None
+            self._vf_chain = None
+            self._frames.clear()
+
+        # 每一代使用独立的文件名，正在进行的旧后台渲染不会读到写了一半的新字幕
+        ass_path = os.path.join(self._temp_dir, f"preview_{generation}.ass").replace("\\", "/")
+        success, msg = build_ass(ass_path)
+        if not success:
+            return False, f"生成ASS字幕失败: {msg}"
+        vf_chain, width, height = build_filters(ass_path)
+
+        with self._lock:
+            if generation != self._generation:
+                return False, "预览样式已被更新的请求替换。"
+            self._key = key
+            self._video_file = video_file
+            self._vf_chain = vf_chain
+            self._size = (width, height)
+        self._remove_stale_ass_files(generation)
+        return False, None
+
+    def get_frame(self, seconds):
+        """返回 seconds 处的预览帧 (bytes, 是否命中缓存, 错误信息)。"""
+        point = round(seconds, 3)
+        with self._lock:
+            if point in self._frames:
+                self._frames.move_to_end(point)
+                return self._frames[point], True, None
+            generation = self._generation
+        frame, error = self._render(generation, point, self._runner)
+        return frame, False, error
+
+    def start_prerender(self, points):
+        """在后台线程中依次渲染尚未缓存的时间点，样式改变或会话关闭时自动停止。"""
+        with self._lock:
+            generation = self._generation
+            # 旧样式的后台线程会在检测到代数变化后自行退出
+            if self._prerender_thread and self._prerender_thread.is_alive() and self._prerender_generation == generation:
+                return
+            self._prerender_generation = generation
+            self._prerender_thread = threading.Thread(target=self._prerender, args=(generation, points), daemon=True)
+            self._prerender_thread.start()
+
+    def render_contact_sheet(self, points, columns=CONTACT_SHEET_COLUMNS,
+                             tile_size=CONTACT_SHEET_TILE_SIZE, padding=CONTACT_SHEET_PADDING):
+        """
+        用一次 FFmpeg 调用渲染多个时间点并拼成联系表：
+        每个时间点作为一路单独输入，在输入端定位（-ss 放在 -i 之前），只解码该时间点附近的一小段，
+        每路只取一帧渲染字幕并缩放，再用 concat + tile 拼接。各路只有一帧，格子数多于帧数时 tile 也会立即输出。
+        :return: (帧数据, 宽, 高, 错误信息)
+        """
+        points = sorted(set(round(p, 3) for p in points))
+        with self._lock:
+            if self._vf_chain is None:
+                return None, 0, 0, "预览会话尚未准备好。"
+            video_file, vf_chain, (width, height) = self._video_file, self._vf_chain, self._size
+        _, tile_width, tile_height = preview_scale(width, height, tile_size)
+        columns, rows, sheet_width, sheet_height = contact_sheet_layout(len(points), tile_width, tile_height, columns, padding)
+        # -copyts -start_at_zero 保留原始时间戳，字幕滤镜渲染的是各时间点处的字幕
+        command = [self.ffmpeg_path, '-hide_banner', '-y', '-copyts', '-start_at_zero']
+        chains = []
+        for i, point in enumerate(points):
+            command += ['-ss', f"{point:.3f}", '-i', video_file]
+            chains.append(f"[{i}:v:0]trim=end_frame=1,{vf_chain},scale={tile_width}:{tile_height},setsar=1[v{i}]")
+        labels = "".join(f"[v{i}]" for i in range(len(points)))
+        chains.append(f"{labels}concat=n={len(points)}:v=1:a=0,tile={columns}x{rows}:padding={padding}:margin={padding}:color=black[sheet]")
+        command += [
+            '-filter_complex', ";".join(chains),
+            '-map', '[sheet]',
+            '-frames:v', '1',
+            *RAW_FRAME_OUTPUT_ARGS
+        ]
+        frames, error = read_raw_frames(command, sheet_width, sheet_height, runner=self._runner)
+        if frames is None:
+            return None, 0, 0, error
+        return frames[0], sheet_width, sheet_height, None
+
+    def close(self):
+        with self._lock:
+            self._generation += 1
+            self._key = None
+            self._frames.clear()
+        self._runner.stop()
+        self._prerender_runner.stop()
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+    def _prerender(self, generation, points):
+        for point in points:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                if round(point, 3) in self._frames:
+                    continue
+            self._render(generation, round(point, 3), self._prerender_runner)
+
+    def _render(self, generation, point, runner):
+        with self._lock:
+            if generation != self._generation or self._vf_chain is None:
+                return None, "预览会话尚未准备好。"
+            video_file, vf_chain, (width, height) = self._video_file, self._vf_chain, self._size
+        command = build_preview_command(self.ffmpeg_path, video_file, point, vf_chain, RAW_FRAME_OUTPUT_ARGS)
+        frames, error = read_raw_frames(command, width, height, runner=runner)
+        if frames is None:
+            return None, error
+        with self._lock:
+            if generation == self._generation:
+                self._frames[point] = frames[0]
+                while len(self._frames) > MAX_CACHED_FRAMES:
+                    self._frames.popitem(last=False)
+        return frames[0], None
+
+    def _remove_stale_ass_files(self, generation):
+        # 保留上一代的字幕文件，它可能仍在被后台渲染使用；更早的可以删除
+        for name in os.listdir(self._temp_dir):
+            if name.startswith("preview_") and name.endswith(".ass"):
+                try:
+                    if int(name[len("preview_"):-len(".ass")]) < generation - 1:
+                        os.remove(os.path.join(self._temp_dir, name))
+                except (ValueError, OSError):
+                    pass
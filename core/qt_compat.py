@@ -0,0 +1,75 @@
+# core/qt_compat.py
+# 文件作用：Worker 使用的 QObject / Signal / QImage。
+#
+# 安装了 PySide6 时直接使用 Qt 的实现，图形界面的线程和信号行为不变；
+# 没有 PySide6 时（例如无图形界面的 Linux 渲染节点）提供同名的纯 Python 替代品，
+# 让 Worker 可以在命令行 (python -m core) 中直接调用 run() 运行。
+# 替代品的信号在发出信号的线程中同步调用回调，不做跨线程排队。
+
+import threading
+
+try:
+    from PySide6.QtCore import QObject, Signal, Qt
+    from PySide6.QtGui import QImage
+    HAS_QT = True
+
+    def connect_direct(signal, slot):
+        """以直接连接方式连接信号：槽函数在发出信号的线程中立即执行，不经过事件循环。"""
+        signal.connect(slot, Qt.ConnectionType.DirectConnection)
+except ImportError:
+    HAS_QT = False
+    QImage = None  # 仅预览 Worker 会用到，命令行不提供预览
+
+    class _BoundSignal:
+        """绑定到某个对象上的信号：connect 注册回调，emit 依次同步调用。"""
+        def __init__(self):
+            self._slots = []
+            self._lock = threading.Lock()
+
+        def connect(self, slot):
+            with self._lock:
+                self._slots.append(slot)
+
+        def disconnect(self, slot=None):
+            with self._lock:
+                if slot is None:
+                    self._slots = []
+                elif slot in self._slots:
+                    self._slots.remove(slot)
+
+        def emit(self, *args):
+            with self._lock:
+                slots = list(self._slots)
+            for slot in slots:
+                slot(*args)
+
+    class Signal:
+        """类属性形式的信号声明，与 PySide6.QtCore.Signal 的用法一致（参数类型仅作说明）。"""
+        def __init__(self, *types, **kwargs):
+            self._name = None
+
+        def __set_name__(self, owner, name):
+            self._name = name
+
+        def __get__(self, instance, owner):
+            if instance is None:
+                return self
+            signals = instance.__dict__.setdefault('_bound_signals', {})
+            if self._name not in signals:
+                signals[self._name] = _BoundSignal()
+            return signals[self._name]
+
+    class QObject:
+        """不依赖 Qt 的最小 QObject：只保留 Worker 用到的接口。"""
+        def __init__(self, parent=None):
+            self._parent = parent
+
+        def moveToThread(self, thread):
+            pass
+
+        def deleteLater(self):
+            pass
+
+    def connect_direct(signal, slot):
+        """替代品的信号总是在发出信号的线程中同步调用槽函数。"""
+        signal.connect(slot)
@@ -87,4 +87,67 @@ def get_video_stream_info(video_path: str, ffprobe_path: str) -> (dict, str):
         else:
             return None, "文件中未找到有效的视频流。"
     except Exception as e:
-        return None, f"获取视频信息失败: {e}"
\ No newline at end of file
+        return None, f"获取视频信息失败: {e}"
+
+def get_audio_stream_info(media_path: str, ffprobe_path: str) -> (dict, str):
+    """
+    使用 ffprobe 获取媒体文件的第一个音频流的详细信息。
+    """
+    if not os.path.exists(media_path):
+        return None, f"错误：找不到文件 '{media_path}'"
+
+    command = [
+        ffprobe_path,
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_streams",
+        "-select_streams", "a:0",
+        media_path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        data = json.loads(result.stdout)
+        if "streams" in data and len(data["streams"]) > 0:
+            return data["streams"][0], None
+        else:
+            return None, "文件中未找到有效的音频流。"
+    except Exception as e:
+        return None, f"获取音频信息失败: {e}"
+
+def get_media_info(media_path: str, ffprobe_path: str) -> (dict, str):
+    """
+    使用 ffprobe 获取媒体文件的容器信息和全部流信息。
+    返回的字典包含 'format' 和 'streams' 两个键。
+    """
+    if not os.path.exists(media_path):
+        return None, f"错误：找不到文件 '{media_path}'"
+
+    command = [
+        ffprobe_path,
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        media_path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        data = json.loads(result.stdout)
+        if not data.get("streams"):
+            return None, "文件中未找到有效的音视频流。"
+        data.setdefault("format", {})
+        return data, None
+    except Exception as e:
+        return None, f"获取媒体信息失败: {e}"
+
+def parse_timestamp(text):
+    """将 '75.5'、'01:15.5' 或 '00:01:15.500' 格式的时间转换为秒，格式错误时抛出 ValueError。"""
+    parts = text.strip().replace(',', '.').split(':')
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"无法识别的时间格式: {text}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"时间不能为负数: {text}")
+    return seconds
@@ -1,10 +1,44 @@
 # core/workers/clip_worker.py
-import subprocess
 import os
-from PySide6.QtCore import QObject, Signal
+import re
+from core.qt_compat import QObject, Signal
 
 # 【新增】导入统一编码器配置模块
 from core.codec_config import get_codec_params
+from core.ffmpeg_runner import FFmpegRunner
+
+def finalize_clips(source_video, clip_list, output_dir, ext):
+    """
+    裁剪全部结束后，把按序号命名的临时文件重命名为片段名称，并写入裁剪记录 _clip_record.txt。
+    :return: 日志消息列表
+    """
+    messages = []
+    for i, clip_info in enumerate(clip_list):
+        temp_filename = f"{i+1:03d}.{ext}"
+        temp_filepath = os.path.join(output_dir, temp_filename)
+        safe_name = re.sub(r'[\\/*?:"<>|]', "_", clip_info['name'])
+        final_filename = f"{safe_name}.{ext}"
+        final_filepath = os.path.join(output_dir, final_filename)
+        if os.path.exists(temp_filepath):
+            try:
+                os.rename(temp_filepath, final_filepath)
+                messages.append(f"重命名: {temp_filename} -> {final_filename}")
+            except OSError as e:
+                messages.append(f"❌ 重命名失败: {e}")
+
+    record_file_path = os.path.join(output_dir, "_clip_record.txt")
+    try:
+        with open(record_file_path, 'w', encoding='utf-8') as f:
+            f.write("--- 批量裁剪记录 ---\n")
+            f.write(f"源文件: {source_video}\n\n")
+            for clip in clip_list:
+                f.write(f"名称: {clip['name']}\n")
+                f.write(f"开始: {clip['start']}\n")
+                f.write(f"结束: {clip['end']}\n\n")
+        messages.append(f"✅ 裁剪记录已保存到: {record_file_path}")
+    except IOError as e:
+        messages.append(f"❌ 保存记录文件失败: {e}")
+    return messages
 
 class BatchClipWorker(QObject):
     """
@@ -22,6 +56,7 @@ class BatchClipWorker(QObject):
         self.clip_list = clip_list
         self.options = options
         self._is_running = True
+        self.runner = FFmpegRunner(options.get('threads'), options.get('niceness'))
 
     def run(self):
         total_clips = len(self.clip_list)
@@ -64,16 +99,12 @@ class BatchClipWorker(QObject):
             command.extend(['-y', temp_filepath])
             self.log_message.emit(f"🚀 执行命令: {' '.join(['ffmpeg'] + command)}")
 
-            process = subprocess.Popen([self.ffmpeg_path] + command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            
-            for line in iter(process.stdout.readline, ''):
-                if not line: break
-                self.log_message.emit(line.strip())
-            
-            process.wait()
-            self.clip_finished.emit(process.returncode, temp_filepath)
+            result = self.runner.run([self.ffmpeg_path] + command, on_line=self.log_message.emit)
+            self.log_message.emit(f"⏱️ {clip_name}: {result.summary()}")
+            self.clip_finished.emit(result.returncode, temp_filepath)
 
         self.batch_finished.emit()
 
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self._is_running = False
+        self.runner.stop()
\ No newline at end of file
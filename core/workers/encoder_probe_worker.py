@@ -0,0 +1,23 @@
+# core/workers/encoder_probe_worker.py
+from core.qt_compat import QObject, Signal
+
+from core.codec_config import detect_available_encoders, encoder_detection_failed
+
+class EncoderProbeWorker(QObject):
+    """
+    在后台检测本机 FFmpeg 实际可用的编码器（首次检测最多要实际编码几次测试画面），
+    不阻塞界面启动。检测完成后 finished(是否检测失败) 通知界面刷新编码器下拉框。
+    """
+    finished = Signal(bool)
+
+    def __init__(self, ffmpeg_path):
+        super().__init__()
+        self.ffmpeg_path = ffmpeg_path
+
+    def run(self):
+        try:
+            availability = detect_available_encoders(self.ffmpeg_path)
+            self.finished.emit(encoder_detection_failed(availability))
+        except Exception:
+            # 检测本身出错时保持“未检测”状态，所有预设照常列出
+            self.finished.emit(False)
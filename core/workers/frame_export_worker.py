@@ -1,26 +1,37 @@
 # core/workers/frame_export_worker.py
-import subprocess
 import os
-from PySide6.QtCore import QObject, Signal
+import re
+from core.qt_compat import QObject, Signal
+
+from core.utils import get_video_duration
+from core.frame_index import load_frame_index, exact_seek_time
+from core.preview import build_timestamps_select
+from core.ffmpeg_runner import FFmpegRunner
 
 class FrameExportWorker(QObject):
     """
     在后台使用FFmpeg从视频的指定时间戳导出一帧高质量的静态图片。
+    exact_frame 为 True 时，timestamp_secs 是帧索引中某一帧的准确时间戳，
+    会定位到该帧而不是“时间戳之后最近的一帧”。
     """
     finished = Signal(bool, str)
     log_message = Signal(str)
 
-    def __init__(self, ffmpeg_path, video_file, timestamp_secs, output_path):
+    def __init__(self, ffmpeg_path, video_file, timestamp_secs, output_path, exact_frame=False):
         super().__init__()
         self.ffmpeg_path = ffmpeg_path
         self.video_file = video_file
         self.timestamp_secs = timestamp_secs
         self.output_path = output_path
+        self.exact_frame = exact_frame
+        self.runner = FFmpegRunner()
 
     def run(self):
         try:
             self.log_message.emit(f"准备从 {self.timestamp_secs:.3f}s 处导出静帧...")
             
+            seek_secs = exact_seek_time(self.timestamp_secs) if self.exact_frame else self.timestamp_secs
+
             # -ss: 定位到指定时间戳
             # -i: 输入文件
             # -vframes 1: 只导出一帧
@@ -28,7 +39,7 @@ class FrameExportWorker(QObject):
             command = [
                 self.ffmpeg_path,
                 '-y',
-                '-ss', str(self.timestamp_secs),
+                '-ss', f"{seek_secs:.6f}",
                 '-i', self.video_file,
                 '-vframes', '1',
                 '-q:v', '2',
@@ -37,22 +48,251 @@ class FrameExportWorker(QObject):
             
             self.log_message.emit(f"🚀 执行命令: {' '.join(command)}")
             
-            # 使用 subprocess.run 因为这是一个短暂、一次性的任务
-            result = subprocess.run(command, capture_output=True, text=True, check=True, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            result = self.runner.run(command)
 
-            if os.path.exists(self.output_path):
+            if result.returncode != 0:
+                error_msg = f"FFmpeg执行失败 (返回码 {result.returncode}):\n{result.error_text()}"
+                self.log_message.emit(f"❌ {error_msg}")
+                self.finished.emit(False, error_msg)
+            elif os.path.exists(self.output_path):
                 self.log_message.emit(f"✅ 静帧导出成功: {self.output_path}")
                 self.finished.emit(True, self.output_path)
             else:
-                error_msg = f"导出失败，未找到输出文件。\nFFmpeg输出:\n{result.stderr}"
+                error_msg = f"导出失败，未找到输出文件。\nFFmpeg输出:\n{result.error_text()}"
                 self.log_message.emit(f"❌ {error_msg}")
                 self.finished.emit(False, error_msg)
 
-        except subprocess.CalledProcessError as e:
-            error_msg = f"FFmpeg执行失败 (返回码 {e.returncode}):\n{e.stderr}"
+        except Exception as e:
+            error_msg = f"发生未知错误: {e}"
             self.log_message.emit(f"❌ {error_msg}")
             self.finished.emit(False, error_msg)
+
+    def stop(self):
+        self.runner.stop()
+
+class FrameIndexWorker(QObject):
+    """在后台建立（或从缓存读取）视频的逐帧时间戳索引。"""
+    finished = Signal(dict, str)
+
+    def __init__(self, ffprobe_path, video_file):
+        super().__init__()
+        self.ffprobe_path = ffprobe_path
+        self.video_file = video_file
+
+    def run(self):
+        try:
+            index, msg = load_frame_index(self.video_file, self.ffprobe_path)
+            self.finished.emit(index or {}, msg or "")
+        except Exception as e:
+            self.finished.emit({}, f"发生严重错误: {e}")
+
+def pick_top_scenes(scores, top_n):
+    """从 [(时间, 场景分数, ...), ...] 中选出分数最高的 top_n 个，按时间顺序返回。"""
+    best = sorted(scores, key=lambda item: item[1], reverse=True)[:top_n]
+    return sorted(best)
+
+def build_pts_select(pts_values):
+    """
+    按帧的原始 pts（时间基单位的整数）精确选中帧。
+    metadata=print 打印的 pts_time 是舍入后的秒数，向上舍入时 gte(t,T) 会漏掉目标帧而选中下一帧，
+    整数 pts 则与导出时解码出的帧完全一致。
+    """
+    return "+".join(f"eq(pts,{pts})" for pts in pts_values)
+
+def build_interval_select(interval_secs):
+    """
+    每隔 interval_secs 秒选中一帧（从第一帧开始）。
+    按 floor(t/间隔) 的变化选帧，即每个 k*间隔 之后的第一帧；不以上一张选中帧为起点计时，
+    间隔不是帧时长的整数倍时误差不会逐张累积。
+    """
+    return f"isnan(prev_selected_t)+gt(floor(t/{interval_secs:.6f}),floor(prev_selected_t/{interval_secs:.6f}))"
+
+class BatchFrameExportWorker(QObject):
+    """
+    在一次 FFmpeg 调用中导出多帧静态图片，避免每帧都启动一个进程并重新定位。
+    - 'timestamps' 模式：导出指定时间点处的帧。
+    - 'interval' 模式：每隔固定秒数导出一帧。
+    - 'scene' 模式：先在（可缩小的）画面上做一遍场景切换打分，取分数最高的 N 个镜头，
+      再以原始分辨率导出这些帧，并通过 scenes_detected 信号返回它们的时间点。
+    图片按顺序编号输出，并根据 FFmpeg 的 frame= 计数汇报逐帧进度。
+    """
+    finished = Signal(bool, str)
+    log_message = Signal(str)
+    progress = Signal(int)
+    scenes_detected = Signal(list)
+
+    def __init__(self, ffmpeg_path, ffprobe_path, video_file, output_dir, params):
+        super().__init__()
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+        self.video_file = video_file
+        self.output_dir = output_dir
+        self.params = params
+        self._is_running = True
+        self.runner = FFmpegRunner(params.get('threads'), params.get('niceness'))
+        self.error_output = ""
+        # 当前阶段在总进度条中所占的区间（百分比），两阶段任务时分段汇报
+        self._progress_range = (0, 100)
+
+    def run(self):
+        try:
+            mode = self.params.get('mode', 'timestamps')
+            ext = self.params.get('format', 'png')
+            base_name = os.path.splitext(os.path.basename(self.video_file))[0]
+            output_pattern = os.path.join(self.output_dir, f"{base_name}_frame_%04d.{ext}").replace("\\", "/")
+
+            if mode == 'interval':
+                interval = float(self.params['interval'])
+                if interval <= 0:
+                    self.finished.emit(False, "导出间隔必须大于 0 秒。")
+                    return
+                duration = get_video_duration(self.video_file, self.ffprobe_path)
+                expected = int(duration // interval) + 1 if duration > 0 else 0
+                self.log_message.emit(f"准备每隔 {interval:g} 秒导出一帧，预计 {expected} 张...")
+                select_expr = build_interval_select(interval)
+            elif mode == 'scene':
+                scenes = self._detect_scenes()
+                if scenes is None:
+                    self.finished.emit(False, "批量导出已停止。" if not self._is_running else f"场景检测失败。\nFFmpeg输出:\n{self.error_output}")
+                    return
+                if not scenes:
+                    self.finished.emit(False, "未检测到超过阈值的场景切换，请尝试降低阈值。")
+                    return
+                self.scenes_detected.emit([t for t, _ in scenes])
+                expected = len(scenes)
+                self.log_message.emit(f"正在以原始分辨率导出 {expected} 个场景帧...")
+                select_expr = build_pts_select(pts for _, pts in scenes)
+                self._progress_range = (80, 100)
+            else:
+                timestamps = sorted(set(self.params['timestamps']))
+                if not timestamps:
+                    self.finished.emit(False, "没有需要导出的时间点。")
+                    return
+                expected = len(timestamps)
+                self.log_message.emit(f"准备一次性导出 {expected} 个时间点的静帧...")
+                select_expr = build_timestamps_select(timestamps)
+
+            count = self._extract_frames(select_expr, output_pattern, expected)
+            if not self._is_running:
+                self.finished.emit(False, "批量导出已停止。")
+            elif count <= 0:
+                self.finished.emit(False, f"未导出任何图片。\nFFmpeg输出:\n{self.error_output}")
+            else:
+                if mode != 'interval' and count < expected:
+                    self.log_message.emit(f"⚠️ 部分时间点超出视频时长或落在同一帧内，实际导出 {count}/{expected} 张。")
+                self.log_message.emit(f"✅ 批量导出完成，共 {count} 张图片。")
+                self.finished.emit(True, self.output_dir)
+
         except Exception as e:
             error_msg = f"发生未知错误: {e}"
             self.log_message.emit(f"❌ {error_msg}")
-            self.finished.emit(False, error_msg)
\ No newline at end of file
+            self.finished.emit(False, error_msg)
+
+    def _extract_frames(self, select_expr, output_pattern, expected, input_args=None, filter_prefix=""):
+        """
+        执行一次解码，用 select 表达式挑出所有目标帧并编号写出。
+        :param input_args: 放在 -i 之前的额外参数（例如输入端 -ss）
+        :param filter_prefix: 放在 select 之前的滤镜（需以逗号结尾）
+        :return: 实际写出的帧数；失败时返回 -1
+        """
+        # select 表达式中的逗号需要用单引号保护
+        command = [
+            self.ffmpeg_path, '-hide_banner', '-y',
+            *(input_args or []),
+            '-i', self.video_file,
+            '-vf', f"{filter_prefix}select='{select_expr}'",
+            '-vsync', 'vfr',
+            '-q:v', '2',
+        ]
+        if expected > 0:
+            # 写满预期帧数后立即结束，不必解码到视频末尾
+            command.extend(['-frames:v', str(expected)])
+        command.append(output_pattern)
+        self.log_message.emit(f"🚀 执行命令: {' '.join(command[:8])} ... {' '.join(command[-4:])}")
+
+        frame_pattern = re.compile(r"frame=\s*(\d+)")
+        count = 0
+
+        def on_line(line):
+            nonlocal count
+            match = frame_pattern.search(line)
+            if match:
+                count = int(match.group(1))
+                if expected > 0:
+                    self._emit_progress(count / expected)
+
+        result = self.runner.run(command, on_line=on_line)
+        if result.returncode != 0 and not result.cancelled:
+            self.error_output = "\n".join(result.tail[-10:])
+            self.log_message.emit(self.error_output)
+            return -1
+        self.log_message.emit(f"⏱️ {result.summary()}")
+        return count
+
+    def _emit_progress(self, fraction):
+        low, high = self._progress_range
+        self.progress.emit(low + int(min(fraction, 1.0) * (high - low)))
+
+    def _detect_scenes(self):
+        """
+        单次解码完成场景切换打分：select 只放行分数超过阈值的帧，
+        metadata=print 把每个放行帧的 pts、pts_time 和 lavfi.scene_score 打印到标准输出。
+        可选先缩小画面，解码后的打分计算量随之大幅下降。
+        :return: 选中帧的 [(时间, pts), ...]（按时间排序）；失败或被停止时返回 None
+        """
+        threshold = float(self.params.get('scene_threshold', 0.3))
+        top_n = int(self.params.get('top_n', 10))
+        scale_width = int(self.params.get('scene_scale_width', 320))
+        duration = get_video_duration(self.video_file, self.ffprobe_path)
+
+        filters = []
+        if scale_width > 0:
+            filters.append(f"scale={scale_width}:-2")
+        filters.append(f"select='gt(scene,{threshold})'")
+        filters.append("metadata=print:file=-")
+        command = [
+            self.ffmpeg_path, '-hide_banner',
+            '-i', self.video_file,
+            '-an', '-sn', '-dn',
+            '-vf', ",".join(filters),
+            '-f', 'null', '-'
+        ]
+        self.log_message.emit(f"正在检测场景切换 (阈值 {threshold:g}，取前 {top_n} 个)...")
+        self.log_message.emit(f"🚀 执行命令: {' '.join(command)}")
+
+        self._progress_range = (0, 80)
+        pts_pattern = re.compile(r"pts:(-?\d+)\s+pts_time:(-?[\d.]+)")
+        score_pattern = re.compile(r"lavfi\.scene_score=([\d.]+)")
+        scores = []
+        current_frame = None
+
+        def on_line(line):
+            nonlocal current_frame
+            pts_match = pts_pattern.search(line)
+            if pts_match:
+                current_frame = (float(pts_match.group(2)), int(pts_match.group(1)))
+                return
+            score_match = score_pattern.search(line)
+            if score_match and current_frame is not None:
+                t, pts = current_frame
+                scores.append((t, float(score_match.group(1)), pts))
+                current_frame = None
+
+        result = self.runner.run(command, on_line=on_line, on_seconds=(lambda secs: self._emit_progress(secs / duration)) if duration > 0 else None)
+        if result.cancelled:
+            return None
+        if result.returncode != 0:
+            self.error_output = "\n".join(result.tail[-10:])
+            self.log_message.emit(self.error_output)
+            return None
+
+        picked = pick_top_scenes(scores, top_n)
+        self.log_message.emit(f"✅ 共检测到 {len(scores)} 处场景切换，选取其中 {len(picked)} 处:")
+        for t, score, _ in picked:
+            self.log_message.emit(f"  {t:10.3f}s  分数 {score:.3f}")
+        self._emit_progress(1.0)
+        return [(t, pts) for t, _, pts in picked]
+
+    def stop(self):
+        self._is_running = False
+        self.runner.stop()
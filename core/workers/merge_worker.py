@@ -1,86 +1,384 @@
 # core/workers/merge_worker.py
-import subprocess
 import os
-from PySide6.QtCore import QObject, Signal
+import re
+import time
+import shutil
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from core.qt_compat import QObject, Signal
+
+from core.utils import get_media_info
+from core.ffmpeg_runner import FFmpegRunner, parse_time_seconds
+
+# 自动统一格式时，源编码名称 -> 用于重新编码的 FFmpeg 编码器
+VIDEO_ENCODER_MAP = {
+    'h264': 'libx264', 'hevc': 'libx265', 'mpeg4': 'mpeg4', 'mpeg2video': 'mpeg2video',
+    'vp8': 'libvpx', 'vp9': 'libvpx-vp9', 'av1': 'libsvtav1',
+}
+AUDIO_ENCODER_MAP = {
+    'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus', 'vorbis': 'libvorbis', 'flac': 'flac',
+    'ac3': 'ac3', 'alac': 'alac', 'pcm_s16le': 'pcm_s16le', 'pcm_s24le': 'pcm_s24le',
+}
+
+def get_stream_signature(media_info):
+    """
+    提取决定能否无损拼接的关键参数：编码、分辨率、像素格式、时间基、帧率，
+    以及音频的编码、采样率和声道数。签名相同的文件可以直接用 concat 复制合并。
+    """
+    streams = media_info.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video' and not s.get('disposition', {}).get('attached_pic')), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    video_sig = None
+    if video:
+        video_sig = (video.get('codec_name'), video.get('width'), video.get('height'), video.get('pix_fmt'),
+                     video.get('time_base'), video.get('r_frame_rate'))
+    audio_sig = None
+    if audio:
+        audio_sig = (audio.get('codec_name'), audio.get('sample_rate'), audio.get('channels'))
+    return video_sig, audio_sig
+
+def is_valid_frame_rate(rate):
+    """ffprobe 报告的帧率（如 '30000/1001'）是否有效；无法确定帧率时会是 '0/0'。"""
+    try:
+        num, den = (rate or '').split('/')
+        return float(num) > 0 and float(den) > 0
+    except ValueError:
+        return False
+
+def escape_concat_path(path):
+    """
+    按 concat 列表的语法为路径加引号。单引号内的内容不做任何转义，
+    因此路径中的单引号需要先结束引号、转义、再重新开始引号: ' -> '\\''
+    """
+    return "'" + path.replace("'", "'\\''") + "'"
+
+def build_concat_list(file_list):
+    return "".join(f"file {escape_concat_path(path)}\n" for path in file_list)
+
+# 可以直接按字节拼接的 MPEG-TS 类容器，使用 concat 协议合并
+CONCAT_PROTOCOL_EXTS = ('.ts', '.mts', '.m2ts')
+
+# 支持分片写入 (fragmented MP4) 的容器
+FRAGMENTED_EXTS = ('.mp4', '.mov', '.m4a', '.m4v')
+
+def describe_signature(signature):
+    video_sig, audio_sig = signature
+    parts = []
+    if video_sig:
+        codec, width, height, pix_fmt, time_base, frame_rate = video_sig
+        parts.append(f"视频 {codec} {width}x{height} {pix_fmt} {frame_rate}fps tb={time_base}")
+    if audio_sig:
+        codec, sample_rate, channels = audio_sig
+        parts.append(f"音频 {codec} {sample_rate}Hz {channels}ch")
+    return " / ".join(parts) or "无音视频流"
 
 class MergeWorker(QObject):
     """
     在后台使用 FFmpeg 的 concat demuxer 合并多个媒体文件。
+    合并前会并发探测所有文件，按流参数分组；参数不一致时可只把不一致的文件
+    重新编码为占比最大的那组参数，其余文件仍然直接复制。
     """
     finished = Signal(int, str)
     log_message = Signal(str)
     progress = Signal(str)
+    progress_percent = Signal(int)
 
-    def __init__(self, ffmpeg_path, file_list, output_path):
+    def __init__(self, ffmpeg_path, ffprobe_path, file_list, output_path, options=None):
         super().__init__()
         self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
         self.file_list = file_list
         self.output_path = output_path
+        self.options = options or {}
         self._is_running = True
+        self.runner = FFmpegRunner(self.options.get('threads'), self.options.get('niceness'))
+        self._temp_dir = None
+        self._durations = []
+
+    def _probe_all(self):
+        """并发探测所有待合并文件的流信息。"""
+        if not self.file_list:
+            return []
+        with ThreadPoolExecutor(max_workers=min(8, len(self.file_list))) as executor:
+            return list(executor.map(lambda path: get_media_info(path, self.ffprobe_path), self.file_list))
+
+    def _preflight(self):
+        """
+        检查所有文件的流参数是否一致。
+        :return: (用于合并的文件列表, 错误信息)。成功时错误信息为 None。
+        """
+        if not self.file_list:
+            return None, "没有需要合并的文件。"
+        self.progress.emit("正在分析待合并的文件...")
+        probe_results = self._probe_all()
+
+        signatures = []
+        durations = []
+        for path, (info, msg) in zip(self.file_list, probe_results):
+            if not info:
+                return None, f"无法分析文件 {os.path.basename(path)}: {msg}"
+            signatures.append(get_stream_signature(info))
+            try:
+                durations.append(float(info['format'].get('duration', 0)))
+            except (TypeError, ValueError):
+                durations.append(0.0)
+        self._durations = durations
+
+        # 按签名分组，以总时长最长的一组作为目标参数，使需要重新编码的内容最少
+        groups = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            groups[signature].append(index)
+        if len(groups) == 1:
+            self.log_message.emit(f"✅ 所有文件的流参数一致 ({describe_signature(signatures[0])})，将直接复制合并。")
+            return list(self.file_list), None
+
+        dominant = max(groups, key=lambda sig: (sum(durations[i] for i in groups[sig]), len(groups[sig])))
+        mismatched = [i for i, sig in enumerate(signatures) if sig != dominant]
+
+        self.log_message.emit(f"⚠️ 检测到 {len(groups)} 种不同的流参数，目标参数: {describe_signature(dominant)}")
+        for i in mismatched:
+            self.log_message.emit(f"   - 不一致: {os.path.basename(self.file_list[i])} ({describe_signature(signatures[i])})")
+
+        if not self.options.get('auto_normalize', True):
+            return None, "待合并文件的编码、分辨率或音频参数不一致，无法直接复制合并。\n请开启“自动统一不兼容的文件”，或先手动转码。"
+
+        normalized_files = list(self.file_list)
+        ext = os.path.splitext(self.output_path)[1]
+        # 中间文件放在输出目录下独立的临时文件夹中，多个合并任务互不干扰
+        self._temp_dir = tempfile.mkdtemp(prefix=".merge_", dir=os.path.dirname(self.output_path))
+        jobs = []
+        for i in mismatched:
+            command, msg = self._build_normalize_command(self.file_list[i], signatures[i], dominant,
+                                                         os.path.join(self._temp_dir, f"{i:04d}{ext}"))
+            if not command:
+                return None, msg
+            jobs.append((i, command))
+
+        self.progress.emit(f"正在重新编码 {len(jobs)} 个不一致的文件...")
+        max_workers = max(1, self.options.get('normalize_workers', 2))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda job: (job[0], job[1][-1], self._run_quiet(job[1])), jobs))
+
+        for i, normalized_path, (return_code, stderr) in results:
+            if not self._is_running:
+                return None, "任务已取消。"
+            if return_code != 0:
+                self.log_message.emit(stderr[-2000:])
+                return None, f"重新编码文件失败: {os.path.basename(self.file_list[i])}"
+            self.log_message.emit(f"✅ 已统一格式: {os.path.basename(self.file_list[i])}")
+            normalized_files[i] = normalized_path.replace("\\", "/")
+        return normalized_files, None
+
+    def _build_normalize_command(self, input_path, signature, target, output_path):
+        """构建把单个文件重新编码为目标签名的命令。"""
+        video_sig, audio_sig = signature
+        target_video, target_audio = target
+        if not video_sig and not audio_sig:
+            return None, f"{os.path.basename(input_path)} 中没有音视频流，无法合并。"
+        command = [self.ffmpeg_path, '-hide_banner', '-y', '-i', input_path]
+        # 源文件缺少的流用 lavfi 生成的画面 / 静音补齐，保证拼接后音视频对齐；生成的输入没有尽头，需要 -shortest
+        video_input, audio_input, next_input = '0:v:0', '0:a:0', 1
+
+        if target_video and not video_sig:
+            # 纯音频文件补一段黑色画面
+            _, width, height, _, _, frame_rate = target_video
+            rate = frame_rate if is_valid_frame_rate(frame_rate) else '25'
+            command.extend(['-f', 'lavfi', '-i', f"color=c=black:s={width}x{height}:r={rate}"])
+            video_input, next_input = f'{next_input}:v:0', next_input + 1
+
+        if target_audio and not audio_sig:
+            # 源文件没有音轨时补一条静音音轨
+            _, sample_rate, channels = target_audio
+            command.extend(['-f', 'lavfi', '-i', f"anullsrc=r={sample_rate}:cl={'mono' if channels == 1 else 'stereo'}"])
+            audio_input, next_input = f'{next_input}:a:0', next_input + 1
+
+        if target_video:
+            codec, width, height, pix_fmt, time_base, frame_rate = target_video
+            encoder = VIDEO_ENCODER_MAP.get(codec)
+            if not encoder:
+                return None, f"目标视频编码 {codec} 不支持自动统一，请先手动转码。"
+            command.extend(['-map', video_input])
+            command.extend([
+                '-vf', f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                       f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1",
+                '-c:v', encoder,
+            ])
+            if pix_fmt:
+                command.extend(['-pix_fmt', pix_fmt])
+            # 帧率无法确定 ('0/0') 时不指定 -r，保持源帧率
+            if is_valid_frame_rate(frame_rate):
+                command.extend(['-r', frame_rate])
+            if encoder in ('libx264', 'libx265'):
+                command.extend(['-crf', '18', '-preset', 'fast'])
+            if time_base and os.path.splitext(output_path)[1].lower() in ('.mp4', '.mov', '.m4v'):
+                command.extend(['-video_track_timescale', time_base.split('/')[-1]])
+        else:
+            command.append('-vn')
+
+        if target_audio:
+            codec, sample_rate, channels = target_audio
+            encoder = AUDIO_ENCODER_MAP.get(codec)
+            if not encoder:
+                return None, f"目标音频编码 {codec} 不支持自动统一，请先手动转码。"
+            command.extend(['-map', audio_input])
+            command.extend(['-c:a', encoder, '-ar', str(sample_rate), '-ac', str(channels)])
+            if encoder in ('aac', 'libmp3lame', 'libopus', 'libvorbis', 'ac3'):
+                command.extend(['-b:a', '192k'])
+        else:
+            command.append('-an')
+
+        if next_input > 1:
+            command.append('-shortest')
+
+        command.append(output_path)
+        return command, None
+
+    def _run_quiet(self, command):
+        """运行一个不需要实时输出的 FFmpeg 进程，可被 stop() 中断。"""
+        if not self._is_running:
+            return -1, "任务已取消。"
+        self.log_message.emit(f"🚀 执行命令: {' '.join(command)}")
+        result = self.runner.run(command)
+        if result.cancelled:
+            return -1, "任务已取消。"
+        return result.returncode, result.error_text()
+
+    def _container_args(self):
+        """
+        输出封装方式：
+        - standard: 普通 MP4/MKV 等，索引 (moov) 在合并结束时才写入，之前文件不可播放。
+        - fragmented: 分片 MP4，文件头写空索引，之后按关键帧逐段写入，边写边可播放，
+          不需要在内存中为整个文件累积索引。
+        - mpegts: MPEG-TS 流式容器，本身没有全局索引，同样边写边可播放。
+        """
+        mode = self.options.get('container_mode', 'standard')
+        ext = os.path.splitext(self.output_path)[1].lower()
+        if mode == 'fragmented':
+            if ext not in FRAGMENTED_EXTS:
+                self.log_message.emit(f"⚠️ {ext} 格式不支持分片 MP4 写入，将使用标准方式。")
+                return []
+            self.log_message.emit("ℹ️ 使用分片 MP4 写入，合并过程中输出文件即可播放。")
+            return ['-movflags', '+frag_keyframe+empty_moov+default_base_moof', '-min_frag_duration', '1000000']
+        if mode == 'mpegts':
+            self.log_message.emit("ℹ️ 使用 MPEG-TS 写入，合并过程中输出文件即可播放。")
+            return ['-f', 'mpegts']
+        return []
+
+    def _build_merge_command(self, merge_files):
+        """
+        构建最终的复制合并命令，返回 (命令, 需要写入 stdin 的合并列表)。
+        - 全部是 MPEG-TS 时使用 concat 协议，按字节直接拼接，无需列表。
+        - 其他情况使用 concat demuxer，合并列表通过管道传给 FFmpeg，不在磁盘上生成临时文件。
+        """
+        all_ts = all(os.path.splitext(path)[1].lower() in CONCAT_PROTOCOL_EXTS for path in merge_files)
+        if all_ts and not any('|' in path for path in merge_files):
+            self.log_message.emit("ℹ️ 输入均为 MPEG-TS，使用 concat 协议直接拼接。")
+            command = [self.ffmpeg_path, '-y', '-i', "concat:" + "|".join(merge_files), '-c', 'copy']
+            command.extend(self._container_args())
+            command.append(self.output_path)
+            return command, None
+
+        # -f concat: 使用 concat demuxer
+        # -safe 0: 允许使用绝对路径（重要！）
+        # -protocol_whitelist file,pipe -i -: 从标准输入读取合并列表
+        # -c copy: 直接复制流，不重新编码，实现快速无损合并
+        command = [
+            self.ffmpeg_path,
+            '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-protocol_whitelist', 'file,pipe',
+            '-i', '-',
+            '-c', 'copy',
+        ]
+        command.extend(self._container_args())
+        command.append(self.output_path)
+        return command, build_concat_list(merge_files)
+
+    @staticmethod
+    def _format_eta(seconds):
+        seconds = int(seconds)
+        m, s = divmod(seconds, 60)
+        h, m = divmod(m, 60)
+        return f"{h:02d}:{m:02d}:{s:02d}"
+
+    def _report_progress(self, current_seconds, written_bytes, total_duration, total_bytes, start_time):
+        """
+        计算合并进度：优先使用输出时间 / 输入总时长；无法获取时长时，
+        按已写入字节数 / 输入总字节数估算（复制模式下二者基本相等）。
+        """
+        if total_duration > 0 and current_seconds is not None:
+            ratio = current_seconds / total_duration
+        elif total_bytes > 0 and written_bytes is not None:
+            ratio = written_bytes / total_bytes
+        else:
+            return
+        ratio = min(max(ratio, 0.0), 1.0)
+        elapsed = time.time() - start_time
+        if ratio <= 0 or elapsed <= 0:
+            return
+        throughput = ratio * total_bytes / elapsed / (1024 * 1024)
+        eta = elapsed / ratio - elapsed
+        self.progress_percent.emit(int(ratio * 100))
+        self.progress.emit(f"正在合并: {ratio * 100:.1f}% | {throughput:.1f} MB/s | 预计剩余 {self._format_eta(eta)}")
 
     def run(self):
-        temp_list_file = None
         try:
-            # 1. 创建一个临时的文本文件，列出所有要合并的文件
-            # 这是 FFmpeg concat demuxer 的要求
-            output_dir = os.path.dirname(self.output_path)
-            temp_list_file = os.path.join(output_dir, "mergelist.txt")
-            
-            with open(temp_list_file, 'w', encoding='utf-8') as f:
-                for file_path in self.file_list:
-                    # FFmpeg 要求文件路径中的特殊字符需要转义，但作为 demuxer 的输入文件，
-                    # 最好是路径本身是干净的。这里我们直接写入，并确保路径正确。
-                    # 'file' 关键字是必须的
-                    f.write(f"file '{file_path}'\n")
-            
-            self.log_message.emit("✅ 临时合并列表文件创建成功。")
-            self.progress.emit("准备合并...")
+            # 1. 预检：参数不一致的文件在复制前就被发现，并按需只重新编码这些文件
+            merge_files, error_msg = self._preflight()
+            if error_msg:
+                self.log_message.emit(f"❌ {error_msg}")
+                self.finished.emit(-1, error_msg)
+                return
+            if not self._is_running:
+                self.finished.emit(-1, "任务已取消。")
+                return
 
             # 2. 构建 FFmpeg 命令
-            # -f concat: 使用 concat demuxer
-            # -safe 0: 允许使用绝对路径（重要！）
-            # -i mergelist.txt: 输入文件列表
-            # -c copy: 直接复制流，不重新编码，实现快速无损合并
-            command = [
-                self.ffmpeg_path,
-                '-y',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', temp_list_file,
-                '-c', 'copy',
-                self.output_path
-            ]
+            self.progress.emit("准备合并...")
+            command, concat_list = self._build_merge_command(merge_files)
+            total_duration = sum(self._durations)
+            total_bytes = sum(os.path.getsize(path) for path in merge_files)
+            self.log_message.emit(f"ℹ️ 输入总时长 {self._format_eta(total_duration)}，总大小 {total_bytes / (1024 * 1024):.1f} MB")
 
             self.log_message.emit(f"🚀 执行命令: {' '.join(command)}")
             self.progress.emit("正在合并文件，请稍候...")
-            
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            
-            for line in iter(process.stdout.readline, ''):
-                if not line: break
-                self.log_message.emit(line.strip())
 
-            process.wait()
+            size_pattern = re.compile(r"size=\s*(\d+)\s*(?:kB|KiB)")
+            start_time = time.time()
+
+            def on_line(line):
+                self.log_message.emit(line)
+                current_seconds = parse_time_seconds(line)
+                size_match = size_pattern.search(line)
+                if current_seconds is not None or size_match:
+                    written_bytes = int(size_match.group(1)) * 1024 if size_match else None
+                    self._report_progress(current_seconds, written_bytes, total_duration, total_bytes, start_time)
 
-            if process.returncode == 0:
+            result = self.runner.run(command, on_line=on_line, stdin_data=concat_list)
+            if result.cancelled:
+                self.log_message.emit("⏹️ 合并已被用户停止。")
+                self.finished.emit(-1, "任务已取消。")
+            elif result.returncode == 0:
+                self.progress_percent.emit(100)
+                self.log_message.emit(f"⏱️ {result.summary()}")
                 self.log_message.emit(f"✅ 合并成功！输出文件位于:\n{self.output_path}")
                 self.finished.emit(0, "所有文件合并成功！")
             else:
-                self.log_message.emit(f"❌ 合并失败，FFmpeg 返回错误码: {process.returncode}")
-                self.finished.emit(process.returncode, f"合并失败！请检查日志输出获取详细信息。")
+                self.log_message.emit(f"❌ 合并失败，FFmpeg 返回错误码: {result.returncode}")
+                self.finished.emit(result.returncode, f"合并失败！请检查日志输出获取详细信息。")
 
         except Exception as e:
             error_msg = f"发生严重错误: {e}"
             self.log_message.emit(error_msg)
             self.finished.emit(-1, error_msg)
         finally:
-            # 3. 清理临时的列表文件
-            if temp_list_file and os.path.exists(temp_list_file):
-                try:
-                    os.remove(temp_list_file)
-                    self.log_message.emit("ℹ️ 已清理临时文件。")
-                except OSError:
-                    pass
+            # 3. 清理重新编码产生的中间文件
+            if self._temp_dir:
+                shutil.rmtree(self._temp_dir, ignore_errors=True)
+                self.log_message.emit("ℹ️ 已清理临时文件。")
 
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self._is_running = False
+        self.runner.stop()
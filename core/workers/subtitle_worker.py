@@ -1,11 +1,13 @@
 # core/workers/subtitle_worker.py
-import subprocess
-import re
 import os
-from PySide6.QtCore import QObject, Signal
+from core.qt_compat import QObject, Signal, QImage
 
 from core.utils import get_video_duration, get_video_dimensions
 from core.codec_config import get_codec_params
+from core.ffmpeg_runner import FFmpegRunner
+from core.preview import (PREVIEW_MAX_SIZE, escape_filter_path, preview_scale, enable_scaled_border_and_shadow)
+from core.preview_session import (PreviewSession, make_session_key, render_preview,
+                                  likely_preview_points, subtitle_event_starts)
 
 class SubtitleBurnWorker(QObject):
     """
@@ -24,6 +26,7 @@ class SubtitleBurnWorker(QObject):
         # 【修改】变量名 lrc_to_ass_converter 改为 ass_converter
         self.ass_converter = ass_converter
         self._is_running = True
+        self.runner = FFmpegRunner(params.get('threads'), params.get('niceness'))
 
     def run(self):
         video_file = self.params['video_file']
@@ -68,28 +71,11 @@ class SubtitleBurnWorker(QObject):
             command.extend(['-c:a', 'aac', '-b:a', '192k'])
             command.extend(['-y', output_file])
             
-            process = subprocess.Popen([self.ffmpeg_path] + command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
             self.log_message.emit(f"🚀 执行命令: {' '.join(['ffmpeg'] + command)}")
-            
             duration = get_video_duration(video_file, self.ffprobe_path)
-            time_pattern = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-
-            for line in iter(process.stdout.readline, ''):
-                if not self._is_running:
-                    process.terminate()
-                    break
-                if not line: break
-                line_strip = line.strip()
-                self.log_message.emit(line_strip)
-                match = time_pattern.search(line_strip)
-                if match and duration > 0:
-                    h, m, s, ms = map(int, match.groups())
-                    current_seconds = h * 3600 + m * 60 + s + ms / 100
-                    progress = int((current_seconds / duration) * 100)
-                    self.progress.emit(min(progress, 100))
-            
-            process.wait()
-            self.finished.emit(process.returncode, "处理完成！")
+            result = self.runner.run([self.ffmpeg_path] + command, on_line=self.log_message.emit, duration=duration, on_percent=self.progress.emit)
+            self.log_message.emit(f"⏱️ {result.summary()}")
+            self.finished.emit(result.returncode, "处理完成！")
 
         except Exception as e:
             self.finished.emit(-1, f"发生严重错误: {e}")
@@ -102,71 +88,74 @@ class SubtitleBurnWorker(QObject):
 
     def stop(self):
         self._is_running = False
+        self.runner.stop()
 
 class PreviewWorker(QObject):
     """
     在后台生成带字幕效果的单帧预览图。
+    画面以原始 RGB 数据从 FFmpeg 的标准输出读回，通过 image_ready 信号以 QImage 发出。
+    传入标签页的 PreviewSession 时，样式不变则复用字幕和已渲染的帧，并在后台预渲染常用时间点。
     """
     finished = Signal(bool, str)
     log_message = Signal(str)
+    image_ready = Signal(QImage)
 
-    def __init__(self, ffmpeg_path, ffprobe_path, params, ass_converter):
+    def __init__(self, ffmpeg_path, ffprobe_path, params, ass_converter, session=None):
         super().__init__()
         self.ffmpeg_path = ffmpeg_path
         self.ffprobe_path = ffprobe_path
         self.params = params
         # 【修改】变量名 lrc_to_ass_converter 改为 ass_converter
         self.ass_converter = ass_converter
+        # 标签页持有的预览会话；未提供时使用一次性会话
+        self.session = session
 
     def run(self):
-        temp_ass_path = None
-        temp_img_path = None
+        session = self.session or PreviewSession(self.ffmpeg_path)
         try:
             video_file = self.params['video_file']
             # 【修改】变量名 lrc_file 改为 subtitle_file
             subtitle_file = self.params['lrc_file']
             
             self.log_message.emit("正在获取视频信息...")
-            width, height, msg = get_video_dimensions(video_file, self.ffprobe_path)
-            duration = get_video_duration(video_file, self.ffprobe_path)
+            width, height, duration, msg = session.video_info(video_file, self.ffprobe_path)
             if not (width and duration > 0):
                 self.finished.emit(False, f"无法获取视频信息: {msg}")
                 return
 
-            self.log_message.emit("正在生成ASS字幕文件...")
-            base_name, _ = os.path.splitext(os.path.basename(video_file))
-            temp_ass_path = os.path.join(self.params['base_path'], f"{base_name}_preview.ass").replace("\\", "/")
-            
-            # 【修改】参数名 lrc_file 改为 subtitle_file
-            success, msg = self.ass_converter(lrc_file=subtitle_file, ass_file=temp_ass_path, video_width=width, video_height=height, **self.params['ass_options'])
-            if not success:
-                self.finished.emit(False, f"生成ASS字幕失败: {msg}")
-                return
-
-            self.log_message.emit("正在截取预览帧...")
             preview_target_time = 120.0
             seek_point = preview_target_time if duration > preview_target_time else duration / 2
-            temp_img_path = os.path.join(self.params['base_path'], "preview.jpg")
-            
-            escaped_ass_path = temp_ass_path.replace('\\', '/').replace(':', '\\:')
-            vf_chain = f"ass=filename='{escaped_ass_path}'"
-            
-            command = [self.ffmpeg_path, '-y', '-i', video_file, '-ss', str(seek_point), '-vf', vf_chain, '-vframes', '1', temp_img_path]
-            
-            result = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-
-            if os.path.exists(temp_img_path):
-                self.finished.emit(True, temp_img_path)
-            else:
-                self.finished.emit(False, f"生成预览图片失败！\n{result.stderr}")
+            seek_point = self.params.get('preview_time', seek_point)
+            max_size = self.params.get('preview_max_size', PREVIEW_MAX_SIZE)
+            factor, scaled_width, scaled_height = preview_scale(width, height, max_size)
+
+            def build_ass(ass_path):
+                self.log_message.emit("正在生成ASS字幕文件...")
+                # 【修改】参数名 lrc_file 改为 subtitle_file
+                return self.ass_converter(lrc_file=subtitle_file, ass_file=ass_path, video_width=width, video_height=height, **self.params['ass_options'])
+
+            def build_filters(ass_path):
+                filters = []
+                if factor < 1.0:
+                    # 先缩小再渲染字幕，libass 按 PlayRes 同比缩放字幕
+                    filters.append(f"scale={scaled_width}:{scaled_height}")
+                    enable_scaled_border_and_shadow(ass_path)
+                filters.append(f"ass=filename='{escape_filter_path(ass_path)}'")
+                return ",".join(filters), scaled_width, scaled_height
+
+            key = make_session_key(video_file, subtitle_file, [self.params['ass_options'], max_size])
+            frame, frame_width, frame_height, error = render_preview(session, key, video_file, build_ass, build_filters, seek_point, self.log_message.emit,
+                                                                       self.params.get('contact_sheet'), duration)
+            if frame is None:
+                self.finished.emit(False, error)
+                return
+            self.image_ready.emit(QImage(frame, frame_width, frame_height, frame_width * 3, QImage.Format_RGB888).copy())
+            self.finished.emit(True, "预览生成完成")
+            if self.session:
+                session.start_prerender(likely_preview_points(duration, subtitle_event_starts(subtitle_file), seek_point))
 
-        except subprocess.CalledProcessError as e:
-            self.finished.emit(False, f"FFmpeg执行预览失败:\n{e.stderr}")
         except Exception as e:
             self.finished.emit(False, f"生成预览时发生未知错误: {e}")
         finally:
-            if temp_ass_path and os.path.exists(temp_ass_path):
-                try:
-                    os.remove(temp_ass_path)
-                except OSError:
-                    pass
\ No newline at end of file
+            if not self.session:
+                session.close()
@@ -1,12 +1,22 @@
 # core/workers/transcode_worker.py
-import subprocess
-import re
 import os
-from PySide6.QtCore import QObject, Signal
+from core.qt_compat import QObject, Signal
 
-from core.utils import get_video_duration
+from core.utils import get_video_duration, get_audio_stream_info
 # 【新增】导入统一编码器配置模块
-from core.codec_config import get_codec_params
+from core.codec_config import get_codec_params, can_copy_audio
+from core.ffmpeg_runner import FFmpegRunner
+
+def audio_extract_resource(file_queue, ext, ffprobe_path):
+    """
+    提取音频任务的调度资源类别：所有文件的音频流都能直接复制时只受磁盘读写限制，返回 'disk_io'；
+    只要有一个文件需要重新编码就返回 'cpu_encode'（遇到第一个需要重新编码的文件即停止检测）。
+    """
+    for input_file in file_queue:
+        audio_info, _ = get_audio_stream_info(input_file, ffprobe_path)
+        if not can_copy_audio(audio_info.get('codec_name') if audio_info else None, ext):
+            return 'cpu_encode'
+    return 'disk_io'
 
 class BatchTranscodeWorker(QObject):
     """
@@ -26,6 +36,7 @@ class BatchTranscodeWorker(QObject):
         self.file_queue = file_queue
         self.options = transcode_options
         self._is_running = True
+        self.runner = FFmpegRunner(transcode_options.get('threads'), transcode_options.get('niceness'))
 
     def run(self):
         total_files = len(self.file_queue)
@@ -50,8 +61,7 @@ class BatchTranscodeWorker(QObject):
             
             # 【修改】重构编码器参数逻辑
             if "提取" in selected_format:
-                codec_map = {"aac": "aac", "mp3": "libmp3lame", "flac": "flac", "wav": "pcm_s16le", "opus": "libopus"}
-                command.extend(['-vn', '-c:a', codec_map.get(ext, 'aac')])
+                command.extend(self._audio_extract_args(input_file, ext))
             else:
                 if "直接复制" in codec_name:
                     # 对于转码，直接复制意味着音视频流都复制
@@ -65,27 +75,30 @@ class BatchTranscodeWorker(QObject):
             
             command.extend(['-y', output_file])
 
-            process = subprocess.Popen([self.ffmpeg_path] + command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
             self.log_message.emit(f"🚀 执行命令: {' '.join(['ffmpeg'] + command)}")
-
             duration = get_video_duration(input_file, self.ffprobe_path)
-            time_pattern = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-
-            for line in iter(process.stdout.readline, ''):
-                if not line: break
-                line_strip = line.strip()
-                self.log_message.emit(line_strip)
-                match = time_pattern.search(line_strip)
-                if match and duration > 0:
-                    h, m, s, ms = map(int, match.groups())
-                    current_seconds = h * 3600 + m * 60 + s + ms / 100
-                    progress = int((current_seconds / duration) * 100)
-                    self.file_progress.emit(min(progress, 100))
-            
-            process.wait()
-            self.file_finished.emit(process.returncode)
+            result = self.runner.run([self.ffmpeg_path] + command, on_line=self.log_message.emit, duration=duration, on_percent=self.file_progress.emit)
+            self.log_message.emit(f"⏱️ {result.summary()}")
+            self.file_finished.emit(result.returncode)
             
         self.batch_finished.emit()
 
+    def _audio_extract_args(self, input_file, ext):
+        """
+        提取音频的参数：源音频编码已经是目标格式时直接复制音频流（纯封装，速度只受磁盘限制），
+        否则按目标格式重新编码。
+        """
+        audio_info, msg = get_audio_stream_info(input_file, self.ffprobe_path)
+        codec = audio_info.get('codec_name') if audio_info else None
+        if can_copy_audio(codec, ext):
+            self.log_message.emit(f"✅ 源音频编码为 {codec}，与目标格式一致，直接复制音频流，无需重新编码。")
+            # 复制时明确选择刚才检测的第一条音频流
+            return ['-map', '0:a:0', '-vn', '-c:a', 'copy']
+        if codec:
+            self.log_message.emit(f"ℹ️ 源音频编码为 {codec}，将重新编码为 {ext}。")
+        codec_map = {"aac": "aac", "mp3": "libmp3lame", "flac": "flac", "wav": "pcm_s16le", "opus": "libopus"}
+        return ['-vn', '-c:a', codec_map.get(ext, 'aac')]
+
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self._is_running = False
+        self.runner.stop()
\ No newline at end of file
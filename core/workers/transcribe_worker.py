@@ -2,10 +2,38 @@
 import os
 import time
 import re
-from PySide6.QtCore import QObject, Signal
+import json
+import threading
+from itertools import accumulate
+from core.qt_compat import QObject, Signal
 
-import torch
-import opencc
+# torch / whisper / opencc 的导入非常耗时（torch 单独就要好几秒），
+# 因此不在模块顶层导入，而是在第一次转录（或后台预热）时才加载。
+_ml_modules = None
+_ml_modules_lock = threading.Lock()
+
+def load_ml_modules():
+    """
+    按需导入语音识别所需的重型模块，只会真正导入一次。
+    :return: (torch, whisper, opencc)
+    """
+    global _ml_modules
+    with _ml_modules_lock:
+        if _ml_modules is None:
+            import torch
+            import whisper
+            import opencc
+            _ml_modules = (torch, whisper, opencc)
+    return _ml_modules
+
+def warm_up_ml_modules():
+    """在后台线程中预先导入重型模块，不阻塞界面；失败时静默忽略，等真正转录时再报告错误。"""
+    def _warm_up():
+        try:
+            load_ml_modules()
+        except Exception:
+            pass
+    threading.Thread(target=_warm_up, name="ml-warmup", daemon=True).start()
 
 def format_time(seconds, separator='.'):
     """Converts seconds to HH:MM:SS,ms format, allowing custom separator for SRT."""
@@ -22,37 +50,86 @@ def format_time_lrc(seconds):
     m, s = divmod(s, 60)
     return f"{m:02d}:{s:02d}.{ms:02d}"
 
+# 流式转录的窗口长度（秒）。每识别完一个窗口，就立即把结果追加写入输出文件，
+# 这样既能显示真实进度，程序中途崩溃时已完成的部分也不会丢失。
+WINDOW_SECONDS = 120
+# 与 Whisper 自身的 seek 相同：窗口末尾的最后一段可能被截断，丢弃后下一个窗口从最后一个完整片段的结束处开始。
+# 剩下的完整片段短于这个时长（秒）时不再丢弃，直接前进一整个窗口，保证识别始终向前推进
+MIN_WINDOW_ADVANCE = 10
+# 作为上下文提示传给下一个窗口的上文最大字数
+PROMPT_CONTEXT_CHARS = 100
+
+# 字幕切分使用的标点符号，预先编译一次
+_SENTENCE_SPLIT_RE = re.compile(r'(，|。|？|！|,|\.|\?|!)')
+
+# 词级切分时，遇到这些标点就在该词之后断句
+_SENTENCE_END_PUNCTUATION = ('，', '。', '？', '！', ',', '.', '?', '!')
+
+# 断点续传的进度文件版本号，格式变化时递增，旧文件将被忽略
+CHECKPOINT_VERSION = 1
+
 class TranscribeWorker(QObject):
     finished = Signal(bool, str)
     log_message = Signal(str)
     progress_update = Signal(int, str)
+    segment_ready = Signal(dict)
 
     def __init__(self, params):
         super().__init__()
         self.params = params
         self.whisper_result = None
-        self.converter = opencc.OpenCC('t2s')
+        self.converter = None
+        self.output_files = {}
+        self.segment_count = 0
+        self._is_running = True
+
+    def _convert_texts(self, texts):
+        """
+        批量简繁转换：把所有文本用换行符拼接成一个缓冲区，只调用一次 OpenCC。
+        OpenCC 的词组不会跨越换行符，因此结果与逐条转换完全一致。
+        """
+        if not texts:
+            return []
+        if any('\n' in text for text in texts):
+            return [self.converter.convert(text) for text in texts]
+        converted = self.converter.convert('\n'.join(texts)).split('\n')
+        if len(converted) != len(texts):
+            return [self.converter.convert(text) for text in texts]
+        return converted
+
+    @staticmethod
+    def _split_into_chunks(full_text, max_chars):
+        """按标点符号切分文本，过长的句子再按字数强制切分。"""
+        sentences = _SENTENCE_SPLIT_RE.split(full_text)
+        chunks = []
+        # re.split 带捕获组时，结果为 [句子, 标点, 句子, 标点, ..., 句子]
+        for sentence, punctuation in zip(sentences[0::2], sentences[1::2] + ['']):
+            chunk = (sentence + punctuation).strip()
+            if not chunk:
+                continue
+            if len(chunk) > max_chars:
+                chunks.extend(chunk[i:i + max_chars] for i in range(0, len(chunk), max_chars))
+            else:
+                chunks.append(chunk)
+        return chunks
 
     # 【最终版】基于时间插值的、最可靠的字幕切分函数
     def _resegment_by_interpolation(self, result, max_chars=20, max_duration=5.0):
         """
         信任Whisper的原始分段时间戳，在内部按规则切分文本，并按比例估算新时间戳。
         这是解决音画同步问题的最可靠方法。
+        所有片段的简繁转换合并为一次调用，时间戳由累计字符偏移量统一计算。
         """
         original_segments = result.get('segments', [])
+        converted_texts = self._convert_texts([segment['text'].strip() for segment in original_segments])
         new_segments = []
 
-        self.log_message.emit("ℹ️ 使用时间插值法进行字幕切分...")
-
-        for segment in original_segments:
-            full_text_raw = segment['text'].strip()
-            full_text = self.converter.convert(full_text_raw)
+        for segment, full_text in zip(original_segments, converted_texts):
             if not full_text:
                 continue
 
             start_time = segment['start']
-            end_time = segment['end']
-            duration = end_time - start_time
+            duration = segment['end'] - start_time
             
             # 如果原始片段本身就符合要求，直接添加
             if len(full_text) <= max_chars and duration <= max_duration:
@@ -60,47 +137,71 @@ class TranscribeWorker(QObject):
                 new_segments.append(segment)
                 continue
             
-            # 按标点符号进行初步切分
-            sentences = re.split(r'(，|。|？|！|,|\.|\?|!)', full_text)
-            
-            chunks = []
-            for i in range(0, len(sentences), 2):
-                chunk = sentences[i]
-                if i + 1 < len(sentences):
-                    chunk += sentences[i+1]
-                if chunk.strip():
-                    chunks.append(chunk.strip())
-
-            current_char_pos = 0
-            for text_chunk in chunks:
-                # 如果小片段依然太长，则强制按字数切分
-                if len(text_chunk) > max_chars:
-                    sub_chunks = [text_chunk[i:i+max_chars] for i in range(0, len(text_chunk), max_chars)]
-                    for sub_chunk in sub_chunks:
-                        start_char_index = current_char_pos
-                        end_char_index = current_char_pos + len(sub_chunk)
-                        
-                        # 按比例计算时间戳
-                        chunk_start = start_time + (start_char_index / len(full_text)) * duration if len(full_text) > 0 else start_time
-                        chunk_end = start_time + (end_char_index / len(full_text)) * duration if len(full_text) > 0 else end_time
-                        
-                        new_segments.append({'start': chunk_start, 'end': chunk_end, 'text': sub_chunk})
-                        current_char_pos += len(sub_chunk)
-                else:
-                    start_char_index = current_char_pos
-                    end_char_index = current_char_pos + len(text_chunk)
+            chunks = self._split_into_chunks(full_text, max_chars)
+            # 每个小片段在整段文本中的累计字符偏移量，按比例换算为时间戳
+            total_chars = len(full_text)
+            ratios = [offset / total_chars for offset in accumulate((len(chunk) for chunk in chunks), initial=0)]
+            for i, text_chunk in enumerate(chunks):
+                new_segments.append({
+                    'start': start_time + ratios[i] * duration,
+                    'end': start_time + ratios[i + 1] * duration,
+                    'text': text_chunk
+                })
 
-                    chunk_start = start_time + (start_char_index / len(full_text)) * duration if len(full_text) > 0 else start_time
-                    chunk_end = start_time + (end_char_index / len(full_text)) * duration if len(full_text) > 0 else end_time
+        return new_segments
 
-                    new_segments.append({'start': chunk_start, 'end': chunk_end, 'text': text_chunk})
-                    current_char_pos += len(text_chunk)
+    def _resegment_by_words(self, result, max_chars=20, max_duration=5.0):
+        """
+        使用Whisper的词级时间戳切分字幕：在标点处、或累计字数/时长超限时，
+        在真实的词边界上断开，每条字幕的起止时间直接取自词的时间戳，不再按字数插值。
+        没有词级时间戳的片段退回时间插值法。
+        """
+        original_segments = result.get('segments', [])
+        # 所有片段中的全部词一次性完成简繁转换
+        all_words = [word for segment in original_segments for word in segment.get('words') or []]
+        converted_words = iter(self._convert_texts([word['word'] for word in all_words]))
+        new_segments = []
+
+        for segment in original_segments:
+            words = segment.get('words') or []
+            if not words:
+                new_segments.extend(self._resegment_by_interpolation({'segments': [segment]}, max_chars, max_duration))
+                continue
+
+            current_text, current_start, current_end = "", None, None
+            for word in words:
+                word_text = next(converted_words)
+                candidate = (current_text + word_text).strip()
+                if current_text.strip() and (len(candidate) > max_chars or word['end'] - current_start > max_duration):
+                    new_segments.append({'start': current_start, 'end': current_end, 'text': current_text.strip()})
+                    current_text, current_start = "", None
+                if current_start is None:
+                    current_start = word['start']
+                current_text += word_text
+                current_end = word['end']
+                if word_text.strip().endswith(_SENTENCE_END_PUNCTUATION):
+                    new_segments.append({'start': current_start, 'end': current_end, 'text': current_text.strip()})
+                    current_text, current_start = "", None
+            if current_text.strip():
+                new_segments.append({'start': current_start, 'end': current_end, 'text': current_text.strip()})
 
         return new_segments
 
+    def _stopped_before_start(self):
+        """识别开始前收到停止请求时直接结束任务，不加载模型，也不改动已有的输出文件。"""
+        if self._is_running:
+            return False
+        self.log_message.emit("⏹️ 任务已停止。")
+        self.finished.emit(False, "任务已停止。")
+        return True
+
     def run(self):
         try:
-            import whisper
+            if self._stopped_before_start():
+                return
+            self.progress_update.emit(2, "正在加载语音识别组件...")
+            torch, whisper, opencc = load_ml_modules()
+            self.converter = opencc.OpenCC('t2s')
 
             media_file = self.params['media_file']
             model_name = self.params['model']
@@ -125,6 +226,8 @@ class TranscribeWorker(QObject):
                  self.log_message.emit("ℹ️ 已选择使用CPU进行计算。")
             
             # --- 1. Model Loading ---
+            if self._stopped_before_start():
+                return
             self.progress_update.emit(10, f"正在加载模型: {model_name} (到 {device})...")
             self.log_message.emit(f"模型下载/加载目录: {model_root}")
             os.makedirs(model_root, exist_ok=True)
@@ -132,12 +235,15 @@ class TranscribeWorker(QObject):
             self.log_message.emit("✅ 模型加载成功。")
 
             # --- 2. 设置转录参数 ---
-            # 【修改】不再请求 word_timestamps，因为它不稳定且我们不再使用它
             transcribe_options = {
                 "fp16": False,
                 "verbose": True,
                 "condition_on_previous_text": False
             }
+            # 词级时间戳会增加额外的对齐计算，仅在选择“词级时间戳”切分方式时才请求
+            use_word_timestamps = self.params.get('resegment_mode', 'interpolation') == 'word'
+            if use_word_timestamps:
+                transcribe_options['word_timestamps'] = True
             
             language_for_whisper = None
             if language_choice == 'zh-hans':
@@ -148,79 +254,261 @@ class TranscribeWorker(QObject):
             if language_for_whisper:
                 transcribe_options['language'] = language_for_whisper
 
-            simplified_chinese_prompt = "以下是普通话的简体字。"
+            base_prompt = ""
             if language_choice == 'zh-hans' or language_choice == 'auto':
-                transcribe_options['initial_prompt'] = simplified_chinese_prompt
+                base_prompt = "以下是普通话的简体字。"
                 self.log_message.emit(f"ℹ️ 已启用简体中文优先模式。")
 
-            # --- 3. Transcription ---
-            self.progress_update.emit(25, "正在识别音频 (此过程无精确进度)...")
-            self.log_message.emit("开始语音转文字，这可能需要很长时间，请耐心等待...")
-            
+            # --- 3. 流式转录：按窗口识别，每个窗口完成后立即输出 ---
+            if self._stopped_before_start():
+                return
+            self.progress_update.emit(20, "正在解码音频...")
+            audio = whisper.load_audio(media_file)
+            sample_rate = whisper.audio.SAMPLE_RATE
+            total_duration = len(audio) / sample_rate
+            if total_duration <= 0:
+                self.finished.emit(False, "无法读取有效的音频数据。")
+                return
+            self.log_message.emit(f"ℹ️ 音频时长: {format_time(total_duration)}，将按每 {WINDOW_SECONDS} 秒一个窗口进行识别。")
+
+            # --- 断点续传：读取上次未完成任务的进度 ---
+            all_segments = []
+            detected_lang = transcribe_options.get('language')
+            resume_secs = 0
+            checkpoint = self._load_checkpoint()
+            if checkpoint:
+                all_segments = checkpoint['segments']
+                resume_secs = checkpoint['next_offset']
+                if checkpoint.get('language'):
+                    detected_lang = checkpoint['language']
+                    transcribe_options['language'] = detected_lang
+                self.log_message.emit(f"♻️ 发现未完成的进度，将从 {format_time(resume_secs)} 处继续 (已完成 {len(all_segments)} 条字幕)。")
+
+            if self._stopped_before_start():
+                return
+            # 续传时用进度文件中的结果重写输出文件，丢弃上次中断时可能写了一半的窗口
+            self._open_output_files(all_segments)
+            if use_word_timestamps:
+                self.log_message.emit("ℹ️ 使用词级时间戳进行字幕切分，结果将实时写入文件。")
+            else:
+                self.log_message.emit("ℹ️ 使用时间插值法进行字幕切分，结果将实时写入文件。")
+            self.progress_update.emit(25, "开始识别音频...")
+
+            window_samples = WINDOW_SECONDS * sample_rate
             start_time = time.time()
-            result = model.transcribe(media_file, **transcribe_options)
+
+            offset = int(resume_secs * sample_rate)
+            while offset < len(audio):
+                if not self._is_running:
+                    self._close_output_files()
+                    self.log_message.emit(f"⏹️ 任务已停止，进度已保存到: {self._checkpoint_path()}")
+                    self.finished.emit(False, "任务已停止。再次使用相同的参数开始转录，即可从断点继续。")
+                    return
+
+                window = audio[offset:offset + window_samples]
+                window_start = offset / sample_rate
+                window_end = window_start + len(window) / sample_rate
+                is_last_window = offset + window_samples >= len(audio)
+
+                # 上一个窗口末尾的文字作为提示，让跨窗口的句子和用词保持连贯
+                separator = '' if detected_lang in ('zh', 'ja') else ' '
+                context = separator.join(segment['text'] for segment in all_segments)[-PROMPT_CONTEXT_CHARS:]
+                prompt = base_prompt + context
+                if prompt:
+                    transcribe_options['initial_prompt'] = prompt
+
+                result = model.transcribe(window, **transcribe_options)
+
+                # 第一个窗口检测出语言后固定下来，避免后续每个窗口重复检测
+                if 'language' not in transcribe_options and result.get('language'):
+                    detected_lang = result['language']
+                    transcribe_options['language'] = detected_lang
+                    self.log_message.emit(f"ℹ️ 检测到的语言: {detected_lang}")
+
+                for segment in result.get('segments', []):
+                    segment['start'] = window_start + segment['start']
+                    segment['end'] = min(window_start + segment['end'], window_end)
+                    for word in segment.get('words') or []:
+                        word['start'] = window_start + word['start']
+                        word['end'] = min(window_start + word['end'], window_end)
+
+                # 窗口边界很可能落在一句话中间：丢弃最后一段，下一个窗口从最后一个完整片段的结束处重新识别
+                next_start = window_end
+                segments = result.get('segments', [])
+                if not is_last_window and len(segments) > 1 and segments[-2]['end'] - window_start >= MIN_WINDOW_ADVANCE:
+                    result['segments'] = segments[:-1]
+                    next_start = segments[-2]['end']
+
+                if use_word_timestamps:
+                    new_segments = self._resegment_by_words(result, max_chars=20, max_duration=5.0)
+                else:
+                    new_segments = self._resegment_by_interpolation(result, max_chars=20, max_duration=5.0)
+                for segment in new_segments:
+                    self._append_segment(segment)
+                    self.segment_ready.emit(segment)
+                self._flush_output_files()
+                all_segments.extend(new_segments)
+                self._save_checkpoint(all_segments, next_start, detected_lang)
+                offset = int(next_start * sample_rate)
+
+                # 真实进度 = 已识别到的位置 / 总时长，剩余时间只按本次运行的识别速度估算
+                processed = next_start
+                ratio = min(processed / total_duration, 1.0)
+                session_ratio = (processed - resume_secs) / (total_duration - resume_secs)
+                elapsed = time.time() - start_time
+                eta = elapsed / session_ratio - elapsed if session_ratio > 0 else 0
+                self.progress_update.emit(
+                    25 + int(ratio * 70),
+                    f"正在识别 {format_time(processed)[:8]} / {format_time(total_duration)[:8]} (预计剩余 {format_time(eta)[:8]})"
+                )
+
             end_time = time.time()
-            
-            self.whisper_result = result
-            self.progress_update.emit(85, "识别完成！")
-            self.log_message.emit(f"✅ 识别完成！耗时: {end_time - start_time:.2f} 秒。")
-            detected_lang = result.get('language', 'unknown')
-            self.log_message.emit(f"ℹ️ 检测到的语言: {detected_lang}")
-
-            # --- 4. 调用最终版的切分函数 ---
-            self.progress_update.emit(88, "正在进行简繁转换和字幕切分...")
-            resegmented_segments = self._resegment_by_interpolation(self.whisper_result, max_chars=20, max_duration=5.0)
-            self.whisper_result['segments'] = resegmented_segments
-            self.log_message.emit("✅ 处理完成。")
-
-            # --- 5. Exporting Files ---
-            self.progress_update.emit(90, "正在导出文件...")
-            self.export_files()
-            
+            written_formats = list(self.output_files)
+            self._close_output_files()
+
+            self.whisper_result = {'segments': all_segments, 'language': detected_lang or 'unknown'}
+            self.log_message.emit(f"✅ 识别完成！耗时: {end_time - start_time:.2f} 秒，共 {len(all_segments)} 条字幕。")
+            for fmt in written_formats:
+                self.log_message.emit(f"✅ 已写入: {self._output_path(fmt)}")
+            self._remove_checkpoint()
+
             self.finished.emit(True, "语音转文字任务成功完成！")
 
         except Exception as e:
+            # 已经写入的部分保留在输出文件中，不会因为异常而丢失
+            self._close_output_files()
+            if os.path.exists(self._checkpoint_path()):
+                self.log_message.emit("ℹ️ 已完成的进度已保存，修复问题后重新开始即可从断点继续。")
             self.log_message.emit(f"❌ 发生严重错误: {str(e)}")
             import traceback
             self.log_message.emit(traceback.format_exc())
             self.finished.emit(False, f"任务失败: {e}")
             
-    def export_files(self):
+    def stop(self):
+        """请求停止任务。当前窗口识别完成并保存进度后才会真正停止。"""
+        self._is_running = False
+
+    def _checkpoint_path(self):
+        return self._output_path('transcribe.json')
+
+    def _checkpoint_key(self):
+        """用于判断进度文件是否属于当前任务：源文件、模型、语言或窗口长度任一变化都会重新开始。"""
+        media_file = self.params['media_file']
+        stat = os.stat(media_file)
+        return {
+            'version': CHECKPOINT_VERSION,
+            'media_file': os.path.abspath(media_file),
+            'media_size': stat.st_size,
+            'media_mtime': stat.st_mtime,
+            'model': self.params['model'],
+            'language_choice': self.params['language'],
+            'window_seconds': WINDOW_SECONDS,
+            'resegment_mode': self.params.get('resegment_mode', 'interpolation'),
+        }
+
+    def _load_checkpoint(self):
+        path = self._checkpoint_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') != self._checkpoint_key():
+                self.log_message.emit("ℹ️ 已有的进度文件与当前任务参数不一致，将从头开始识别。")
+                return None
+            return data
+        except Exception as e:
+            self.log_message.emit(f"⚠️ 进度文件无法读取，将从头开始识别: {e}")
+            return None
+
+    def _save_checkpoint(self, segments, next_offset, language):
+        """先写临时文件再原子替换，保证进度文件在任何时刻被中断都是完整的。"""
+        path = self._checkpoint_path()
+        data = {
+            'key': self._checkpoint_key(),
+            'next_offset': next_offset,
+            'language': language,
+            'segments': [{'start': seg['start'], 'end': seg['end'], 'text': seg['text']} for seg in segments],
+        }
+        try:
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception as e:
+            self.log_message.emit(f"⚠️ 保存进度失败: {e}")
+
+    def _remove_checkpoint(self):
+        path = self._checkpoint_path()
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _output_path(self, fmt):
         base_path = os.path.join(self.params['output_dir'], self.params['output_filename'])
-        
+        return f"{base_path}.{fmt}"
+
+    def _open_output_files(self, segments):
+        """
+        在识别开始前创建所有输出文件，并写入已完成的片段（续传时为进度文件中的结果），之后每个窗口的结果都以追加方式写入。
+        先写临时文件再原子替换，已有的输出文件在任何时刻都不会处于被清空的状态。
+        """
+        self.output_files = {}
         for fmt in self.params['export_formats']:
-            output_path = f"{base_path}.{fmt}"
-            self.log_message.emit(f"正在写入: {output_path}")
+            output_path = self._output_path(fmt)
+            self.log_message.emit(f"正在创建: {output_path}")
+            try:
+                temp_path = output_path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    if fmt == 'vtt':
+                        f.write("WEBVTT\n\n")
+                    for index, segment in enumerate(segments, start=1):
+                        self._write_segment(fmt, f, segment, index)
+                os.replace(temp_path, output_path)
+                self.output_files[fmt] = open(output_path, 'a', encoding='utf-8')
+            except Exception as e:
+                self.log_message.emit(f"❌ 创建 {fmt} 文件失败: {e}")
+        self.segment_count = len(segments)
+
+    def _write_segment(self, fmt, f, segment, index):
+        if fmt == 'txt': self._write_txt(f, segment)
+        elif fmt == 'vtt': self._write_vtt(f, segment)
+        elif fmt == 'srt': self._write_srt(f, segment, index)
+        elif fmt == 'lrc': self._write_lrc(f, segment)
+
+    def _append_segment(self, segment):
+        self.segment_count += 1
+        for fmt, f in list(self.output_files.items()):
             try:
-                if fmt == 'txt': self._write_txt(output_path)
-                elif fmt == 'vtt': self._write_vtt(output_path)
-                elif fmt == 'srt': self._write_srt(output_path)
-                elif fmt == 'lrc': self._write_lrc(output_path)
-                self.log_message.emit("✅ 写入成功。")
+                self._write_segment(fmt, f, segment, self.segment_count)
             except Exception as e:
                 self.log_message.emit(f"❌ 写入 {fmt} 文件失败: {e}")
+                f.close()
+                del self.output_files[fmt]
 
-    def _write_txt(self, path):
-        with open(path, 'w', encoding='utf-8') as f:
-            for segment in self.whisper_result['segments']:
-                start, end, text = format_time(segment['start']), format_time(segment['end']), segment['text'].strip()
-                f.write(f"[{start} --> {end}] {text}\n")
-            
-    def _write_vtt(self, path):
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write("WEBVTT\n\n")
-            for segment in self.whisper_result['segments']:
-                start, end, text = format_time(segment['start']), format_time(segment['end']), segment['text'].strip()
-                f.write(f"{start} --> {end}\n{text}\n\n")
-
-    def _write_srt(self, path):
-        with open(path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(self.whisper_result['segments'], 1):
-                start, end, text = format_time(segment['start'], separator=','), format_time(segment['end'], separator=','), segment['text'].strip()
-                f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
-
-    def _write_lrc(self, path):
-        with open(path, 'w', encoding='utf-8') as f:
-            for segment in self.whisper_result['segments']:
-                start, text = format_time_lrc(segment['start']), segment['text'].strip()
-                f.write(f"[{start}]{text}\n")
\ No newline at end of file
+    def _flush_output_files(self):
+        for f in self.output_files.values():
+            f.flush()
+
+    def _close_output_files(self):
+        for f in self.output_files.values():
+            f.close()
+        self.output_files = {}
+
+    def _write_txt(self, f, segment):
+        start, end, text = format_time(segment['start']), format_time(segment['end']), segment['text'].strip()
+        f.write(f"[{start} --> {end}] {text}\n")
+
+    def _write_vtt(self, f, segment):
+        start, end, text = format_time(segment['start']), format_time(segment['end']), segment['text'].strip()
+        f.write(f"{start} --> {end}\n{text}\n\n")
+
+    def _write_srt(self, f, segment, index):
+        start, end, text = format_time(segment['start'], separator=','), format_time(segment['end'], separator=','), segment['text'].strip()
+        f.write(f"{index}\n{start} --> {end}\n{text}\n\n")
+
+    def _write_lrc(self, f, segment):
+        start, text = format_time_lrc(segment['start']), segment['text'].strip()
+        f.write(f"[{start}]{text}\n")
@@ -1,12 +1,50 @@
 # core/workers/vbg_worker.py
-import subprocess
-import re
 import os
-from PySide6.QtCore import QObject, Signal
-import ctypes
+import hashlib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.qt_compat import QObject, Signal
 
-from core.utils import get_video_duration
-from core.codec_config import get_codec_params
+from core.utils import get_video_duration, get_audio_stream_info
+from core.codec_config import get_codec_profile, resolve_codec_name, can_copy_audio
+from core.ffmpeg_runner import FFmpegRunner
+
+# 静态背景视频的帧率，以及“静态循环模式”下预先编码的片段时长（秒）
+STILL_FRAME_RATE = 2
+STILL_SEGMENT_SECONDS = 10
+
+# 背景图中间文件和预先编码好的背景片段的缓存目录。同一张图片只预处理一次，同一张图片 + 同一编码参数只编码一次。
+STILL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "VideoEditingToolkit", "still_cache")
+# 缓存最多保留的片段数（按最近使用时间淘汰），以及中断后遗留的临时文件的清理时限（秒）
+STILL_CACHE_MAX_ENTRIES = 20
+STILL_CACHE_TEMP_MAX_AGE = 3600
+
+def prune_still_cache(max_entries=STILL_CACHE_MAX_ENTRIES):
+    """删除最久未使用的背景中间文件和片段，只保留 max_entries 个；同时清理中断任务遗留的临时文件。"""
+    try:
+        names = os.listdir(STILL_CACHE_DIR)
+    except OSError:
+        return
+    now = time.time()
+    segments = []
+    for name in names:
+        path = os.path.join(STILL_CACHE_DIR, name)
+        try:
+            mtime = os.path.getmtime(path)
+            if name.endswith(('.tmp.mp4', '.tmp.y4m')):
+                if now - mtime > STILL_CACHE_TEMP_MAX_AGE:
+                    os.remove(path)
+            elif name.endswith(('.mp4', '.y4m')):
+                segments.append((mtime, path))
+        except OSError:
+            pass  # 其他任务正在替换或删除同一个文件
+    for _, path in sorted(segments, reverse=True)[max_entries:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
 class VideoFromBgWorker(QObject):
     """
@@ -16,6 +54,7 @@ class VideoFromBgWorker(QObject):
     - 为CPU和N卡编码器分别应用针对静态图像的深度优化。
     - 使用安全的低帧率(2fps)，实现极致压缩与良好兼容性。
     - 精确控制输出时长，与音频源完全一致。
+    - 【静态循环模式】背景只编码一小段，之后循环复制，耗时几乎与音频时长无关。
     - 【修正】移除不稳定的输入端硬件加速，确保兼容任意图片格式。
     """
     finished = Signal(int, str)
@@ -28,6 +67,7 @@ class VideoFromBgWorker(QObject):
         self.ffprobe_path = ffprobe_path
         self.params = params
         self._is_running = True
+        self.runner = FFmpegRunner(params.get('threads'), params.get('niceness'))
 
     def run(self):
         try:
@@ -36,10 +76,9 @@ class VideoFromBgWorker(QObject):
             output_dir = self.params['output_dir']
             ext = self.params['format']
             codec_name = self.params.get('codec_name', 'CPU x264 (高兼容)')
-            
-            base_name, _ = os.path.splitext(os.path.basename(audio_source))
-            output_file = os.path.join(output_dir, f"{base_name}_with_bg.{ext}").replace("\\", "/")
-            
+
+            output_file = self._output_path(audio_source, output_dir, ext)
+
             self.log_message.emit("正在精确检测音频时长...")
             duration_secs = get_video_duration(audio_source, self.ffprobe_path)
             if duration_secs <= 0:
@@ -47,61 +86,285 @@ class VideoFromBgWorker(QObject):
                 return
             self.log_message.emit(f"✅ 精确时长为: {duration_secs} 秒")
 
-            # 【最终修复】构建最稳定、兼容的FFmpeg命令
-            command = [
-                '-hide_banner', 
-                '-framerate', '2',     # 使用2fps低帧率
-                '-loop', '1',          # 让背景图循环
-                '-i', bg_image,        # 输入1: 图片 (使用默认软件解码器，兼容所有格式)
-                '-i', audio_source,    # 输入2: 音频
-                # 滤镜链：先裁剪为偶数分辨率，再转为标准像素格式
-                '-vf', 'crop=floor(iw/2)*2:floor(ih/2)*2,format=yuvj420p',
-            ]
-            
-            if "CPU" in codec_name:
-                command.extend(get_codec_params(codec_name))
-                command.extend(['-tune', 'stillimage', '-threads', '0'])
-            elif "N卡" in codec_name:
-                base_params = get_codec_params(codec_name)
-                command.extend(base_params)
-                command.extend(['-preset', 'p1', '-rc', 'constqp', '-bf', '0'])
+            audio_args = self._audio_codec_args(audio_source, ext)
+
+            still_frame = self._prepare_still_frame(bg_image)
+            if not still_frame:
+                self.finished.emit(-1, "背景图片预处理失败，请检查日志。")
+                return
+            if self.params.get('loop_still', True):
+                segment_path = self._prepare_still_segment(bg_image, still_frame, codec_name)
+                if not segment_path:
+                    self.finished.emit(-1, "背景图片编码失败，请检查日志。")
+                    return
+                self.log_message.emit("正在与音频混流...")
+                command = self._build_looped_command(segment_path, audio_source, audio_args, duration_secs, output_file)
             else:
-                 command.extend(get_codec_params(codec_name))
-
-            command.extend(['-c:a', 'aac', '-b:a', '192k'])
-            command.extend([
-                '-t', str(duration_secs),
-                '-shortest',
-                '-y', output_file
-            ])
-            
-            self.log_message.emit(f"🚀 执行命令: {' '.join(['ffmpeg'] + command)}")
-            process = subprocess.Popen([self.ffmpeg_path] + command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1, encoding='utf-8', errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
-            
-            duration = duration_secs
-            time_pattern = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-            
-            for line in iter(process.stdout.readline, ''):
-                if not self._is_running:
-                    process.terminate()
-                    break
-                if not line: break
-                line_strip = line.strip()
-                self.log_message.emit(line_strip)
-                match = time_pattern.search(line_strip)
-                if match and duration > 0:
-                    h, m, s, ms = map(int, match.groups())
-                    current_seconds = h * 3600 + m * 60 + s + ms / 100
-                    progress = int((current_seconds / duration) * 100)
-                    self.progress.emit(min(progress, 100))
-
-            process.wait()
-            
-            return_code = ctypes.c_int32(process.returncode).value
+                command = self._build_full_encode_command(still_frame, audio_source, codec_name, audio_args, duration_secs, output_file)
+            return_code = self._run_ffmpeg(command, duration_secs)
             self.finished.emit(return_code, "处理完成！")
-            
+
         except Exception as e:
             self.finished.emit(-1, f"发生严重错误: {e}")
 
+    @staticmethod
+    def _output_path(audio_source, output_dir, ext):
+        base_name, _ = os.path.splitext(os.path.basename(audio_source))
+        return os.path.join(output_dir, f"{base_name}_with_bg.{ext}").replace("\\", "/")
+
+    def _audio_codec_args(self, audio_source, ext):
+        """源音频编码已被目标格式支持时直接复制，否则转码为 AAC。"""
+        audio_info, msg = get_audio_stream_info(audio_source, self.ffprobe_path)
+        codec = audio_info.get('codec_name') if audio_info else None
+        name = os.path.basename(audio_source)
+        if can_copy_audio(codec, ext):
+            self.log_message.emit(f"✅ [{name}] 源音频编码为 {codec}，{ext} 格式可直接使用，音频将直接复制 (不重新编码)。")
+            return ['-c:a', 'copy']
+        if codec:
+            self.log_message.emit(f"ℹ️ [{name}] 源音频编码为 {codec}，{ext} 格式不支持直接复制，将转码为 AAC。")
+        else:
+            self.log_message.emit(f"⚠️ [{name}] 无法检测源音频编码 ({msg})，将转码为 AAC。")
+        return ['-c:a', 'aac', '-b:a', '192k']
+
+    def _video_codec_args(self, codec_name):
+        """根据编码器类型，附加针对静态图像的优化参数。"""
+        # 按实际使用的预设（编码器不可用时为回退后的 CPU 预设）决定附加参数
+        profile = get_codec_profile(codec_name)
+        args = list(profile['params'])
+        if profile['hardware'] == 'nvenc':
+            args.extend(['-preset', 'p1', '-rc', 'constqp', '-bf', '0'])
+        elif profile['encoder'] == 'libx264':
+            # -tune 只有 x264 支持，预设自带 -tune 时保留预设的调优
+            if '-tune' not in args:
+                args.extend(['-tune', 'stillimage'])
+            if '-threads' not in args:
+                args.extend(['-threads', '0'])
+        return args
+
+    def _run_ffmpeg(self, command, duration, on_seconds=None, quiet=False):
+        """
+        执行 FFmpeg 并按输出时间汇报进度，返回规范化后的退出码。
+        :param on_seconds: 可选回调，传入当前输出时间（秒），替代默认的进度信号
+        :param quiet: 为 True 时不逐行输出日志，仅在失败时输出最后几行（用于并发任务）
+        """
+        if not quiet:
+            self.log_message.emit(f"🚀 执行命令: {' '.join(['ffmpeg'] + command)}")
+        result = self.runner.run(
+            [self.ffmpeg_path] + command,
+            on_line=None if quiet else self.log_message.emit,
+            on_seconds=on_seconds,
+            duration=0 if on_seconds else duration,
+            on_percent=self.progress.emit
+        )
+        if quiet and result.returncode != 0 and not result.cancelled:
+            self.log_message.emit("\n".join(result.tail[-10:]))
+        if not result.cancelled and not quiet:
+            self.log_message.emit(f"⏱️ {result.summary()}")
+        return result.returncode
+
+    def _cache_path(self, key_source, ext):
+        cache_key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+        os.makedirs(STILL_CACHE_DIR, exist_ok=True)
+        path = os.path.join(STILL_CACHE_DIR, f"{cache_key}.{ext}").replace("\\", "/")
+        # 先写入临时文件再改名，避免并发任务读到写了一半的文件
+        temp_path = os.path.join(STILL_CACHE_DIR, f"{cache_key}.{os.getpid()}.{threading.get_ident()}.tmp.{ext}").replace("\\", "/")
+        return path, temp_path
+
+    @staticmethod
+    def _touch_cached(path):
+        """缓存命中时记录最近使用时间，清理缓存时优先保留。"""
+        if not os.path.exists(path):
+            return False
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True
+
+    def _finish_cached(self, return_code, temp_path, path):
+        """临时文件生成成功时改名为正式的缓存文件并清理旧缓存，返回缓存路径；失败时返回 None。"""
+        if return_code != 0 or not os.path.exists(temp_path):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        os.replace(temp_path, path)
+        prune_still_cache()
+        return path
+
+    def _prepare_still_frame(self, bg_image):
+        """
+        把背景图裁剪为偶数分辨率、转换为 yuvj420p，保存为只有一帧的 Y4M 中间文件（帧率为 STILL_FRAME_RATE）。
+        之后的编码用 -stream_loop 循环读取这一帧，不再每帧重新解码、裁剪和转换原图。结果按图片缓存。
+        :return: 中间文件路径；失败时返回 None
+        """
+        stat = os.stat(bg_image)
+        frame_path, temp_path = self._cache_path(f"{os.path.abspath(bg_image)}|{stat.st_size}|{stat.st_mtime}|{STILL_FRAME_RATE}", 'y4m')
+        if self._touch_cached(frame_path):
+            return frame_path
+        self.log_message.emit("正在预处理背景图片 (只需处理一次)...")
+        command = [
+            '-hide_banner',
+            '-i', bg_image,
+            # 滤镜链：先裁剪为偶数分辨率，再转为标准像素格式
+            '-vf', 'crop=floor(iw/2)*2:floor(ih/2)*2,format=yuvj420p',
+            '-frames:v', '1', '-r', str(STILL_FRAME_RATE),
+            '-an', '-y', temp_path
+        ]
+        return self._finish_cached(self._run_ffmpeg(command, 0, quiet=True), temp_path, frame_path)
+
+    def _prepare_still_segment(self, bg_image, still_frame, codec_name):
+        """
+        把背景图只编码一次，生成一段短视频：整段只有一个 GOP，开头就是关键帧，
+        因此可以被无缝地循环复制。结果按 (图片, 实际使用的编码参数) 缓存，批量任务和重复任务直接复用。
+        :return: 片段路径；编码失败时返回 None
+        """
+        stat = os.stat(bg_image)
+        # 按实际使用的预设和参数生成缓存键：N卡 不可用时回退到 CPU 编码的片段，不会在 N卡 可用后被误用（反之亦然）
+        video_args = self._video_codec_args(codec_name)
+        key_source = (f"{os.path.abspath(bg_image)}|{stat.st_size}|{stat.st_mtime}|{resolve_codec_name(codec_name)}|"
+                      f"{' '.join(video_args)}|{STILL_FRAME_RATE}|{STILL_SEGMENT_SECONDS}")
+        segment_path, temp_path = self._cache_path(key_source, 'mp4')
+        if self._touch_cached(segment_path):
+            self.log_message.emit("✅ 使用已缓存的背景图片片段。")
+            return segment_path
+
+        self.log_message.emit("正在编码背景图片片段 (只需编码一次)...")
+        frame_count = STILL_SEGMENT_SECONDS * STILL_FRAME_RATE
+        command = ['-hide_banner', '-stream_loop', '-1', '-i', still_frame]
+        command.extend(video_args)
+        command.extend(['-g', str(frame_count), '-frames:v', str(frame_count), '-an', '-y', temp_path])
+        segment_path = self._finish_cached(self._run_ffmpeg(command, 0), temp_path, segment_path)
+        if segment_path:
+            self.log_message.emit("✅ 背景片段编码完成。")
+        return segment_path
+
+    @staticmethod
+    def _build_looped_command(segment_path, audio_source, audio_args, duration_secs, output_file):
+        """
+        【静态循环模式】用 -stream_loop 无限循环预先编码好的背景片段并直接复制视频流，
+        与音频混流到目标时长。几小时的音频也只需编码 STILL_SEGMENT_SECONDS 秒的画面。
+        """
+        return [
+            '-hide_banner',
+            '-stream_loop', '-1',     # 无限循环背景片段
+            '-i', segment_path,       # 输入1: 预先编码好的背景片段
+            '-i', audio_source,       # 输入2: 音频
+            '-map', '0:v:0', '-map', '1:a:0',
+            '-c:v', 'copy',           # 视频流直接复制，不再编码
+            *audio_args,
+            '-t', str(duration_secs),
+            '-shortest',
+            '-y', output_file
+        ]
+
+    def _build_full_encode_command(self, still_frame, audio_source, codec_name, audio_args, duration_secs, output_file):
+        """逐帧编码整段时长的画面（兼容模式）。still_frame 为 _prepare_still_frame 生成的中间文件。"""
+        command = [
+            '-hide_banner',
+            '-stream_loop', '-1',  # 循环读取已裁剪、转换好的背景帧 (2fps)
+            '-i', still_frame,     # 输入1: 背景帧
+            '-i', audio_source,    # 输入2: 音频
+        ]
+        command.extend(self._video_codec_args(codec_name))
+        command.extend(audio_args)
+        command.extend([
+            '-t', str(duration_secs),
+            '-shortest',
+            '-y', output_file
+        ])
+        return command
+
     def stop(self):
-        self._is_running = False
\ No newline at end of file
+        self._is_running = False
+        self.runner.stop()
+
+class BatchVideoFromBgWorker(VideoFromBgWorker):
+    """
+    批量模式：一张背景图 + 多个音频文件。
+    背景图只预处理（裁剪、像素格式转换、编码为循环片段）一次，
+    之后通过并发任务池为每个音频生成视频，并汇报按时长加权的总进度。
+    并发数 max_workers 由任务调度器按资源类别的并发上限分配（见 JobScheduler.submit 的 slots）。
+    """
+    file_finished = Signal(str, int)
+
+    def __init__(self, ffmpeg_path, ffprobe_path, params):
+        super().__init__(ffmpeg_path, ffprobe_path, params)
+        self.max_workers = max(1, params.get('max_workers', 2))
+
+    def run(self):
+        try:
+            audio_sources = self.params['audio_sources']
+            bg_image = self.params['bg_image']
+            output_dir = self.params['output_dir']
+            ext = self.params['format']
+            codec_name = self.params.get('codec_name', 'CPU x264 (高兼容)')
+            loop_still = self.params.get('loop_still', True)
+            max_workers = self.max_workers
+
+            if not audio_sources:
+                self.finished.emit(-1, "没有需要处理的音频文件。")
+                return
+
+            self.log_message.emit(f"▶️ 批量任务开始：共 {len(audio_sources)} 个音频文件，并发数 {max_workers}。")
+            self.log_message.emit("正在检测所有音频的时长...")
+            with ThreadPoolExecutor(max_workers=min(8, len(audio_sources))) as executor:
+                durations = list(executor.map(lambda path: get_video_duration(path, self.ffprobe_path), audio_sources))
+            total_duration = sum(d for d in durations if d > 0)
+
+            still_frame = self._prepare_still_frame(bg_image)
+            if not still_frame:
+                self.finished.emit(-1, "背景图片预处理失败，请检查日志。")
+                return
+            segment_path = None
+            if loop_still:
+                segment_path = self._prepare_still_segment(bg_image, still_frame, codec_name)
+                if not segment_path:
+                    self.finished.emit(-1, "背景图片编码失败，请检查日志。")
+                    return
+
+            done_seconds = [0.0] * len(audio_sources)
+            progress_lock = threading.Lock()
+
+            def report(index, seconds):
+                with progress_lock:
+                    done_seconds[index] = min(seconds, durations[index])
+                    if total_duration > 0:
+                        self.progress.emit(min(int(sum(done_seconds) / total_duration * 100), 100))
+
+            def process_one(index):
+                audio_source = audio_sources[index]
+                name = os.path.basename(audio_source)
+                duration_secs = durations[index]
+                if duration_secs <= 0:
+                    self.log_message.emit(f"❌ [{name}] 无法获取有效的音频时长，已跳过。")
+                    self.file_finished.emit(audio_source, -1)
+                    return -1
+                output_file = self._output_path(audio_source, output_dir, ext)
+                audio_args = self._audio_codec_args(audio_source, ext)
+                if segment_path:
+                    command = self._build_looped_command(segment_path, audio_source, audio_args, duration_secs, output_file)
+                else:
+                    command = self._build_full_encode_command(still_frame, audio_source, codec_name, audio_args, duration_secs, output_file)
+                self.log_message.emit(f"🚀 [{name}] 开始处理...")
+                return_code = self._run_ffmpeg(command, duration_secs, on_seconds=lambda secs: report(index, secs), quiet=True)
+                if return_code == 0:
+                    report(index, duration_secs)
+                    self.log_message.emit(f"✅ [{name}] 完成: {output_file}")
+                else:
+                    self.log_message.emit(f"❌ [{name}] 失败 (错误码: {return_code})")
+                self.file_finished.emit(audio_source, return_code)
+                return return_code
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return_codes = list(executor.map(process_one, range(len(audio_sources))))
+
+            failed = sum(1 for code in return_codes if code != 0)
+            if not self._is_running:
+                self.finished.emit(-1, "批量任务已停止。")
+            elif failed:
+                self.finished.emit(1, f"批量处理完成，其中 {failed} 个文件失败，请查看日志。")
+            else:
+                self.finished.emit(0, f"批量处理完成，共生成 {len(audio_sources)} 个视频！")
+
+        except Exception as e:
+            self.finished.emit(-1, f"发生严重错误: {e}")
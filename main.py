@@ -11,8 +11,9 @@ sys.path.insert(0, project_root)
 
 
 from PySide6.QtWidgets import QApplication, QMessageBox
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from core.utils import find_executable
+from core.workers.transcribe_worker import warm_up_ml_modules
 from ui.main_window import MainWindow
 
 def get_app_paths():
@@ -87,4 +88,8 @@ if __name__ == '__main__':
     # 只有在找到FFmpeg后，才继续创建和显示主窗口
     window = MainWindow(paths=app_paths)
     window.show()
+    # 窗口显示之后在后台检测可用的编码器，完成后刷新各标签页的编码器下拉框；不可用的 N卡 预设自动回退到 CPU 编码
+    window.start_encoder_detection()
+    # 窗口显示之后，再在后台预热 torch/whisper 等重型模块，启动不再被它们拖慢
+    QTimer.singleShot(1000, warm_up_ml_modules)
     sys.exit(app.exec())
\ No newline at end of file
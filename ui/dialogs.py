@@ -5,7 +5,7 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
                                QLineEdit, QGridLayout, QRubberBand)
 from PySide6.QtCore import Qt, QRect, QPoint, QSize
-from PySide6.QtGui import QPixmap, QPainter, QColor, QBrush, QPen
+from PySide6.QtGui import QPixmap, QImage, QPainter, QColor, QBrush, QPen
 
 class ImageCropDialog(QDialog):
     """
@@ -126,14 +126,18 @@ class ClipDialog(QDialog):
 class PreviewDialog(QDialog):
     """
     一个用于显示预览图的对话框。
-    支持鼠标滚轮缩放图片。
+    支持鼠标滚轮缩放图片。image 可以是图片路径，也可以是内存中的 QImage。
     """
-    def __init__(self, image_path, parent=None):
+    def __init__(self, image, parent=None):
         super().__init__(parent)
         self.setWindowTitle("效果预览 (滚动滚轮缩放)")
-        self.original_pixmap = QPixmap(image_path)
+        if isinstance(image, QImage):
+            self.original_pixmap = QPixmap.fromImage(image)
+        else:
+            self.original_pixmap = QPixmap(image)
         if self.original_pixmap.isNull():
-            self.label = QLabel(f"错误：无法加载预览图片！\n路径: {image_path}", self)
+            source = "内存图像" if isinstance(image, QImage) else image
+            self.label = QLabel(f"错误：无法加载预览图片！\n路径: {source}", self)
             layout = QVBoxLayout()
             layout.addWidget(self.label)
             self.setLayout(layout)
@@ -0,0 +1,132 @@
+# ui/jobs_panel.py
+# 文件作用：任务列表面板，显示全局调度器中所有任务的状态，
+# 并可调整各资源类别的并发上限、取消任务或提高排队任务的优先级。
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSpinBox,
+                               QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QGroupBox)
+from PySide6.QtCore import Qt, QTimer, Slot
+
+from core.job_scheduler import (RESOURCE_CLASSES, PRIORITY_NAMES, PRIORITY_HIGH, JOB_STATE_NAMES,
+                                JOB_QUEUED, JOB_RUNNING)
+
+class JobsPanel(QWidget):
+    """全局任务列表。每行对应一个任务，运行中的任务每秒刷新一次耗时。"""
+    COLUMNS = ["任务", "资源", "优先级", "状态", "耗时"]
+
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.rows = {}  # job.id -> (job, 行号)
+
+        self.create_widgets()
+        self.create_layouts()
+        self.create_connections()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh_running)
+        self.refresh_timer.start()
+
+    def create_widgets(self):
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        self.cancel_button = QPushButton("取消任务")
+        self.raise_button = QPushButton("优先执行")
+        self.raise_button.setToolTip("把排队中的任务设为高优先级，在同类任务中最先启动。")
+        self.clear_button = QPushButton("清除已结束")
+
+        self.limit_spins = {}
+        for name, (label, _) in RESOURCE_CLASSES.items():
+            spin = QSpinBox()
+            spin.setRange(1, 16)
+            spin.setValue(self.scheduler.limits[name])
+            spin.setToolTip(f"“{label}”类任务同时运行的最大数量。")
+            self.limit_spins[name] = spin
+
+    def create_layouts(self):
+        limits_group = QGroupBox("并发上限")
+        limits_layout = QHBoxLayout(limits_group)
+        for name, (label, _) in RESOURCE_CLASSES.items():
+            limits_layout.addWidget(QLabel(label))
+            limits_layout.addWidget(self.limit_spins[name])
+        limits_layout.addStretch()
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.raise_button)
+        button_layout.addStretch()
+        button_layout.addWidget(self.clear_button)
+
+        main_layout = QVBoxLayout(self)
+        main_layout.addWidget(limits_group)
+        main_layout.addWidget(self.table)
+        main_layout.addLayout(button_layout)
+
+    def create_connections(self):
+        self.scheduler.job_added.connect(self.on_job_added)
+        self.scheduler.job_changed.connect(self.on_job_changed)
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        self.raise_button.clicked.connect(self.raise_selected)
+        self.clear_button.clicked.connect(self.clear_finished)
+        for name, spin in self.limit_spins.items():
+            spin.valueChanged.connect(lambda value, name=name: self.scheduler.set_limit(name, value))
+
+    @Slot(object)
+    def on_job_added(self, job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.rows[job.id] = (job, row)
+        self.table.setItem(row, 0, QTableWidgetItem(job.title))
+        self.table.setItem(row, 1, QTableWidgetItem(RESOURCE_CLASSES[job.resource][0]))
+        for column in range(2, len(self.COLUMNS)):
+            self.table.setItem(row, column, QTableWidgetItem(""))
+        self.update_row(job)
+
+    @Slot(object)
+    def on_job_changed(self, job):
+        if job.id in self.rows:
+            self.update_row(job)
+
+    def update_row(self, job):
+        _, row = self.rows[job.id]
+        self.table.item(row, 2).setText(PRIORITY_NAMES.get(job.priority, ""))
+        self.table.item(row, 3).setText(JOB_STATE_NAMES.get(job.state, job.state))
+        elapsed = job.elapsed()
+        self.table.item(row, 4).setText(f"{int(elapsed // 60):02d}:{int(elapsed % 60):02d}" if job.started_at else "")
+
+    def refresh_running(self):
+        for job, _ in self.rows.values():
+            if job.state == JOB_RUNNING:
+                self.update_row(job)
+
+    def selected_job(self):
+        row = self.table.currentRow()
+        for job, job_row in self.rows.values():
+            if job_row == row:
+                return job
+        return None
+
+    def cancel_selected(self):
+        job = self.selected_job()
+        if job:
+            self.scheduler.cancel(job)
+
+    def raise_selected(self):
+        job = self.selected_job()
+        if job and job.state == JOB_QUEUED:
+            self.scheduler.set_priority(job, PRIORITY_HIGH)
+
+    def clear_finished(self):
+        self.scheduler.clear_finished()
+        remaining = [job for job, _ in sorted(self.rows.values(), key=lambda item: item[1])
+                     if job.state in (JOB_QUEUED, JOB_RUNNING)]
+        self.table.setRowCount(0)
+        self.rows = {}
+        for job in remaining:
+            self.on_job_added(job)
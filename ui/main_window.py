@@ -1,9 +1,9 @@
 # ui/main_window.py
 import os
 import sys
-from PySide6.QtWidgets import (QMainWindow, QTabWidget, QFileDialog, QApplication, QPushButton)
+from PySide6.QtWidgets import (QMainWindow, QTabWidget, QFileDialog, QApplication, QPushButton, QDockWidget)
 from PySide6.QtGui import QIcon, QPalette, QColor
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread
 
 # 导入每个功能选项卡的UI类
 from ui.tabs.subtitle_tab import SubtitleTab
@@ -15,6 +15,33 @@ from ui.tabs.horizontal_tab import HorizontalTab
 from ui.tabs.frame_export_tab import FrameExportTab
 from ui.tabs.merge_tab import MergeTab
 from ui.tabs.transcribe_tab import TranscribeTab
+from ui.jobs_panel import JobsPanel
+from core.job_scheduler import JobScheduler, JOB_QUEUED, JOB_RUNNING
+from core.codec_config import (get_encoder_options, get_copy_tooltip, resolve_codec_name,
+                               ENCODER_DETECTION_FAILED_MESSAGE)
+from core.workers.encoder_probe_worker import EncoderProbeWorker
+
+# 编码器检测线程在程序退出时的最长等待时间（毫秒）
+ENCODER_PROBE_WAIT_MS = 3000
+
+def refresh_encoder_combo(combo):
+    """
+    按当前的编码器检测结果重新填充编码器下拉框：保留原有选择（不可用时换成回退后的 CPU 预设），
+    以及“直接复制”选项的提示和启用状态。
+    """
+    copy_name = "直接复制 (无损/极速)"
+    current = combo.currentText()
+    copy_index = combo.findText(copy_name)
+    copy_enabled = copy_index == -1 or combo.model().item(copy_index).isEnabled()
+
+    encoder_options = get_encoder_options()
+    combo.clear()
+    combo.addItems(encoder_options)
+    if copy_name in encoder_options:
+        copy_index = encoder_options.index(copy_name)
+        combo.setItemData(copy_index, get_copy_tooltip(), Qt.ToolTipRole)
+        combo.model().item(copy_index).setEnabled(copy_enabled)
+    combo.setCurrentText(current if current in encoder_options else resolve_codec_name(current))
 
 class MainWindow(QMainWindow):
     # 【最终修复】__init__ 方法现在接收一个 'paths' 字典作为参数
@@ -27,9 +54,10 @@ class MainWindow(QMainWindow):
         self.ffprobe_path = paths['ffprobe']
 
         # --- 状态和实例变量 ---
-        self.thread = None
-        self.worker = None
         self.is_dark_mode = True  # 默认使用深色主题
+        # 全局任务调度器：各标签页把 Worker 提交到这里，按资源类别排队和限制并发
+        self.scheduler = JobScheduler(self)
+        self.encoder_probe_thread = None
 
         # --- 窗口基本设置 ---
         self.setWindowTitle("Video Editing Toolkit - v1.1.1")
@@ -79,10 +107,18 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(frame_export_tab, "🖼️ 静帧导出")
         self.tabs.addTab(vbg_tab_widget, "🎨 视频换背景")
 
+        # 编码器检测完成后需要刷新的下拉框
+        self.encoder_combos = [
+            canvas_tab_widget.codec_combo, horizontal_tab_widget.codec_combo,
+            subtitle_tab_widget.sub_codec_combo, transcode_tab_widget.batch_codec_combo,
+            clip_tab_widget.clip_codec_combo, vbg_tab_widget.vbg_codec_combo,
+        ]
+
         # 设置标签页图标（如果存在）
         self.setup_tab_icons()
 
-        # 添加主题切换按钮
+        # 任务列表面板和主题切换按钮
+        self.add_jobs_panel()
         self.add_theme_toggle_button()
 
     def setup_styles(self):
@@ -234,6 +270,64 @@ class MainWindow(QMainWindow):
         # 将按钮添加到状态栏的永久部件区域，它会自动靠右显示
         self.statusBar().addPermanentWidget(self.theme_toggle_button)
 
+    def add_jobs_panel(self):
+        """
+        添加任务列表停靠面板（默认隐藏），并在状态栏放置显示/隐藏按钮，按钮上显示运行中和排队中的任务数。
+        """
+        self.jobs_panel = JobsPanel(self.scheduler)
+        self.jobs_dock = QDockWidget("任务列表", self)
+        self.jobs_dock.setWidget(self.jobs_panel)
+        self.jobs_dock.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.jobs_dock)
+        self.jobs_dock.hide()
+
+        self.jobs_toggle_button = QPushButton()
+        self.jobs_toggle_button.setObjectName("themeToggle")
+        self.jobs_toggle_button.clicked.connect(lambda: self.jobs_dock.setVisible(not self.jobs_dock.isVisible()))
+        self.statusBar().addPermanentWidget(self.jobs_toggle_button)
+        self.scheduler.job_added.connect(self.update_jobs_button)
+        self.scheduler.job_changed.connect(self.update_jobs_button)
+        self.update_jobs_button()
+
+    def update_jobs_button(self, *_):
+        running = sum(1 for job in self.scheduler.jobs if job.state == JOB_RUNNING)
+        queued = sum(1 for job in self.scheduler.jobs if job.state == JOB_QUEUED)
+        self.jobs_toggle_button.setText(f"📋 任务列表 (运行 {running} / 排队 {queued})")
+
+    def start_encoder_detection(self):
+        """
+        在后台线程中检测本机 FFmpeg 实际可用的编码器（结果有磁盘缓存，只有首次启动或更换 FFmpeg 后才会真正测试），
+        完成后各标签页的编码器下拉框只列出可用的预设。
+        """
+        self.encoder_probe_thread = QThread()
+        self.encoder_probe_worker = EncoderProbeWorker(self.ffmpeg_path)
+        self.encoder_probe_worker.moveToThread(self.encoder_probe_thread)
+        self.encoder_probe_thread.started.connect(self.encoder_probe_worker.run)
+        self.encoder_probe_worker.finished.connect(self.on_encoders_detected)
+        self.encoder_probe_worker.finished.connect(self.encoder_probe_thread.quit)
+        self.encoder_probe_worker.finished.connect(self.encoder_probe_worker.deleteLater)
+        self.encoder_probe_thread.finished.connect(self.on_encoder_probe_thread_finished)
+        self.encoder_probe_thread.start()
+
+    def on_encoders_detected(self, failed):
+        for combo in self.encoder_combos:
+            refresh_encoder_combo(combo)
+        if failed:
+            self.statusBar().showMessage(ENCODER_DETECTION_FAILED_MESSAGE)
+
+    def on_encoder_probe_thread_finished(self):
+        thread = self.encoder_probe_thread
+        self.encoder_probe_thread = None
+        self.encoder_probe_worker = None
+        thread.deleteLater()
+
+    def closeEvent(self, event):
+        # 退出前停止所有任务，避免 FFmpeg 进程在窗口关闭后继续运行
+        self.scheduler.stop_all()
+        if self.encoder_probe_thread is not None:
+            self.encoder_probe_thread.wait(ENCODER_PROBE_WAIT_MS)
+        super().closeEvent(event)
+
     def setup_tab_icons(self):
         """
         为标签页设置图标
@@ -5,19 +5,19 @@ import re
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
                                QTextEdit, QMessageBox, QFrame, QTableWidget, QTableWidgetItem,
                                QHeaderView, QAbstractItemView, QComboBox)
-from PySide6.QtCore import QThread, Slot, Qt
+from PySide6.QtCore import Slot, Qt
 
-from core.workers.clip_worker import BatchClipWorker
+from core.workers.clip_worker import BatchClipWorker, finalize_clips
 from ui.dialogs import ClipDialog
 # 【新增】导入统一编码器配置模块
 from core.codec_config import get_encoder_options, get_copy_tooltip
+from core.job_scheduler import encode_resource
 
 class ClipTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
 
-        self.thread = None
         self.worker = None
 
         self.create_widgets()
@@ -206,18 +206,12 @@ class ClipTab(QWidget):
         self.set_controls_enabled(False)
         self.clip_log_output.clear()
 
-        self.thread = QThread()
         self.worker = BatchClipWorker(self.main_window.ffmpeg_path, source_video, clip_list, options)
-        self.worker.moveToThread(self.thread)
         self.worker.clip_started.connect(self.clip_progress_label.setText)
         self.worker.log_message.connect(self.clip_log_output.append)
         self.worker.clip_finished.connect(self.on_clip_file_finished)
         self.worker.batch_finished.connect(self.on_clip_all_finished)
-        self.worker.batch_finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, f"批量剪辑: {os.path.basename(source_video)}", encode_resource(options['codec_name']), done_signal='batch_finished')
 
     @Slot(int, str)
     def on_clip_file_finished(self, return_code, temp_filepath):
@@ -229,35 +223,9 @@ class ClipTab(QWidget):
     @Slot()
     def on_clip_all_finished(self):
         self.clip_log_output.append("\n--- 所有片段裁剪完成，开始重命名并生成记录... ---")
-        output_dir = self.worker.options['output_dir']
-        ext = self.worker.options['format']
-        clip_list = self.worker.clip_list
-        
-        for i, clip_info in enumerate(clip_list):
-            temp_filename = f"{i+1:03d}.{ext}"
-            temp_filepath = os.path.join(output_dir, temp_filename)
-            safe_name = re.sub(r'[\\/*?:"<>|]', "_", clip_info['name'])
-            final_filename = f"{safe_name}.{ext}"
-            final_filepath = os.path.join(output_dir, final_filename)
-            if os.path.exists(temp_filepath):
-                try:
-                    os.rename(temp_filepath, final_filepath)
-                    self.clip_log_output.append(f"重命名: {temp_filename} -> {final_filename}")
-                except OSError as e:
-                    self.clip_log_output.append(f"❌ 重命名失败: {e}")
-
-        record_file_path = os.path.join(output_dir, "_clip_record.txt")
-        try:
-            with open(record_file_path, 'w', encoding='utf-8') as f:
-                f.write("--- 批量裁剪记录 ---\n")
-                f.write(f"源文件: {self.worker.source_video}\n\n")
-                for clip in clip_list:
-                    f.write(f"名称: {clip['name']}\n")
-                    f.write(f"开始: {clip['start']}\n")
-                    f.write(f"结束: {clip['end']}\n\n")
-            self.clip_log_output.append(f"✅ 裁剪记录已保存到: {record_file_path}")
-        except IOError as e:
-            self.clip_log_output.append(f"❌ 保存记录文件失败: {e}")
+        for message in finalize_clips(self.worker.source_video, self.worker.clip_list,
+                                      self.worker.options['output_dir'], self.worker.options['format']):
+            self.clip_log_output.append(message)
 
         self.set_controls_enabled(True)
         self.clip_progress_label.setText("所有任务已完成！")
@@ -1,13 +1,17 @@
 # ui/tabs/frame_export_tab.py
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-                               QSlider, QFrame, QApplication, QFileDialog, QMessageBox, QStyle)
-from PySide6.QtCore import Qt, QUrl, QThread, Slot
+                               QSlider, QFrame, QApplication, QFileDialog, QMessageBox, QStyle,
+                               QComboBox, QLineEdit, QDoubleSpinBox, QSpinBox, QCheckBox, QProgressBar)
+from PySide6.QtCore import Qt, QUrl, Slot
 # 【修改】额外导入 QAudioOutput 用于处理音频
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtMultimediaWidgets import QVideoWidget
 
-from core.workers.frame_export_worker import FrameExportWorker
+from core.workers.frame_export_worker import FrameExportWorker, BatchFrameExportWorker, FrameIndexWorker
+from core.utils import parse_timestamp
+from core.frame_index import frame_at, step_frame
+from core.job_scheduler import PRIORITY_HIGH, STOPPED_MESSAGE
 
 class FrameExportTab(QWidget):
     def __init__(self, main_window):
@@ -16,8 +20,10 @@ class FrameExportTab(QWidget):
         self.player = None
         self.audio_output = None # 【新增】为音频输出声明一个变量
         self.current_video_path = ""
-        self.thread = None
         self.worker = None
+        # 逐帧时间戳索引（后台建立），建立完成前按 25fps 估算步进
+        self.frame_timestamps = []
+        self.index_worker = None
 
         self.create_widgets()
         self.create_layouts()
@@ -46,6 +52,39 @@ class FrameExportTab(QWidget):
         self.position_slider = QSlider(Qt.Horizontal)
         self.time_label = QLabel("00:00:00.000 / 00:00:00.000")
         
+        # --- 批量导出 ---
+        self.batch_mode_map = {"指定时间点": "timestamps", "固定间隔": "interval", "场景切换": "scene"}
+        self.batch_mode_combo = QComboBox()
+        self.batch_mode_combo.addItems(self.batch_mode_map.keys())
+        self.batch_timestamps_edit = QLineEdit()
+        self.batch_timestamps_edit.setPlaceholderText("时间点，用空格或分号分隔，例如: 10  01:30  00:05:12.500")
+        self.add_current_time_button = QPushButton("添加当前位置")
+        self.batch_interval_spin = QDoubleSpinBox()
+        self.batch_interval_spin.setRange(0.1, 3600.0)
+        self.batch_interval_spin.setValue(10.0)
+        self.batch_interval_spin.setSuffix(" 秒")
+        self.batch_interval_spin.setVisible(False)
+        self.scene_threshold_spin = QDoubleSpinBox()
+        self.scene_threshold_spin.setRange(0.05, 1.0)
+        self.scene_threshold_spin.setSingleStep(0.05)
+        self.scene_threshold_spin.setValue(0.3)
+        self.scene_threshold_spin.setPrefix("阈值 ")
+        self.scene_threshold_spin.setToolTip("场景切换分数的阈值 (0~1)，越小检测到的切换越多。")
+        self.scene_top_n_spin = QSpinBox()
+        self.scene_top_n_spin.setRange(1, 500)
+        self.scene_top_n_spin.setValue(10)
+        self.scene_top_n_spin.setPrefix("前 ")
+        self.scene_top_n_spin.setSuffix(" 个")
+        self.scene_fast_check = QCheckBox("缩小画面检测 (更快)")
+        self.scene_fast_check.setChecked(True)
+        for widget in (self.scene_threshold_spin, self.scene_top_n_spin, self.scene_fast_check):
+            widget.setVisible(False)
+        self.batch_format_combo = QComboBox()
+        self.batch_format_combo.addItems(["png", "jpg", "bmp", "tiff"])
+        self.batch_export_button = QPushButton("批量导出...")
+        self.batch_progress_bar = QProgressBar()
+        self.batch_progress_bar.setVisible(False)
+        
         # --- 初始状态 ---
         self.set_controls_enabled(False)
 
@@ -68,6 +107,21 @@ class FrameExportTab(QWidget):
         main_layout.addWidget(self.video_widget, 1) # 视频区域占据主要空间
         main_layout.addLayout(control_layout)
 
+        batch_layout = QHBoxLayout()
+        batch_layout.addWidget(QLabel("批量导出:"))
+        batch_layout.addWidget(self.batch_mode_combo)
+        batch_layout.addWidget(self.batch_timestamps_edit, 1)
+        batch_layout.addWidget(self.add_current_time_button)
+        batch_layout.addWidget(self.batch_interval_spin)
+        batch_layout.addWidget(self.scene_threshold_spin)
+        batch_layout.addWidget(self.scene_top_n_spin)
+        batch_layout.addWidget(self.scene_fast_check)
+        batch_layout.addWidget(QLabel("格式:"))
+        batch_layout.addWidget(self.batch_format_combo)
+        batch_layout.addWidget(self.batch_export_button)
+        main_layout.addLayout(batch_layout)
+        main_layout.addWidget(self.batch_progress_bar)
+
     def create_connections(self):
         self.open_button.clicked.connect(self.open_video_file)
         self.play_pause_button.clicked.connect(self.play_pause_video)
@@ -84,13 +138,32 @@ class FrameExportTab(QWidget):
 
         self.export_button.clicked.connect(self.export_current_frame)
 
+        self.batch_mode_combo.currentTextChanged.connect(self.update_batch_mode_widgets)
+        self.add_current_time_button.clicked.connect(self.add_current_time)
+        self.batch_export_button.clicked.connect(self.export_batch_frames)
+
     def open_video_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "选择视频文件", "", self.main_window.video_filter)
         if file_path:
             self.current_video_path = file_path
+            self.frame_timestamps = []
             self.player.setSource(QUrl.fromLocalFile(file_path))
             self.set_controls_enabled(True)
             self.player.play()
+            self.build_frame_index(file_path)
+
+    def build_frame_index(self, file_path):
+        self.index_worker = FrameIndexWorker(self.main_window.ffprobe_path, file_path)
+        self.index_worker.finished.connect(self.on_frame_index_ready)
+        self.main_window.scheduler.submit(self.index_worker, f"建立帧索引: {os.path.basename(file_path)}", 'disk_io', PRIORITY_HIGH, stopped_result=({}, STOPPED_MESSAGE))
+
+    @Slot(dict, str)
+    def on_frame_index_ready(self, index, msg):
+        # 用户可能在索引建立期间又打开了另一个视频
+        if self.sender() is not None and self.sender().video_file != self.current_video_path:
+            return
+        self.frame_timestamps = index.get('timestamps', [])
+        self.update_time_label(self.player.position())
 
     def play_pause_video(self):
         if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
@@ -122,16 +195,24 @@ class FrameExportTab(QWidget):
             self.player.pause()
         
         current_pos = self.player.position()
-        frame_duration_ms = 40 
-        
-        target_pos = current_pos + frame_duration_ms if forward else max(0, current_pos - frame_duration_ms)
+        if self.frame_timestamps:
+            # 按真实的帧时间戳步进，可变帧率视频也不会跳帧或重复
+            target_secs = step_frame(self.frame_timestamps, current_pos / 1000.0, 1 if forward else -1)
+            target_pos = int(round(target_secs * 1000))
+        else:
+            frame_duration_ms = 40
+            target_pos = current_pos + frame_duration_ms if forward else max(0, current_pos - frame_duration_ms)
         self.player.setPosition(target_pos)
         QApplication.processEvents()
         self.update_time_label(self.player.position())
 
     def update_time_label(self, position_ms):
         duration_ms = self.player.duration()
-        self.time_label.setText(f"{self.format_time(position_ms)} / {self.format_time(duration_ms)}")
+        text = f"{self.format_time(position_ms)} / {self.format_time(duration_ms)}"
+        if self.frame_timestamps:
+            current_frame = frame_at(self.frame_timestamps, position_ms / 1000.0) + 1
+            text += f"  (第 {current_frame}/{len(self.frame_timestamps)} 帧)"
+        self.time_label.setText(text)
 
     def sync_time_label(self):
         self.update_time_label(self.player.position())
@@ -146,6 +227,11 @@ class FrameExportTab(QWidget):
             
         current_pos_ms = self.player.position()
         timestamp_secs = current_pos_ms / 1000.0
+        exact_frame = False
+        if self.frame_timestamps:
+            # 对齐到画面上正在显示的那一帧的准确时间戳
+            timestamp_secs = self.frame_timestamps[frame_at(self.frame_timestamps, timestamp_secs)]
+            exact_frame = True
 
         base_name = os.path.splitext(os.path.basename(self.current_video_path))[0]
         time_str = self.format_time(current_pos_ms).replace(":", "-").replace(".", "_")
@@ -157,20 +243,89 @@ class FrameExportTab(QWidget):
             return
 
         self.export_button.setEnabled(False)
-        self.thread = QThread()
         self.worker = FrameExportWorker(
             self.main_window.ffmpeg_path,
             self.current_video_path,
             timestamp_secs,
-            output_path
+            output_path,
+            exact_frame
         )
-        self.worker.moveToThread(self.thread)
         self.worker.finished.connect(self.on_export_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, f"导出静帧: {os.path.basename(output_path)}", 'preview', PRIORITY_HIGH, stopped_result=(False, STOPPED_MESSAGE))
+
+    def update_batch_mode_widgets(self):
+        mode = self.batch_mode_map[self.batch_mode_combo.currentText()]
+        self.batch_timestamps_edit.setVisible(mode == 'timestamps')
+        self.add_current_time_button.setVisible(mode == 'timestamps')
+        self.batch_interval_spin.setVisible(mode == 'interval')
+        for widget in (self.scene_threshold_spin, self.scene_top_n_spin, self.scene_fast_check):
+            widget.setVisible(mode == 'scene')
+
+    def add_current_time(self):
+        current = self.batch_timestamps_edit.text().strip()
+        time_str = self.format_time(self.player.position())
+        self.batch_timestamps_edit.setText(f"{current}  {time_str}" if current else time_str)
+
+    def export_batch_frames(self):
+        if not self.current_video_path or self.player.duration() <= 0:
+            QMessageBox.warning(self, "错误", "请先加载一个有效的视频。")
+            return
+
+        mode = self.batch_mode_map[self.batch_mode_combo.currentText()]
+        params = {'mode': mode, 'format': self.batch_format_combo.currentText()}
+        if mode == 'interval':
+            params['interval'] = self.batch_interval_spin.value()
+        elif mode == 'scene':
+            params['scene_threshold'] = self.scene_threshold_spin.value()
+            params['top_n'] = self.scene_top_n_spin.value()
+            params['scene_scale_width'] = 320 if self.scene_fast_check.isChecked() else 0
+        else:
+            try:
+                params['timestamps'] = [parse_timestamp(t) for t in self.batch_timestamps_edit.text().replace(';', ' ').split()]
+            except ValueError as e:
+                QMessageBox.warning(self, "错误", str(e))
+                return
+            if not params['timestamps']:
+                QMessageBox.warning(self, "错误", "请至少输入一个时间点。")
+                return
+
+        output_dir = QFileDialog.getExistingDirectory(self, "选择批量导出的文件夹", os.path.dirname(self.current_video_path))
+        if not output_dir:
+            return
+
+        if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            self.player.pause()
+
+        self.batch_export_button.setEnabled(False)
+        self.batch_progress_bar.setVisible(True)
+        self.batch_progress_bar.setValue(0)
+        self.worker = BatchFrameExportWorker(
+            self.main_window.ffmpeg_path,
+            self.main_window.ffprobe_path,
+            self.current_video_path,
+            output_dir,
+            params
+        )
+        self.worker.progress.connect(self.batch_progress_bar.setValue)
+        self.worker.scenes_detected.connect(self.on_scenes_detected)
+        self.worker.finished.connect(self.on_batch_export_finished)
+        self.main_window.scheduler.submit(self.worker, f"批量导出静帧: {os.path.basename(self.current_video_path)}", 'cpu_encode', stopped_result=(False, STOPPED_MESSAGE))
+
+    @Slot(list)
+    def on_scenes_detected(self, timestamps):
+        # 把检测到的场景时间点填回“指定时间点”输入框，方便微调后重新导出或跳转查看
+        self.batch_timestamps_edit.setText("  ".join(self.format_time(int(round(t * 1000))) for t in timestamps))
+        if timestamps:
+            self.player.setPosition(int(round(timestamps[0] * 1000)))
+
+    @Slot(bool, str)
+    def on_batch_export_finished(self, success, msg):
+        self.batch_export_button.setEnabled(True)
+        self.batch_progress_bar.setVisible(False)
+        if success:
+            QMessageBox.information(self, "成功", f"静帧已批量导出到：\n{msg}")
+        else:
+            QMessageBox.critical(self, "导出失败", msg)
 
     @Slot(bool, str)
     def on_export_finished(self, success, msg):
@@ -186,6 +341,8 @@ class FrameExportTab(QWidget):
         self.next_frame_button.setEnabled(enabled)
         self.position_slider.setEnabled(enabled)
         self.export_button.setEnabled(enabled)
+        self.batch_export_button.setEnabled(enabled)
+        self.add_current_time_button.setEnabled(enabled)
 
     @staticmethod
     def format_time(ms):
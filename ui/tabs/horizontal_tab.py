@@ -3,20 +3,25 @@ import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                                QProgressBar, QComboBox, QTextEdit, QMessageBox, 
                                QGridLayout, QSpinBox, QFontComboBox, QFrame, QApplication)
-from PySide6.QtGui import QFont
-from PySide6.QtCore import QThread, Slot, Qt
+from PySide6.QtGui import QFont, QImage
+from PySide6.QtCore import Slot, Qt
 
 from core.workers.horizontal_worker import HorizontalBurnWorker, HorizontalPreviewWorker
+from core.preview_session import PreviewSession
+from core.utils import parse_timestamp
 from ui.dialogs import PreviewDialog
 # 【新增】导入统一编码器配置模块
-from core.codec_config import get_encoder_options, get_copy_tooltip
+from core.codec_config import get_encoder_options, get_copy_tooltip, get_default_encoder_option
+from core.job_scheduler import PRIORITY_HIGH, STOPPED_MESSAGE, encode_resource
 
 class HorizontalTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.thread = None
         self.worker = None
+        self.preview_image = None
+        # 预览会话：样式不变时复用字幕和已渲染的预览帧
+        self.preview_session = None
 
         self.color_map = {
             "白色": "&H00FFFFFF",
@@ -67,6 +72,12 @@ class HorizontalTab(QWidget):
 
         self.output_format_combo = QComboBox(); self.output_format_combo.addItems(["mp4", "mkv", "mov", "webm", "avi", "flv", "ts"])
         self.preview_button = QPushButton("生成预览图")
+        self.preview_time_edit = QLineEdit()
+        self.preview_time_edit.setPlaceholderText("预览时间点 (留空为默认)")
+        self.preview_time_edit.setToolTip("例如 90、01:30 或 00:01:30.500。\n同一样式下预览过的时间点会被缓存，再次预览时立即显示。\n"
+                                 "多帧预览可填写多个时间点 (用空格分隔)，留空则在整段视频中均匀取 9 帧。")
+        self.contact_sheet_button = QPushButton("多帧预览")
+        self.preview_time_edit.setMaximumWidth(180)
         self.start_button = QPushButton("开始制作")
         self.load_defaults_button = QPushButton("加载B站默认参数")
 
@@ -104,7 +115,9 @@ class HorizontalTab(QWidget):
         control_layout = QHBoxLayout()
         control_layout.addWidget(self.load_defaults_button)
         control_layout.addStretch()
+        control_layout.addWidget(self.preview_time_edit)
         control_layout.addWidget(self.preview_button)
+        control_layout.addWidget(self.contact_sheet_button)
         control_layout.addWidget(self.start_button)
 
         main_layout.addWidget(input_frame)
@@ -122,7 +135,8 @@ class HorizontalTab(QWidget):
         self.output_dir_browse_btn.clicked.connect(lambda: self.main_window.browse_output_dir(self.output_dir))
         self.video_file_path.textChanged.connect(self.update_output_dir)
         self.load_defaults_button.clicked.connect(self.load_bilibili_preset)
-        self.preview_button.clicked.connect(self.generate_preview)
+        self.preview_button.clicked.connect(lambda: self.generate_preview())
+        self.contact_sheet_button.clicked.connect(lambda: self.generate_preview(contact_sheet=True))
         self.start_button.clicked.connect(self.start_burn)
 
     def load_bilibili_preset(self):
@@ -136,7 +150,7 @@ class HorizontalTab(QWidget):
         self.wrap_width_spin.setValue(25)
         
         # 【修改】设置默认编码器选项
-        self.codec_combo.setCurrentText("N卡 H.264 (高质量)")
+        self.codec_combo.setCurrentText(get_default_encoder_option())
 
         self.log_output.append("ℹ️ 已加载B站风格默认参数。")
         
@@ -185,22 +199,28 @@ class HorizontalTab(QWidget):
             'style_params': style_params,
         }
 
-    def generate_preview(self):
+    def generate_preview(self, contact_sheet=False):
         params = self._get_current_params()
         if not params: return
+        try:
+            preview_times = [parse_timestamp(t) for t in self.preview_time_edit.text().replace(';', ' ').split()]
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", str(e)); return
+        if contact_sheet:
+            params['contact_sheet'] = preview_times
+        elif preview_times:
+            params['preview_time'] = preview_times[0]
+        if self.preview_session is None:
+            self.preview_session = PreviewSession(self.main_window.ffmpeg_path)
+        self.preview_image = None
         self.set_controls_enabled(False)
         self.log_output.clear()
         
-        self.thread = QThread()
-        self.worker = HorizontalPreviewWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params)
-        self.worker.moveToThread(self.thread)
+        self.worker = HorizontalPreviewWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params, self.preview_session)
         self.worker.log_message.connect(self.log_output.append)
+        self.worker.image_ready.connect(self.on_preview_image_ready)
         self.worker.finished.connect(self.on_preview_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, "横屏预览", 'preview', PRIORITY_HIGH, stopped_result=(False, STOPPED_MESSAGE))
 
     def start_burn(self):
         params = self._get_current_params()
@@ -210,30 +230,27 @@ class HorizontalTab(QWidget):
         self.log_output.clear()
         self.progress_bar.setValue(0)
 
-        self.thread = QThread()
         self.worker = HorizontalBurnWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params)
-        self.worker.moveToThread(self.thread)
         self.worker.log_message.connect(self.log_output.append)
         self.worker.progress.connect(self.progress_bar.setValue)
         self.worker.finished.connect(self.on_burn_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, f"横屏烧录: {os.path.basename(params['video_file'])}", encode_resource(params['codec_name']))
+
+    @Slot(QImage)
+    def on_preview_image_ready(self, image):
+        self.preview_image = image
 
     @Slot(bool, str)
     def on_preview_finished(self, success, result_or_msg):
         self.set_controls_enabled(True)
         self.log_output.clear()
-        if success:
-            preview_dialog = PreviewDialog(result_or_msg, self)
-            preview_dialog.exec()
-            if os.path.exists(result_or_msg):
-                try: os.remove(result_or_msg)
-                except OSError: pass
-        else:
+        if not success:
             QMessageBox.critical(self, "预览失败", result_or_msg)
+        elif self.preview_image is None:
+            QMessageBox.critical(self, "预览失败", "未能读取预览帧。")
+        else:
+            preview_dialog = PreviewDialog(self.preview_image, self)
+            preview_dialog.exec()
 
     @Slot(int, str)
     def on_burn_finished(self, return_code, message):
@@ -2,8 +2,9 @@
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
                                QListWidget, QAbstractItemView, QFrame, QApplication, 
-                               QFileDialog, QMessageBox, QComboBox, QTextEdit)
-from PySide6.QtCore import QThread, Slot, Qt
+                               QFileDialog, QMessageBox, QComboBox, QTextEdit, QCheckBox,
+                               QProgressBar)
+from PySide6.QtCore import Slot, Qt
 
 from core.workers.merge_worker import MergeWorker
 
@@ -11,7 +12,6 @@ class MergeTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.thread = None
         self.worker = None
         self.first_file_ext = ""
 
@@ -40,13 +40,38 @@ class MergeTab(QWidget):
         self.default_formats = ["mp4", "mkv", "ts", "mov", "avi", "flv", "webm", "mp3", "m4a", "aac", "flac", "wav", "opus"]
         self.output_format_combo.addItems(self.default_formats)
 
+        # 输出封装方式：显示名称 -> Worker 参数
+        self.container_mode_map = {
+            "标准 (合并完成后可播放)": "standard",
+            "分片 MP4 (边写边播)": "fragmented",
+            "MPEG-TS (边写边播)": "mpegts",
+        }
+        self.container_mode_combo = QComboBox()
+        self.container_mode_combo.addItems(self.container_mode_map.keys())
+        self.container_mode_combo.setToolTip(
+            "标准：文件索引在最后写入，合并结束前输出文件无法播放。\n"
+            "分片 MP4：仅适用于 mp4/mov/m4a，合并过程中即可播放，适合超长合并。\n"
+            "MPEG-TS：输出为 .ts 文件，合并过程中即可播放。"
+        )
+
+        self.auto_normalize_check = QCheckBox("自动统一不兼容的文件")
+        self.auto_normalize_check.setChecked(True)
+        self.auto_normalize_check.setToolTip(
+            "合并前会先检查所有文件的编码、分辨率、帧率和音频参数。\n"
+            "勾选时，只把参数不一致的文件重新编码为占比最大的那组参数，其余文件仍直接复制；\n"
+            "不勾选时，参数不一致会在合并开始前直接报错。"
+        )
+
         # --- 控制与日志 ---
         self.start_button = QPushButton("开始合并 (无损/极速模式)")
         self.start_button.setToolTip(
             "使用无损、极速的直接复制模式合并文件。\n"
-            "要求所有待合并文件的编码、分辨率、帧率等参数必须一致！"
+            "参数一致的文件直接复制；不一致的文件可自动重新编码后再合并。"
         )
         self.progress_label = QLabel("等待任务...")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
 
@@ -68,6 +93,8 @@ class MergeTab(QWidget):
         output_name_layout.addWidget(self.output_filename_edit)
         output_name_layout.addWidget(QLabel("."))
         output_name_layout.addWidget(self.output_format_combo)
+        output_name_layout.addWidget(QLabel("封装方式:"))
+        output_name_layout.addWidget(self.container_mode_combo)
 
         main_layout.addLayout(list_control_layout)
         main_layout.addWidget(self.merge_list_widget, 1)
@@ -80,6 +107,7 @@ class MergeTab(QWidget):
 
         main_layout.addLayout(output_path_layout)
         main_layout.addLayout(output_name_layout)
+        main_layout.addWidget(self.auto_normalize_check)
 
         line2 = QFrame()
         line2.setFrameShape(QFrame.Shape.HLine)
@@ -87,6 +115,7 @@ class MergeTab(QWidget):
         main_layout.addWidget(line2)
 
         main_layout.addWidget(self.progress_label)
+        main_layout.addWidget(self.progress_bar)
         main_layout.addWidget(self.log_output, 1)
         main_layout.addWidget(self.start_button)
         
@@ -148,6 +177,11 @@ class MergeTab(QWidget):
         if not filename:
             QMessageBox.warning(self, "错误", "请输入一个有效的文件名！")
             return
+
+        container_mode = self.container_mode_map[self.container_mode_combo.currentText()]
+        if container_mode == 'mpegts' and file_format != 'ts':
+            file_format = 'ts'
+            self.output_format_combo.setCurrentText('ts')
             
         output_path = os.path.join(output_dir, f"{filename}.{file_format}").replace("\\", "/")
         
@@ -155,24 +189,26 @@ class MergeTab(QWidget):
 
         self.set_controls_enabled(False)
         self.log_output.clear()
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
         
-        self.thread = QThread()
-        # 注意：这里的Worker还是旧的，它内部硬编码了-c copy，这是正确的
-        self.worker = MergeWorker(self.main_window.ffmpeg_path, file_list, output_path)
-        self.worker.moveToThread(self.thread)
+        options = {
+            'auto_normalize': self.auto_normalize_check.isChecked(),
+            'container_mode': container_mode,
+        }
+
+        self.worker = MergeWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, file_list, output_path, options)
         self.worker.log_message.connect(self.log_output.append)
         self.worker.progress.connect(self.progress_label.setText)
+        self.worker.progress_percent.connect(self.progress_bar.setValue)
         self.worker.finished.connect(self.on_merge_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, f"合并: {os.path.basename(output_path)}", 'disk_io')
 
     @Slot(int, str)
     def on_merge_finished(self, return_code, message):
         self.set_controls_enabled(True)
         self.progress_label.setText("任务结束。")
+        self.progress_bar.setVisible(False)
         if return_code == 0:
             QMessageBox.information(self, "成功", message)
         else:
@@ -182,4 +218,6 @@ class MergeTab(QWidget):
         self.add_files_button.setEnabled(enabled)
         self.clear_list_button.setEnabled(enabled)
         self.start_button.setEnabled(enabled)
-        self.browse_output_btn.setEnabled(enabled)
\ No newline at end of file
+        self.browse_output_btn.setEnabled(enabled)
+        self.auto_normalize_check.setEnabled(enabled)
+        self.container_mode_combo.setEnabled(enabled)
\ No newline at end of file
@@ -3,21 +3,26 @@ import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                                QProgressBar, QComboBox, QTextEdit, QMessageBox, 
                                QGridLayout, QSpinBox, QDoubleSpinBox, QApplication, QFontComboBox, QFrame)
-from PySide6.QtGui import QFont
-from PySide6.QtCore import QThread, Slot, Qt
+from PySide6.QtGui import QFont, QImage
+from PySide6.QtCore import Slot, Qt
 
 from core.workers.subtitle_worker import SubtitleBurnWorker, PreviewWorker
+from core.preview_session import PreviewSession
+from core.utils import parse_timestamp
 # 【修改】从新的、独立的模块导入专用的转换函数
 from core.chatbox_converter import generate_chatbox_ass
 from ui.dialogs import PreviewDialog
-from core.codec_config import get_encoder_options, get_copy_tooltip
+from core.codec_config import get_encoder_options, get_copy_tooltip, get_default_encoder_option
+from core.job_scheduler import PRIORITY_HIGH, STOPPED_MESSAGE, encode_resource
 
 class SubtitleTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.thread = None
         self.worker = None
+        self.preview_image = None
+        # 预览会话：样式不变时复用字幕和已渲染的预览帧
+        self.preview_session = None
 
         self.color_map = {
             "白色": "&H00FFFFFF",
@@ -89,6 +94,12 @@ class SubtitleTab(QWidget):
         self.sub_output_format_combo = QComboBox()
         self.sub_output_format_combo.addItems(["mp4", "mkv", "mov", "webm", "avi", "flv", "ts"])
         self.preview_button_sub = QPushButton("生成预览图")
+        self.preview_time_edit_sub = QLineEdit()
+        self.preview_time_edit_sub.setPlaceholderText("预览时间点 (留空为默认)")
+        self.preview_time_edit_sub.setToolTip("例如 90、01:30 或 00:01:30.500。\n同一样式下预览过的时间点会被缓存，再次预览时立即显示。\n"
+                                 "多帧预览可填写多个时间点 (用空格分隔)，留空则在整段视频中均匀取 9 帧。")
+        self.contact_sheet_button_sub = QPushButton("多帧预览")
+        self.preview_time_edit_sub.setMaximumWidth(180)
         self.start_button_sub = QPushButton("开始制作")
 
         # --- 日志和进度条 ---
@@ -160,7 +171,9 @@ class SubtitleTab(QWidget):
         
         button_layout = QHBoxLayout()
         button_layout.addStretch()
+        button_layout.addWidget(self.preview_time_edit_sub)
         button_layout.addWidget(self.preview_button_sub)
+        button_layout.addWidget(self.contact_sheet_button_sub)
         button_layout.addWidget(self.start_button_sub)
 
         main_layout.addWidget(input_frame)
@@ -181,7 +194,8 @@ class SubtitleTab(QWidget):
         self.video_file_path_sub.textChanged.connect(self.update_subtitle_output_dir)
         self.preset_bilibili_btn.clicked.connect(self.load_bilibili_preset)
         self.preset_weibo_btn.clicked.connect(self.load_weibo_preset)
-        self.preview_button_sub.clicked.connect(self.generate_preview)
+        self.preview_button_sub.clicked.connect(lambda: self.generate_preview())
+        self.contact_sheet_button_sub.clicked.connect(lambda: self.generate_preview(contact_sheet=True))
         self.start_button_sub.clicked.connect(self.start_subtitle_burn)
 
     def load_bilibili_preset(self):
@@ -197,7 +211,7 @@ class SubtitleTab(QWidget):
         self.sub_margin_left.setValue(40)
         self.sub_margin_bottom.setValue(198)
         self.sub_chatbox_duration.setValue(10)
-        self.sub_codec_combo.setCurrentText("N卡 H.264 (高质量)")
+        self.sub_codec_combo.setCurrentText(get_default_encoder_option())
         self.log_output_sub.append("ℹ️ 已加载 [手机B站] 参数预设。")
 
     def load_weibo_preset(self):
@@ -213,7 +227,7 @@ class SubtitleTab(QWidget):
         self.sub_margin_left.setValue(50)
         self.sub_margin_bottom.setValue(190)
         self.sub_chatbox_duration.setValue(10)
-        self.sub_codec_combo.setCurrentText("N卡 H.264 (高质量)")
+        self.sub_codec_combo.setCurrentText(get_default_encoder_option())
         self.log_output_sub.append("ℹ️ 已加载 [手机微博] 参数预设。")
 
     def update_subtitle_output_dir(self):
@@ -262,23 +276,30 @@ class SubtitleTab(QWidget):
             'ass_options': ass_options
         }
 
-    def generate_preview(self):
+    def generate_preview(self, contact_sheet=False):
         params = self._get_current_params()
         if not params: return
+        try:
+            preview_times = [parse_timestamp(t) for t in self.preview_time_edit_sub.text().replace(';', ' ').split()]
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", str(e)); return
+        if contact_sheet:
+            params['contact_sheet'] = preview_times
+        elif preview_times:
+            params['preview_time'] = preview_times[0]
+        if self.preview_session is None:
+            self.preview_session = PreviewSession(self.main_window.ffmpeg_path)
+        self.preview_image = None
         self.set_controls_enabled(False)
         self.progress_bar_sub.setVisible(False)
         self.log_output_sub.clear()
         
-        self.thread = QThread()
         # 【修改】传递新的转换函数
-        self.worker = PreviewWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params, generate_chatbox_ass)
-        self.worker.moveToThread(self.thread)
+        self.worker = PreviewWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params, generate_chatbox_ass, self.preview_session)
         self.worker.log_message.connect(self.log_output_sub.append)
+        self.worker.image_ready.connect(self.on_preview_image_ready)
         self.worker.finished.connect(self.on_preview_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater); self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, "字幕预览", 'preview', PRIORITY_HIGH, stopped_result=(False, STOPPED_MESSAGE))
 
     def start_subtitle_burn(self):
         params = self._get_current_params()
@@ -290,31 +311,29 @@ class SubtitleTab(QWidget):
         self.log_output_sub.clear()
         self.progress_bar_sub.setValue(0)
 
-        self.thread = QThread()
         # 【修改】传递新的转换函数
         self.worker = SubtitleBurnWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params, generate_chatbox_ass)
-        self.worker.moveToThread(self.thread)
         self.worker.log_message.connect(self.log_output_sub.append)
         self.worker.progress.connect(self.progress_bar_sub.setValue)
         self.worker.finished.connect(self.on_subtitle_burn_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater); self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, f"字幕烧录: {os.path.basename(params['video_file'])}", encode_resource(params['codec_name']))
 
     # ... (后续的 on_..._finished 和 set_controls_enabled 方法保持不变) ...
+    @Slot(QImage)
+    def on_preview_image_ready(self, image):
+        self.preview_image = image
+
     @Slot(bool, str)
     def on_preview_finished(self, success, result_or_msg):
         self.set_controls_enabled(True)
         self.log_output_sub.clear()
-        if success:
-            preview_dialog = PreviewDialog(result_or_msg, self)
-            preview_dialog.exec()
-            if os.path.exists(result_or_msg):
-                try: os.remove(result_or_msg)
-                except OSError: pass
-        else:
+        if not success:
             QMessageBox.critical(self, "预览失败", result_or_msg)
+        elif self.preview_image is None:
+            QMessageBox.critical(self, "预览失败", "未能读取预览帧。")
+        else:
+            preview_dialog = PreviewDialog(self.preview_image, self)
+            preview_dialog.exec()
 
     @Slot(int, str)
     def on_subtitle_burn_finished(self, return_code, message):
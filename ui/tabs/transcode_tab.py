@@ -4,18 +4,18 @@ import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
                                QProgressBar, QFileDialog, QComboBox, QTextEdit, QMessageBox,
                                QListWidget, QAbstractItemView, QFrame)
-from PySide6.QtCore import QThread, Slot, Qt
+from PySide6.QtCore import Slot, Qt
 
-from core.workers.transcode_worker import BatchTranscodeWorker
+from core.workers.transcode_worker import BatchTranscodeWorker, audio_extract_resource
 # 【新增】导入统一编码器配置模块
 from core.codec_config import get_encoder_options, get_copy_tooltip
+from core.job_scheduler import encode_resource
 
 class TranscodeTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
 
-        self.thread = None
         self.worker = None
 
         self.create_widgets()
@@ -149,20 +149,19 @@ class TranscodeTab(QWidget):
         self.set_controls_enabled(False)
         self.batch_log_output.clear()
 
-        self.thread = QThread()
         self.worker = BatchTranscodeWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, file_queue, transcode_options)
-        self.worker.moveToThread(self.thread)
 
         self.worker.file_started.connect(self.batch_progress_label.setText)
         self.worker.file_progress.connect(self.batch_progress_bar.setValue)
         self.worker.log_message.connect(self.batch_log_output.append)
         self.worker.file_finished.connect(self.on_batch_file_finished)
         self.worker.batch_finished.connect(self.on_batch_all_finished)
-        self.worker.batch_finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        # 直接复制音频流几乎不占用 CPU，按磁盘读写任务调度；需要重新编码时按 CPU 编码任务调度
+        if "提取" in transcode_options['format']:
+            resource = audio_extract_resource(file_queue, transcode_options['format'].split(" ")[1], self.main_window.ffprobe_path)
+        else:
+            resource = encode_resource(transcode_options['codec_name'])
+        self.main_window.scheduler.submit(self.worker, f"批量转码: {len(file_queue)} 个文件", resource, done_signal='batch_finished')
 
     @Slot(int)
     def on_batch_file_finished(self, return_code):
@@ -3,15 +3,15 @@ import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
                                QProgressBar, QComboBox, QTextEdit, QMessageBox, QGridLayout,
                                QFrame, QCheckBox, QGroupBox)
-from PySide6.QtCore import QThread, Slot, Qt
+from PySide6.QtCore import Slot, Qt
 
-from core.workers.transcribe_worker import TranscribeWorker
+from core.workers.transcribe_worker import TranscribeWorker, format_time
+from core.job_scheduler import STOPPED_MESSAGE
 
 class TranscribeTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.thread = None
         self.worker = None
 
         # Language mapping from display name to Whisper code
@@ -58,6 +58,19 @@ class TranscribeTab(QWidget):
         # 【新增】计算设备选择框
         self.device_combo = QComboBox()
         self.device_combo.addItems(["自动 (优先GPU)", "GPU (CUDA)", "CPU"])
+
+        # 字幕切分方式：显示名称 -> Worker 参数
+        self.resegment_mode_map = {
+            "时间插值 (速度快)": "interpolation",
+            "词级时间戳 (更精确)": "word",
+        }
+        self.resegment_combo = QComboBox()
+        self.resegment_combo.addItems(self.resegment_mode_map.keys())
+        self.resegment_combo.setToolTip(
+            "时间插值：按字数比例估算每行字幕的时间，速度最快。\n"
+            "词级时间戳：让Whisper输出每个词的时间，在真实的词边界处断句，\n"
+            "长句的时间轴更准确，但识别会稍慢。"
+        )
         
         # --- Export Formats ---
         self.export_groupbox = QGroupBox("导出格式 (可多选)")
@@ -70,6 +83,9 @@ class TranscribeTab(QWidget):
 
         # --- Control & Feedback ---
         self.start_button = QPushButton("开始转录")
+        self.stop_button = QPushButton("停止 (保存进度)")
+        self.stop_button.setToolTip("在当前识别窗口完成后停止，已完成的进度会被保存。\n再次使用相同的参数开始转录即可从断点继续。")
+        self.stop_button.setEnabled(False)
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
         self.progress_bar = QProgressBar()
@@ -102,6 +118,8 @@ class TranscribeTab(QWidget):
         # 【新增】添加设备选择到布局中
         params_layout.addWidget(QLabel("计算设备:"), 1, 0)
         params_layout.addWidget(self.device_combo, 1, 1)
+        params_layout.addWidget(QLabel("字幕切分:"), 1, 2)
+        params_layout.addWidget(self.resegment_combo, 1, 3)
         params_layout.setColumnStretch(1, 1) # 让下拉框部分占据更多空间
         params_layout.setColumnStretch(3, 1)
 
@@ -120,13 +138,17 @@ class TranscribeTab(QWidget):
         main_layout.addWidget(QLabel("日志输出:"))
         main_layout.addWidget(self.log_output)
         main_layout.addWidget(self.progress_bar)
-        main_layout.addWidget(self.start_button)
+        control_layout = QHBoxLayout()
+        control_layout.addWidget(self.start_button)
+        control_layout.addWidget(self.stop_button)
+        main_layout.addLayout(control_layout)
 
     def create_connections(self):
         self.browse_media_btn.clicked.connect(lambda: self.main_window.browse_file(self.media_file_path, "选择媒体文件", "所有文件 (*.*)"))
         self.browse_output_btn.clicked.connect(lambda: self.main_window.browse_output_dir(self.output_dir_edit))
         self.media_file_path.textChanged.connect(self.update_defaults_from_path)
         self.start_button.clicked.connect(self.start_transcription)
+        self.stop_button.clicked.connect(self.stop_transcription)
 
     def set_default_settings(self):
         self.model_combo.setCurrentText("base")
@@ -167,6 +189,7 @@ class TranscribeTab(QWidget):
             'model': self.model_combo.currentText(),
             'language': self.language_map[self.language_combo.currentText()],
             'device': self.device_combo.currentText(), # 【新增】获取设备选择
+            'resegment_mode': self.resegment_mode_map[self.resegment_combo.currentText()],
             'export_formats': selected_formats,
             'model_root': os.path.join(self.main_window.base_path, 'models', 'whisper')
         }
@@ -183,19 +206,21 @@ class TranscribeTab(QWidget):
         self.progress_bar.setValue(0) # 【修改】从0开始
         self.progress_bar.setFormat("准备中...")
 
-        self.thread = QThread()
         # 【修改】将 self.progress_bar 传递给 Worker
         self.worker = TranscribeWorker(params)
-        self.worker.moveToThread(self.thread)
 
         self.worker.log_message.connect(self.log_output.append)
         # 【修改】连接新的进度信号
         self.worker.progress_update.connect(self.update_progress_bar)
+        self.worker.segment_ready.connect(self.on_segment_ready)
         self.worker.finished.connect(self.on_transcription_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater); self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.main_window.scheduler.submit(self.worker, f"语音识别: {os.path.basename(params['media_file'])}", 'ml', stopped_result=(False, STOPPED_MESSAGE))
+
+    def stop_transcription(self):
+        if self.worker:
+            self.worker.stop()
+            self.stop_button.setEnabled(False)
+            self.progress_bar.setFormat("正在停止 (等待当前窗口完成)...")
 
     # 【新增】新的进度更新槽函数
     @Slot(int, str)
@@ -203,6 +228,11 @@ class TranscribeTab(QWidget):
         self.progress_bar.setValue(value)
         self.progress_bar.setFormat(text)
 
+    @Slot(dict)
+    def on_segment_ready(self, segment):
+        """实时显示每条识别完成的字幕。"""
+        self.log_output.append(f"[{format_time(segment['start'])}] {segment['text'].strip()}")
+
     @Slot(bool, str)
     def on_transcription_finished(self, success, message):
         self.progress_bar.setValue(100 if success else 0)
@@ -223,4 +253,5 @@ class TranscribeTab(QWidget):
             self.findChildren(QLineEdit)
         )
         for widget in widgets_to_toggle:
-            widget.setEnabled(enabled)
\ No newline at end of file
+            widget.setEnabled(enabled)
+        self.stop_button.setEnabled(not enabled)
\ No newline at end of file
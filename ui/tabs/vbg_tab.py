@@ -2,18 +2,19 @@
 
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
-                               QProgressBar, QComboBox, QTextEdit, QMessageBox, QGridLayout, QApplication)
-from PySide6.QtCore import QThread, Slot, Qt
+                               QProgressBar, QComboBox, QTextEdit, QMessageBox, QGridLayout, QApplication,
+                               QCheckBox, QListWidget, QSpinBox, QFileDialog)
+from PySide6.QtCore import Slot, Qt
 
-from core.workers.vbg_worker import VideoFromBgWorker
-from core.codec_config import get_encoder_options, get_copy_tooltip
+from core.workers.vbg_worker import VideoFromBgWorker, BatchVideoFromBgWorker
+from core.codec_config import get_encoder_options, get_copy_tooltip, get_default_encoder_option
+from core.job_scheduler import encode_resource
 
 class VideoFromBgTab(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
 
-        self.thread = None
         self.worker = None
 
         self.create_widgets()
@@ -25,6 +26,18 @@ class VideoFromBgTab(QWidget):
         # --- 输入 ---
         self.vbg_audio_source = QLineEdit()
         self.vbg_audio_browse_btn = QPushButton("浏览音频/视频源...")
+        
+        # --- 批量模式 ---
+        self.vbg_batch_add_btn = QPushButton("批量添加音频...")
+        self.vbg_batch_clear_btn = QPushButton("清空批量列表")
+        self.vbg_batch_list = QListWidget()
+        self.vbg_batch_list.setMaximumHeight(120)
+        self.vbg_batch_list.setToolTip("批量列表不为空时，将忽略上方的单个音频源，为列表中的每个音频各生成一个视频。")
+        self.vbg_batch_workers_spin = QSpinBox()
+        self.vbg_batch_workers_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.vbg_batch_workers_spin.setValue(min(2, self.vbg_batch_workers_spin.maximum()))
+        self.vbg_batch_workers_spin.setToolTip("同时处理的音频文件数量（不超过任务队列中该类任务的并发上限）。")
+        
         self.vbg_bg_image = QLineEdit()
         self.vbg_bg_browse_btn = QPushButton("浏览背景图片...")
         
@@ -50,6 +63,13 @@ class VideoFromBgTab(QWidget):
             item = self.vbg_codec_combo.model().item(copy_index)
             item.setEnabled(False)
         
+        self.vbg_loop_still_check = QCheckBox("静态循环模式 (背景只编码一次，速度极快)")
+        self.vbg_loop_still_check.setChecked(True)
+        self.vbg_loop_still_check.setToolTip(
+            "先把背景图编码成一段几秒的视频，再循环复制到音频的完整时长。\n"
+            "合成耗时几乎与音频长短无关。若播放器兼容性有问题，可取消勾选，逐帧编码整段视频。"
+        )
+        
         # --- 进度和日志 ---
         self.vbg_progress_bar = QProgressBar()
         self.vbg_progress_bar.setVisible(False)
@@ -65,6 +85,14 @@ class VideoFromBgTab(QWidget):
         audio_source_layout.addWidget(self.vbg_audio_source)
         audio_source_layout.addWidget(self.vbg_audio_browse_btn)
 
+        batch_control_layout = QHBoxLayout()
+        batch_control_layout.addWidget(QLabel("批量音频 (可选):"))
+        batch_control_layout.addWidget(self.vbg_batch_add_btn)
+        batch_control_layout.addWidget(self.vbg_batch_clear_btn)
+        batch_control_layout.addStretch()
+        batch_control_layout.addWidget(QLabel("并发数:"))
+        batch_control_layout.addWidget(self.vbg_batch_workers_spin)
+
         bg_image_layout = QHBoxLayout()
         bg_image_layout.addWidget(QLabel("背景图片:"))
         bg_image_layout.addWidget(self.vbg_bg_image)
@@ -80,8 +108,11 @@ class VideoFromBgTab(QWidget):
         params_layout.addWidget(self.vbg_format_combo, 0, 1)
         params_layout.addWidget(QLabel("视频编码器:"), 1, 0)
         params_layout.addWidget(self.vbg_codec_combo, 1, 1)
+        params_layout.addWidget(self.vbg_loop_still_check, 2, 0, 1, 2)
 
         layout.addLayout(audio_source_layout)
+        layout.addLayout(batch_control_layout)
+        layout.addWidget(self.vbg_batch_list)
         layout.addLayout(bg_image_layout)
         layout.addLayout(output_path_layout)
         layout.addLayout(params_layout)
@@ -94,24 +125,40 @@ class VideoFromBgTab(QWidget):
     def create_connections(self):
         self.vbg_audio_browse_btn.clicked.connect(lambda: self.main_window.browse_file(self.vbg_audio_source, "选择音频或视频源", self.main_window.media_filter))
         self.vbg_audio_source.textChanged.connect(self.update_vbg_output_dir)
+        self.vbg_batch_add_btn.clicked.connect(self.add_batch_files)
+        self.vbg_batch_clear_btn.clicked.connect(self.vbg_batch_list.clear)
         self.vbg_bg_browse_btn.clicked.connect(lambda: self.main_window.browse_file(self.vbg_bg_image, "选择背景图片", "图片文件 (*.jpg *.jpeg *.png)"))
         self.vbg_output_browse_btn.clicked.connect(lambda: self.main_window.browse_output_dir(self.vbg_output_dir))
         self.start_vbg_button.clicked.connect(self.start_video_from_bg)
         
     def set_default_options(self):
-        self.vbg_codec_combo.setCurrentText("N卡 H.264 (高质量)")
+        self.vbg_codec_combo.setCurrentText(get_default_encoder_option())
         
     def update_vbg_output_dir(self):
         audio_path = self.vbg_audio_source.text()
         if audio_path and os.path.exists(audio_path):
              self.vbg_output_dir.setText(os.path.dirname(audio_path))
 
+    def add_batch_files(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "选择要批量处理的音频或视频源", "", self.main_window.media_filter)
+        existing = {self.vbg_batch_list.item(i).text() for i in range(self.vbg_batch_list.count())}
+        new_files = [f for f in files if f not in existing]
+        self.vbg_batch_list.addItems(new_files)
+        if new_files and not self.vbg_output_dir.text():
+            self.vbg_output_dir.setText(os.path.dirname(new_files[0]))
+
     def start_video_from_bg(self):
         audio_source = self.vbg_audio_source.text()
         bg_image = self.vbg_bg_image.text()
         output_dir = self.vbg_output_dir.text()
-
-        if not (audio_source and os.path.exists(audio_source)):
+        batch_sources = [self.vbg_batch_list.item(i).text() for i in range(self.vbg_batch_list.count())]
+
+        if batch_sources:
+            missing = [f for f in batch_sources if not os.path.exists(f)]
+            if missing:
+                QMessageBox.warning(self, "错误", "批量列表中以下文件不存在：\n" + "\n".join(missing))
+                return
+        elif not (audio_source and os.path.exists(audio_source)):
             QMessageBox.warning(self, "错误", "请选择一个有效的音频/视频源文件！")
             return
         if not (bg_image and os.path.exists(bg_image)):
@@ -131,20 +178,22 @@ class VideoFromBgTab(QWidget):
             'bg_image': bg_image, 
             'output_dir': output_dir,
             'format': self.vbg_format_combo.currentText(),
-            'codec_name': self.vbg_codec_combo.currentText()
+            'codec_name': self.vbg_codec_combo.currentText(),
+            'loop_still': self.vbg_loop_still_check.isChecked()
         }
         
-        self.thread = QThread()
-        self.worker = VideoFromBgWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params)
-        self.worker.moveToThread(self.thread)
+        if batch_sources:
+            params['audio_sources'] = batch_sources
+            params['max_workers'] = self.vbg_batch_workers_spin.value()
+            self.worker = BatchVideoFromBgWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params)
+        else:
+            self.worker = VideoFromBgWorker(self.main_window.ffmpeg_path, self.main_window.ffprobe_path, params)
         self.worker.log_message.connect(self.vbg_log_output.append)
         self.worker.progress.connect(self.vbg_progress_bar.setValue)
         self.worker.finished.connect(self.on_vbg_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.thread.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        # 批量任务自己并发运行多个 FFmpeg 进程，按并发数占用调度器名额（最多为该类别的并发上限）
+        self.main_window.scheduler.submit(self.worker, "背景图生成视频", encode_resource(params['codec_name']),
+                                          slots=params.get('max_workers', 1))
 
     # 【最终修复】将 @Slot 恢复为 int，因为Worker现在会发送一个安全的整数
     @Slot(int, str)
@@ -165,4 +214,8 @@ class VideoFromBgTab(QWidget):
         self.vbg_bg_browse_btn.setEnabled(enabled)
         self.vbg_output_browse_btn.setEnabled(enabled)
         self.vbg_format_combo.setEnabled(enabled)
-        self.vbg_codec_combo.setEnabled(enabled)
\ No newline at end of file
+        self.vbg_codec_combo.setEnabled(enabled)
+        self.vbg_loop_still_check.setEnabled(enabled)
+        self.vbg_batch_add_btn.setEnabled(enabled)
+        self.vbg_batch_clear_btn.setEnabled(enabled)
+        self.vbg_batch_workers_spin.setEnabled(enabled)
\ No newline at end of file